@@ -1,5 +1,5 @@
-from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Request, Header, Depends
+from fastapi.responses import StreamingResponse, Response, ORJSONResponse, FileResponse, PlainTextResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -9,38 +9,368 @@ from pathlib import Path
 from pydantic import BaseModel, Field as PydanticField, ConfigDict
 from typing import List, Optional
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 import openpyxl
+import numpy as np
+import pandas as pd
 import io
+import orjson
+import hashlib
+import hmac
+import base64
+import secrets
+import re
+import zlib
+import time
+import asyncio
+import cProfile
+import threading
+import contextvars
+from concurrent.futures import ProcessPoolExecutor
+import socket
+from collections import OrderedDict, defaultdict
+from bson import ObjectId
+from pymongo import monitoring, CursorType, DeleteOne, InsertOne, ReadPreference, ReplaceOne, ReturnDocument, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError, CollectionInvalid, DuplicateKeyError
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli  # Optional: preferred over gzip when the client accepts "br"
+except ImportError:
+    brotli = None
+
+try:
+    from pyinstrument import Profiler as SamplingProfiler  # Optional: used for X-Profile requests
+except ImportError:
+    SamplingProfiler = None
 
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
+# Configure logging
+# Per-item import detail is logged at DEBUG, so the default INFO level skips it
+# entirely; per-phase summaries are single-line JSON events (see log_event).
+logging.basicConfig(
+    level=os.environ.get('LOG_LEVEL', 'INFO').upper(),
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def log_event(event: str, level: int = logging.INFO, **fields):
+    """Log a structured summary event (counts, durations) as one JSON line"""
+    if logger.isEnabledFor(level):
+        logger.log(level, orjson.dumps({"event": event, **fields}, default=str).decode())
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 1)
+
+# Request instrumentation
+# Each request gets a RequestMetrics in a context variable. Motor runs pymongo on
+# a thread pool but copies the context, so the command listener below can charge
+# every MongoDB command (including getMore batches) to the request that issued it.
+class RequestMetrics:
+    __slots__ = ("start", "db_operations", "db_seconds", "pool_wait_seconds", "response_bytes", "_lock")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db_operations = 0
+        self.db_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+        self.response_bytes = 0
+        self._lock = threading.Lock()
+
+    def add_pool_wait(self, seconds: float):
+        with self._lock:
+            self.pool_wait_seconds += seconds
+
+    def add_command(self, duration_micros: int):
+        with self._lock:
+            self.db_operations += 1
+            self.db_seconds += duration_micros / 1_000_000
+
+
+_request_metrics: contextvars.ContextVar = contextvars.ContextVar("request_metrics", default=None)
+
+
+class MongoCommandTimer(monitoring.CommandListener):
+    """Charges MongoDB command round trips to the current request"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        metrics = _request_metrics.get()
+        if metrics is not None:
+            metrics.add_command(event.duration_micros)
+
+    def failed(self, event):
+        metrics = _request_metrics.get()
+        if metrics is not None:
+            metrics.add_command(event.duration_micros)
+
+
+class ConnectionPoolMetrics(monitoring.ConnectionPoolListener):
+    """
+    Connection pool checkout waits and occupancy for /api/metrics. A checkout
+    starts and finishes on the same driver thread, so the start time is kept in
+    a thread-local. Waits are also charged to the current request.
+    """
+
+    WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.wait_buckets = [0] * len(self.WAIT_BUCKETS)
+        self.failures = defaultdict(int)  # reason -> count
+        self.checked_out = 0
+        self.open_connections = 0
+
+    def _finish_wait(self):
+        start = getattr(self._local, "start", None)
+        if start is None:
+            return None
+        self._local.start = None
+        waited = time.perf_counter() - start
+        metrics = _request_metrics.get()
+        if metrics is not None:
+            metrics.add_pool_wait(waited)
+        return waited
+
+    def connection_check_out_started(self, event):
+        self._local.start = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        waited = self._finish_wait()
+        with self._lock:
+            self.checked_out += 1
+            if waited is not None:
+                self.checkouts += 1
+                self.wait_seconds += waited
+                for i, bound in enumerate(self.WAIT_BUCKETS):
+                    if waited <= bound:
+                        self.wait_buckets[i] += 1
+
+    def connection_check_out_failed(self, event):
+        self._finish_wait()
+        with self._lock:
+            self.failures[str(event.reason)] += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections -= 1
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def render(self) -> str:
+        with self._lock:
+            checkouts, wait_seconds = self.checkouts, self.wait_seconds
+            buckets, failures = list(self.wait_buckets), dict(self.failures)
+            checked_out, open_connections = self.checked_out, self.open_connections
+
+        lines = [
+            "# HELP stock_control_mongo_pool_checkout_wait_seconds Time spent waiting to check a connection out of the pool.",
+            "# TYPE stock_control_mongo_pool_checkout_wait_seconds histogram",
+        ]
+        for bound, count in zip(self.WAIT_BUCKETS, buckets):
+            lines.append(f'stock_control_mongo_pool_checkout_wait_seconds_bucket{{le="{bound}"}} {count}')
+        lines.append(f'stock_control_mongo_pool_checkout_wait_seconds_bucket{{le="+Inf"}} {checkouts}')
+        lines.append(f"stock_control_mongo_pool_checkout_wait_seconds_sum {wait_seconds:.6f}")
+        lines.append(f"stock_control_mongo_pool_checkout_wait_seconds_count {checkouts}")
+        lines.append("# HELP stock_control_mongo_pool_checkout_failures_total Pool checkouts that failed, by reason.")
+        lines.append("# TYPE stock_control_mongo_pool_checkout_failures_total counter")
+        for reason, count in failures.items():
+            lines.append(f'stock_control_mongo_pool_checkout_failures_total{{reason="{reason}"}} {count}')
+        lines.append("# HELP stock_control_mongo_pool_connections_checked_out Connections currently checked out.")
+        lines.append("# TYPE stock_control_mongo_pool_connections_checked_out gauge")
+        lines.append(f"stock_control_mongo_pool_connections_checked_out {checked_out}")
+        lines.append("# HELP stock_control_mongo_pool_connections_open Connections currently open (all servers).")
+        lines.append("# TYPE stock_control_mongo_pool_connections_open gauge")
+        lines.append(f"stock_control_mongo_pool_connections_open {open_connections}")
+        lines.append("# HELP stock_control_mongo_pool_max_size Configured maxPoolSize per server.")
+        lines.append("# TYPE stock_control_mongo_pool_max_size gauge")
+        lines.append(f"stock_control_mongo_pool_max_size {client.options.pool_options.max_pool_size}")
+        return "\n".join(lines) + "\n"
+
+
+class RouteMetricsRegistry:
+    """Per-route counters exported in Prometheus text format by /api/metrics"""
+
+    DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}  # (method, route, status) -> stats dict
+
+    def observe(self, method: str, route: str, status: int, seconds: float, metrics: RequestMetrics):
+        key = (method, route, str(status))
+        with self._lock:
+            stats = self._routes.get(key)
+            if stats is None:
+                stats = self._routes[key] = {
+                    "count": 0, "seconds": 0.0, "db_operations": 0, "db_seconds": 0.0,
+                    "response_bytes": 0, "buckets": [0] * len(self.DURATION_BUCKETS),
+                }
+            stats["count"] += 1
+            stats["seconds"] += seconds
+            stats["db_operations"] += metrics.db_operations
+            stats["db_seconds"] += metrics.db_seconds
+            stats["response_bytes"] += metrics.response_bytes
+            for i, bound in enumerate(self.DURATION_BUCKETS):
+                if seconds <= bound:
+                    stats["buckets"][i] += 1
+
+    def render(self) -> str:
+        with self._lock:
+            routes = {key: {**stats, "buckets": list(stats["buckets"])} for key, stats in self._routes.items()}
+
+        lines = []
+
+        def metric(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        # Counters are per worker process; the label tells scrapes of different workers apart
+        metric("stock_control_worker_info", "gauge", "Worker process that served this scrape.")
+        lines.append(f'stock_control_worker_info{{worker="{WORKER_ID}"}} 1')
+
+        def labels(key, le=None):
+            method, route, status = key
+            bucket = f',le="{le}"' if le is not None else ""
+            return f'{{method="{method}",route="{route}",status="{status}"{bucket}}}'
+
+        metric("stock_control_http_requests_total", "counter", "Requests handled, by route and status.")
+        for key, stats in routes.items():
+            lines.append(f"stock_control_http_requests_total{labels(key)} {stats['count']}")
+
+        metric("stock_control_http_request_duration_seconds", "histogram", "Wall time per request.")
+        for key, stats in routes.items():
+            for bound, count in zip(self.DURATION_BUCKETS, stats["buckets"]):
+                lines.append(f"stock_control_http_request_duration_seconds_bucket{labels(key, bound)} {count}")
+            lines.append(f"stock_control_http_request_duration_seconds_bucket{labels(key, '+Inf')} {stats['count']}")
+            lines.append(f"stock_control_http_request_duration_seconds_sum{labels(key)} {stats['seconds']:.6f}")
+            lines.append(f"stock_control_http_request_duration_seconds_count{labels(key)} {stats['count']}")
+
+        metric("stock_control_mongo_operations_total", "counter", "MongoDB commands issued while handling requests.")
+        for key, stats in routes.items():
+            lines.append(f"stock_control_mongo_operations_total{labels(key)} {stats['db_operations']}")
+
+        metric("stock_control_mongo_seconds_total", "counter", "Time spent in MongoDB commands while handling requests.")
+        for key, stats in routes.items():
+            lines.append(f"stock_control_mongo_seconds_total{labels(key)} {stats['db_seconds']:.6f}")
+
+        metric("stock_control_http_response_bytes_total", "counter", "Response body bytes sent (after compression).")
+        for key, stats in routes.items():
+            lines.append(f"stock_control_http_response_bytes_total{labels(key)} {stats['response_bytes']}")
+
+        return "\n".join(lines) + "\n"
+
+
+route_metrics = RouteMetricsRegistry()
+
+
+pool_metrics = ConnectionPoolMetrics()
+
+
 # MongoDB connection
+# Driver options are read from MONGO_* environment variables; unset ones keep the
+# value from MONGO_URL or the driver default.
+MONGO_ENV_OPTIONS = [
+    ("MONGO_MAX_POOL_SIZE", "maxPoolSize", int),
+    ("MONGO_MIN_POOL_SIZE", "minPoolSize", int),
+    ("MONGO_MAX_IDLE_TIME_MS", "maxIdleTimeMS", int),
+    ("MONGO_WAIT_QUEUE_TIMEOUT_MS", "waitQueueTimeoutMS", int),
+    ("MONGO_SERVER_SELECTION_TIMEOUT_MS", "serverSelectionTimeoutMS", int),
+    ("MONGO_CONNECT_TIMEOUT_MS", "connectTimeoutMS", int),
+    ("MONGO_SOCKET_TIMEOUT_MS", "socketTimeoutMS", int),
+    ("MONGO_COMPRESSORS", "compressors", str),  # e.g. "zstd,snappy,zlib" (first supported by the server wins)
+]
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+
+def mongo_client_options() -> dict:
+    options = {}
+    for env_name, option, convert in MONGO_ENV_OPTIONS:
+        value = os.environ.get(env_name)
+        if value:
+            options[option] = convert(value)
+    return options
+
+
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, event_listeners=[MongoCommandTimer(), pool_metrics], **mongo_client_options())
 db = client[os.environ['DB_NAME']]
+# Reports (integrity check, export, analytics, dashboard) tolerate replication lag, so they
+# can be served by secondaries and keep load off the primary
+REPORT_READ_PREFERENCE = os.environ.get('MONGO_REPORT_READ_PREFERENCE', 'secondaryPreferred')
+report_db = client.get_database(os.environ['DB_NAME'], read_preference=READ_PREFERENCES[REPORT_READ_PREFERENCE])
 
 # Create the main app without a prefix
-app = FastAPI()
+# ORJSONResponse is much faster than the stdlib json encoder on our large list responses
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
 
-# Startup event: Repair orphaned field_id references
+# Startup event: join worker coordination; the elected leader queues the
+# orphaned field_id repair (see Coordinator)
 @app.on_event("startup")
-async def startup_repair_database():
+async def startup_coordination():
+    log_event("mongo_client", options=mongo_client_options(), report_read_preference=REPORT_READ_PREFERENCE)
+    await db.fields.create_index("id")
+    await db.fields.create_index("harvest_year")
+    await db.stock_intakes.create_index("field_id")
+    await db.stock_intakes.create_index("shed_id")
+    await db.zones.create_index("shed_id")
+    await db.users.create_index("employee_number")
+    await load_session_secret()
+    await job_runner.ensure_indexes()
+    await cache_bus.start()
+    coordinator.start()
+
+
+async def startup_repair_database(job: "JobContext" = None):
     """
     Automatically repair orphaned field_id references on server startup.
     This fixes stock intakes that reference field_ids that no longer exist
     after Excel re-uploads.
     """
+    repair_start = time.perf_counter()
     try:
-        print("\n" + "="*70)
-        print("🔧 STARTUP: Checking for orphaned field_id references...")
-        print("="*70)
+        logger.info("Startup repair: checking for orphaned field_id references")
         
         # Get all fields
         fields = await db.fields.find({}, {"_id": 0}).to_list(length=None)
@@ -65,15 +395,17 @@ async def startup_repair_database():
         orphaned = [i for i in intakes if i.get('field_id') not in field_ids]
         
         if len(orphaned) == 0:
-            print("✅ Database is healthy - no orphaned references found")
-            print("="*70 + "\n")
-            return
+            log_event("startup_repair", fields=len(fields), intakes=len(intakes), orphaned=0,
+                      duration_ms=_elapsed_ms(repair_start))
+            return {"orphaned": 0, "repaired": 0}
         
-        print(f"⚠️  Found {len(orphaned)} orphaned stock intakes - repairing...")
+        logger.warning("Startup repair: found %d orphaned stock intakes, repairing", len(orphaned))
         
         # Repair orphaned intakes
         repaired = 0
-        for intake in orphaned:
+        for index, intake in enumerate(orphaned):
+            if job and index % 100 == 0:
+                await job.progress(60 * index / len(orphaned), "Repairing orphaned stock intakes")
             field_name = intake.get('field_name')
             intake_variety = intake.get('variety')
             zone_id = intake.get('zone_id')
@@ -119,11 +451,11 @@ async def startup_repair_database():
                     {"$set": {"field_id": matching_field['id']}}
                 )
                 repaired += 1
-        
-        print(f"✅ Repaired {repaired} orphaned stock intakes")
+                logger.debug("Repaired intake %s -> field %s", intake['id'], matching_field['id'])
         
         # Update zone totals
-        print("🔧 Updating zone totals...")
+        if job:
+            await job.progress(60, "Updating zone totals")
         zones = await db.zones.find({}, {"_id": 0}).to_list(length=None)
         for zone in zones:
             pipeline = [
@@ -137,14 +469,14 @@ async def startup_repair_database():
                 {"$set": {"total_quantity": total_quantity}}
             )
         
-        print(f"✅ Updated totals for {len(zones)} zones")
-        print("✅ STARTUP REPAIR COMPLETED SUCCESSFULLY!")
-        print("="*70 + "\n")
+        log_event("startup_repair", fields=len(fields), intakes=len(intakes), orphaned=len(orphaned),
+                  repaired=repaired, zones_updated=len(zones), duration_ms=_elapsed_ms(repair_start))
+        await cache_bus.invalidate("stock")
+        return {"orphaned": len(orphaned), "repaired": repaired, "zones_updated": len(zones)}
         
-    except Exception as e:
-        print(f"❌ Error during startup repair: {e}")
-        print("⚠️  Server will continue but database may have issues")
-        print("="*70 + "\n")
+    except Exception:
+        logger.exception("Startup repair failed; server will continue but the database may have issues")
+        raise
 
 
 # Define Models
@@ -155,7 +487,8 @@ class Field(BaseModel):
     area: str
     crop_type: str
     variety: str
-    available_grades: List[str] = []
+    available_grades: List[str] = []  # Only for fields created by hand; imported fields use grade_table
+    grade_table: Optional[str] = None  # Id in the grade_tables collection
     harvest_year: str = "2025"  # Default harvest year
     type: Optional[str] = None  # Type column for classification (Red, Brown, Special, etc.)
 
@@ -168,6 +501,16 @@ class FieldCreate(BaseModel):
     harvest_year: str = "2025"
     type: Optional[str] = None
 
+# Field ids are derived from the natural key, so re-importing the workbook keeps every
+# id (and the stock pointing at it) stable without a remapping pass.
+FIELD_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "stock-control/fields")
+
+
+def field_id_for(name: str, variety: str, harvest_year: str) -> str:
+    """Deterministic id for a field; name is "<farm> - <field>" as imported"""
+    key = "|".join(" ".join(str(part).split()).casefold() for part in (name, variety, harvest_year))
+    return str(uuid.uuid5(FIELD_ID_NAMESPACE, key))
+
 class DoorPosition(BaseModel):
     side: str  # "top", "bottom", "left", "right"
     position: float  # Position along that side (in meters)
@@ -271,6 +614,16 @@ class StockIntakeCreate(BaseModel):
     date: str
     grade: Optional[str] = None
 
+class IntakeDistribution(BaseModel):
+    field_id: str
+    grade: str
+    quantity: float
+    date: str
+    zone_ids: List[str] = []  # Candidate zones, filled in this order
+    auto_pick: bool = False  # Pick zones by free capacity (from zone_ids if given, else all of shed_id)
+    shed_id: Optional[str] = None
+    employee_number: Optional[str] = None
+
 class StockMovement(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = PydanticField(default_factory=lambda: str(uuid.uuid4()))
@@ -323,36 +676,606 @@ class UserCreate(BaseModel):
 class LoginRequest(BaseModel):
     employee_number: str
 
+class ZonePosition(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str
+    shed_id: str
+    x: float
+    y: float
+
+class ShedName(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str
+    name: str
+
+class ZoneRemapRequest(BaseModel):
+    zones: List[ZonePosition]  # Zones of the deployment the intakes came from (its GET /api/zones)
+    sheds: List[ShedName] = []  # Its sheds, to match by shed name where shed ids differ
+    dry_run: bool = False
+
+
+# Fast response path for documents read back from our own collections.
+# They were validated on the way in, so instead of letting FastAPI re-validate
+# every document against response_model we only fill in missing defaults and
+# hand the dicts straight to orjson. response_model stays on the routes for the
+# OpenAPI schema.
+_model_defaults_cache = {}
+
+def _model_defaults(model) -> dict:
+    """Static defaults of a model's optional fields, computed once per model"""
+    defaults = _model_defaults_cache.get(model)
+    if defaults is None:
+        defaults = {
+            name: info.default
+            for name, info in model.model_fields.items()
+            if not info.is_required() and info.default_factory is None
+        }
+        _model_defaults_cache[model] = defaults
+    return defaults
+
+def fast_list_response(model, docs: list) -> ORJSONResponse:
+    """Serialise stored documents as a List[model] response without re-validation"""
+    defaults = _model_defaults(model)
+    missing = [name for name in defaults if any(name not in doc for doc in docs)]
+    if missing:
+        docs = [{**defaults, **doc} for doc in docs]
+    return ORJSONResponse(docs)
+
+
+# Multi-worker Coordination
+# Several uvicorn/gunicorn workers can serve the same database. Anything that must
+# happen once (startup repair, scheduled sweeps, one job per kind) is guarded by a
+# lease document in the leases collection, and in-process caches are invalidated
+# across workers through the capped cache_events collection.
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+LEASE_TTL_SECONDS = int(os.environ.get('LEASE_TTL_SECONDS', '30'))
+
+
+class MongoLease:
+    """A named lease; at most one worker holds it until it expires or is released"""
+
+    def __init__(self, name: str, ttl: int = LEASE_TTL_SECONDS):
+        self.name = name
+        self.ttl = ttl
+        self.held = False
+
+    async def acquire(self) -> bool:
+        """Take the lease if it is free or expired, or renew it if we already hold it"""
+        now = datetime.now(timezone.utc)
+        try:
+            lease = await db.leases.find_one_and_update(
+                {"_id": self.name, "$or": [{"holder": WORKER_ID}, {"expires_at": {"$lt": now}}]},
+                {"$set": {"holder": WORKER_ID, "expires_at": now + timedelta(seconds=self.ttl), "renewed_at": now}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+        except DuplicateKeyError:
+            # The lease exists and another worker holds it
+            lease = None
+        self.held = bool(lease) and lease["holder"] == WORKER_ID
+        return self.held
+
+    async def release(self):
+        if self.held:
+            await db.leases.update_one(
+                {"_id": self.name, "holder": WORKER_ID},
+                {"$set": {"holder": None, "expires_at": datetime.now(timezone.utc)}}
+            )
+            self.held = False
+
+
+class CacheInvalidationBus:
+    """
+    Data versions per topic ("fields", "stock", ...). Caches store entries with the
+    version they were built from; invalidate() bumps the version locally and
+    broadcasts it so every other worker bumps too. Delivery is asynchronous, so
+    other workers may serve the previous entry for a moment after a write.
+
+    Events are numbered from a counter document rather than by timestamp: two
+    workers can insert out of order (and their clocks can disagree), so the
+    listener tracks which sequence numbers it has seen instead of a time.
+    """
+
+    COLLECTION = "cache_events"
+    CAPPED_SIZE = 1024 * 1024
+    COUNTER_ID = "cache_events_seq"  # metadata document holding the last sequence number
+    POLL_INTERVAL = 1.0
+    GAP_TIMEOUT = 30.0  # give up on a sequence number whose event never arrives (its worker died)
+
+    def __init__(self):
+        self._versions = defaultdict(int)
+        self._task = None
+        self._tailable = True
+        self._floor, self._seen, self._gap_since = 0, set(), None
+
+    def version(self, topic: str) -> int:
+        return self._versions[topic]
+
+    async def invalidate(self, *topics: str):
+        for topic in topics:
+            self._versions[topic] += 1
+        counter = await db.metadata.find_one_and_update(
+            {"_id": self.COUNTER_ID}, {"$inc": {"seq": 1}}, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        await db[self.COLLECTION].insert_one(
+            {"seq": counter["seq"], "topics": list(topics), "worker": WORKER_ID, "at": datetime.now(timezone.utc)}
+        )
+
+    async def start(self):
+        try:
+            await db.create_collection(self.COLLECTION, capped=True, size=self.CAPPED_SIZE)
+        except CollectionInvalid:
+            pass  # Already created by another worker
+        except Exception:
+            pass  # e.g. no permission to create it; the capped check below reports it
+        try:
+            self._tailable = bool((await db[self.COLLECTION].options()).get("capped"))
+        except Exception:
+            self._tailable = False
+        if not self._tailable:
+            # Tailable cursors need a capped collection; fall back to polling once a second
+            logger.warning("%s is not a capped collection; cache invalidation will poll", self.COLLECTION)
+        counter = await db.metadata.find_one({"_id": self.COUNTER_ID})
+        self._task = asyncio.create_task(self._listen(counter["seq"] if counter else 0))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+
+    def _mark_seen(self, seq: int):
+        self._seen.add(seq)
+        while self._floor + 1 in self._seen:
+            self._floor += 1
+            self._seen.discard(self._floor)
+
+    def _check_gap(self):
+        """Stop waiting for a missing number once its event is GAP_TIMEOUT overdue"""
+        if not self._seen:
+            self._gap_since = None
+        elif self._gap_since is None:
+            self._gap_since = time.monotonic()
+        elif time.monotonic() - self._gap_since > self.GAP_TIMEOUT:
+            # The worker that took the number stopped before inserting the event
+            self._floor = min(self._seen) - 1
+            self._mark_seen(self._floor + 1)
+            self._gap_since = None
+
+    async def _listen(self, floor: int):
+        """
+        Tail the capped collection (or poll it) and apply other workers' invalidations.
+        _floor is the highest sequence number at or below which every event has been
+        seen; _seen holds the numbers above it that arrived ahead of a gap.
+        """
+        self._floor, self._seen, self._gap_since = floor, set(), None
+        cursor_type = CursorType.TAILABLE_AWAIT if self._tailable else CursorType.NON_TAILABLE
+        failures = 0
+        while True:
+            try:
+                cursor = db[self.COLLECTION].find({"seq": {"$gt": self._floor}}, cursor_type=cursor_type)
+                async for event in cursor:
+                    seq = event["seq"]
+                    if seq > self._floor and seq not in self._seen:
+                        if event["worker"] != WORKER_ID:
+                            for topic in event["topics"]:
+                                self._versions[topic] += 1
+                        self._mark_seen(seq)
+                    self._check_gap()
+                failures = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                failures += 1
+                if failures == 1:
+                    logger.exception("Cache invalidation listener failed; retrying with backoff")
+            self._check_gap()
+            # A tailable cursor dies when the collection is empty; reopen it (backing off while it fails)
+            await asyncio.sleep(min(2 ** failures, 30) if failures else self.POLL_INTERVAL)
+
+
+class VersionedCache:
+    """
+    Small in-process cache whose entries are dropped when the version of any of
+    its topics moves. max_age bounds staleness from writes that bypass the API
+    (scripts).
+    """
+
+    def __init__(self, *topics: str, max_entries: int = 64, max_age: float = 300.0):
+        self.topics = topics
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries = OrderedDict()  # key -> (version, stored_at, value)
+
+    def version(self) -> tuple:
+        """Read before querying the database, and pass to put() with the result"""
+        return tuple(cache_bus.version(topic) for topic in self.topics)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if (entry is None or entry[0] != self.version()
+                or time.monotonic() - entry[1] > self.max_age):
+            return None
+        self._entries.move_to_end(key)
+        return entry[2]
+
+    def put(self, key, version: tuple, value):
+        self._entries[key] = (version, time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+cache_bus = CacheInvalidationBus()
+
+
+class Coordinator:
+    """Keeps the leader lease renewed and runs leader-only work on the leader"""
+
+    def __init__(self):
+        self.lease = MongoLease("leader")
+        self.is_leader = False
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+        await self.lease.release()
+
+    async def _loop(self):
+        while True:
+            try:
+                leader = await self.lease.acquire()
+                if leader and not self.is_leader:
+                    log_event("leader_elected", worker=WORKER_ID)
+                    await job_runner.submit("startup_repair", startup_repair_database)
+                elif self.is_leader and not leader:
+                    log_event("leader_lost", level=logging.WARNING, worker=WORKER_ID)
+                self.is_leader = leader
+                if leader:
+                    # Scheduled work: fail jobs whose worker stopped heartbeating
+                    await job_runner.fail_stale_jobs()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Leader election round failed")
+            await asyncio.sleep(LEASE_TTL_SECONDS / 3)
+
+
+coordinator = Coordinator()
+
+
+# Background Jobs
+# Long-running admin operations run as in-process asyncio tasks and are tracked
+# in the jobs collection (queued -> running -> done/failed, with progress).
+# Jobs of the same kind run one at a time across all workers (a "job:<kind>"
+# lease); resubmitting identical input while a job is still queued or running
+# returns that job instead of starting another. Workers heartbeat their jobs so
+# the leader can fail jobs left behind by a worker that died.
+JOB_ACTIVE_STATES = ["queued", "running"]
+JOB_RETENTION = timedelta(days=int(os.environ.get('JOB_RETENTION_DAYS', '7')))
+
+
+class JobContext:
+    """Handle passed to a job function for reporting progress"""
+
+    def __init__(self, job_id: str):
+        self.id = job_id
+        self._percent = -1
+
+    async def progress(self, percent: float, message: Optional[str] = None):
+        """Record progress; writes are skipped until it moves by at least 1%"""
+        percent = max(0, min(100, int(percent)))
+        if percent == self._percent:
+            return
+        self._percent = percent
+        update = {"progress": percent}
+        if message:
+            update["message"] = message
+        await db.jobs.update_one({"id": self.id}, {"$set": update})
+
+
+class JobRunner:
+    def __init__(self):
+        self._locks = {}  # kind -> asyncio.Lock, so this worker waits on its own lease once
+        self._tasks = set()  # strong references to running tasks
+
+    async def fail_stale_jobs(self):
+        """Fail queued/running jobs whose worker has stopped heartbeating"""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=LEASE_TTL_SECONDS)
+        result = await db.jobs.update_many(
+            {"status": {"$in": JOB_ACTIVE_STATES},
+             "$or": [{"heartbeat_at": {"$lt": cutoff}}, {"heartbeat_at": {"$exists": False}}]},
+            {"$set": {"status": "failed", "error": "Interrupted: the worker running this job stopped",
+                      "finished_at": datetime.now(timezone.utc).isoformat(),
+                      "expires_at": datetime.now(timezone.utc) + JOB_RETENTION}}
+        )
+        if result.modified_count:
+            log_event("jobs_interrupted", level=logging.WARNING, count=result.modified_count)
+
+    async def ensure_indexes(self):
+        await db.jobs.create_index("id", unique=True)
+        await db.jobs.create_index("expires_at", expireAfterSeconds=0)
+        # At most one active job per (kind, dedupe_key), enforced by the server so that
+        # retries landing together on different workers cannot both start one ($in in a
+        # partial filter needs MongoDB 6.0+)
+        await db.jobs.create_index(
+            [("kind", 1), ("dedupe_key", 1)], name="active_dedupe", unique=True,
+            partialFilterExpression={"dedupe_key": {"$type": "string"}, "status": {"$in": JOB_ACTIVE_STATES}},
+        )
+        await db.job_files.create_index("expires_at", expireAfterSeconds=0)
+
+    async def submit(self, kind: str, func, *args, dedupe_key: Optional[str] = None, submitted_by: Optional[str] = None) -> dict:
+        """Queue func(job, *args) and return the job document"""
+        job = {
+            "id": str(uuid.uuid4()),
+            "kind": kind,
+            "status": "queued",
+            "progress": 0,
+            "message": None,
+            "result": None,
+            "error": None,
+            "dedupe_key": dedupe_key,
+            "submitted_by": submitted_by,
+            "worker_id": WORKER_ID,
+            "heartbeat_at": datetime.now(timezone.utc),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        while True:
+            try:
+                await db.jobs.insert_one(dict(job))
+                break
+            except DuplicateKeyError:
+                if not dedupe_key:
+                    raise
+            # The active_dedupe index refused it: the same job is already queued or running
+            existing = await db.jobs.find_one(
+                {"kind": kind, "dedupe_key": dedupe_key, "status": {"$in": JOB_ACTIVE_STATES}}, {"_id": 0}
+            )
+            if existing:
+                return existing
+            # It finished in between; try again
+
+        task = asyncio.create_task(self._run(job, func, args))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    async def _heartbeat(self, job_id: str, lease: MongoLease):
+        while True:
+            await asyncio.sleep(LEASE_TTL_SECONDS / 3)
+            try:
+                await db.jobs.update_one({"id": job_id}, {"$set": {"heartbeat_at": datetime.now(timezone.utc)}})
+                if lease.held:
+                    await lease.acquire()
+            except Exception:
+                logger.exception("Job %s heartbeat failed", job_id)
+
+    async def _run(self, job: dict, func, args):
+        lock = self._locks.setdefault(job["kind"], asyncio.Lock())
+        lease = MongoLease(f"job:{job['kind']}")
+        heartbeat = asyncio.create_task(self._heartbeat(job["id"], lease))
+        try:
+            async with lock:
+                # Wait for a job of the same kind on another worker to finish
+                while not await lease.acquire():
+                    await asyncio.sleep(1)
+                try:
+                    await self._execute(job, func, args)
+                finally:
+                    await lease.release()
+        finally:
+            heartbeat.cancel()
+
+    async def _execute(self, job: dict, func, args):
+        await db.jobs.update_one(
+            {"id": job["id"]},
+            {"$set": {"status": "running", "started_at": datetime.now(timezone.utc).isoformat()}}
+        )
+        job_start = time.perf_counter()
+        finished = {"expires_at": datetime.now(timezone.utc) + JOB_RETENTION}
+        try:
+            result = await func(JobContext(job["id"]), *args)
+            finished.update({"status": "done", "progress": 100, "result": result})
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job["id"], job["kind"])
+            finished.update({"status": "failed", "error": str(getattr(e, "detail", e))})
+        finished["finished_at"] = datetime.now(timezone.utc).isoformat()
+        await db.jobs.update_one({"id": job["id"]}, {"$set": finished})
+        log_event("job_finished", job_id=job["id"], kind=job["kind"], status=finished["status"],
+                  duration_ms=_elapsed_ms(job_start))
+
+
+job_runner = JobRunner()
+
+
+def job_accepted(job: dict) -> ORJSONResponse:
+    """202 response pointing the client at the job status endpoint"""
+    return ORJSONResponse(
+        status_code=202,
+        content={
+            "job_id": job["id"],
+            "kind": job["kind"],
+            "status": job["status"],
+            "status_url": f"/api/jobs/{job['id']}",
+        },
+    )
+
+
+# Workbook Process Pool
+# openpyxl parsing and generation is CPU-bound, so it runs in worker processes
+# instead of on the event loop. Functions submitted here must be module-level
+# and exchange plain data (dicts, lists, tuples, bytes) with the caller.
+WORKBOOK_WORKERS = int(os.environ.get('WORKBOOK_WORKERS', '2'))
+WORKBOOK_QUEUE_LIMIT = int(os.environ.get('WORKBOOK_QUEUE_LIMIT', '4'))
+
+
+class WorkbookPool:
+    def __init__(self, workers: int, queue_limit: int):
+        self.workers = workers
+        self.queue_limit = queue_limit  # max tasks running or waiting for a worker
+        self.pending = 0
+        self._executor = None
+
+    def check_capacity(self):
+        """Reject new work up front when the queue is already full"""
+        if self.pending >= self.queue_limit:
+            raise HTTPException(
+                status_code=503,
+                detail=f"Workbook processing is busy ({self.pending} tasks queued); try again shortly",
+            )
+
+    async def run(self, func, *args):
+        """Run func(*args) in a worker process (or a thread when WORKBOOK_WORKERS=0)"""
+        self.check_capacity()
+        self.pending += 1
+        try:
+            if self.workers <= 0:
+                return await asyncio.to_thread(func, *args)
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self, wait: bool = False):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+
+workbook_pool = WorkbookPool(WORKBOOK_WORKERS, WORKBOOK_QUEUE_LIMIT)
+
 
 # Field Routes
+# Fields are read on every screen but only change on import or field edits
+fields_cache = VersionedCache("fields", "grades")
+grade_tables_cache = VersionedCache("grades", max_entries=1)
+
+async def grade_table_map() -> dict:
+    """Grade table id -> grade list, cached until an import changes a table"""
+    tables = grade_tables_cache.get("grade_tables")
+    if tables is None:
+        version = grade_tables_cache.version()
+        docs = await db.grade_tables.find({}, {"_id": 0, "id": 1, "grades": 1}).to_list(length=None)
+        tables = {doc["id"]: doc["grades"] for doc in docs}
+        grade_tables_cache.put("grade_tables", version, tables)
+    return tables
+
+async def expand_field_grades(fields: list) -> list:
+    """Fill available_grades from each field's grade table; fields created by hand keep their own list"""
+    tables = await grade_table_map()
+    return [{**field, "available_grades": tables.get(field["grade_table"], [])} if field.get("grade_table") else field
+            for field in fields]
+
+harvest_years_cache = VersionedCache("fields", "stock", max_entries=1)
+
+async def refresh_harvest_year_metadata() -> dict:
+    """Recount fields per harvest year into the harvest_years metadata document"""
+    counts = await db.fields.aggregate([
+        {"$group": {"_id": {"$ifNull": ["$harvest_year", "2025"]}, "fields": {"$sum": 1}}}
+    ]).to_list(length=None)
+    meta = {
+        "_id": "harvest_years",
+        "fields": {row["_id"]: row["fields"] for row in counts},
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }
+    await db.metadata.replace_one({"_id": "harvest_years"}, meta, upsert=True)
+    return meta
+
+async def fields_changed():
+    """Call after any write to the fields collection"""
+    await refresh_harvest_year_metadata()
+    # Edits outside the workbook mean the next upload must re-read the field sheets
+    await db.metadata.update_one({"_id": "workbook_import"}, {"$unset": {"fields_hash": ""}})
+    await cache_bus.invalidate("fields")
+
 @api_router.post("/fields", response_model=Field)
 async def create_field(input: FieldCreate):
-    field_obj = Field(**input.model_dump())
+    field_obj = Field(id=field_id_for(input.name, input.variety, input.harvest_year), **input.model_dump())
+    if await db.fields.find_one({"id": field_obj.id}, {"_id": 1}):
+        raise HTTPException(status_code=409, detail="A field with this name, variety and harvest year already exists")
     doc = field_obj.model_dump()
     await db.fields.insert_one(doc)
+    await fields_changed()
     return field_obj
 
 @api_router.get("/fields", response_model=List[Field])
-async def get_fields(harvest_year: Optional[str] = None):
-    query = {}
-    if harvest_year:
-        query["harvest_year"] = harvest_year
-    fields = await db.fields.find(query, {"_id": 0}).to_list(length=None)
-    return fields
+async def get_fields(harvest_year: Optional[str] = None, expand_grades: bool = False):
+    """
+    Imported fields carry a grade_table id rather than their grade list; resolve it
+    with GET /grade-tables, or pass expand_grades=true to get available_grades filled in.
+    """
+    key = ("fields", harvest_year, expand_grades)
+    body = fields_cache.get(key)
+    if body is None:
+        version = fields_cache.version()
+        query = {}
+        if harvest_year:
+            query["harvest_year"] = harvest_year
+        fields = await db.fields.find(query, {"_id": 0}).to_list(length=None)
+        if expand_grades:
+            fields = await expand_field_grades(fields)
+        body = fast_list_response(Field, fields).body
+        fields_cache.put(key, version, body)
+    return Response(content=body, media_type="application/json")
+
+@api_router.get("/grade-tables")
+async def get_grade_tables():
+    """Grade lists by grade table id, as referenced by Field.grade_table"""
+    return {"grade_tables": await grade_table_map()}
 
 @api_router.get("/harvest-years")
 async def get_harvest_years():
-    """Get list of available harvest years from fields"""
-    fields = await db.fields.find({}, {"_id": 0, "harvest_year": 1}).to_list(length=None)
-    years = list(set([f.get("harvest_year", "2025") for f in fields]))
-    years.sort()
-    return {"harvest_years": years}
+    """Harvest years, each with its field count, intake count and tonnage (hot plus archived)"""
+    result = harvest_years_cache.get("harvest_years")
+    if result is None:
+        version = harvest_years_cache.version()
+        meta = await db.metadata.find_one({"_id": "harvest_years"})
+        if meta is None:
+            meta = await refresh_harvest_year_metadata()
+        
+        # Group intakes per field first so the $lookup runs once per field, not once per intake
+        stock = await db.stock_intakes.aggregate([
+            {"$group": {"_id": "$field_id", "intakes": {"$sum": 1}, "tonnage": {"$sum": "$quantity"}}},
+            {"$lookup": {"from": "fields", "localField": "_id", "foreignField": "id", "as": "field"}},
+            {"$unwind": "$field"},
+            {"$group": {"_id": {"$ifNull": ["$field.harvest_year", "2025"]},
+                        "intakes": {"$sum": "$intakes"}, "tonnage": {"$sum": "$tonnage"}}},
+        ]).to_list(length=None)
+        archived = await db.harvest_rollups.find(
+            {}, {"_id": 0, "harvest_year": 1, "intakes": 1, "total_quantity": 1}
+        ).to_list(length=None)
+        
+        years = {}
+        def year_entry(year):
+            return years.setdefault(year, {"harvest_year": year, "fields": 0, "intakes": 0, "tonnage": 0.0, "archived": False})
+        for year, count in meta["fields"].items():
+            year_entry(year)["fields"] = count
+        for row in stock:
+            entry = year_entry(row["_id"])
+            entry["intakes"] += row["intakes"]
+            entry["tonnage"] += row["tonnage"]
+        for rollup in archived:
+            entry = year_entry(rollup["harvest_year"])
+            entry["intakes"] += rollup["intakes"]
+            entry["tonnage"] += rollup["total_quantity"]
+            entry["archived"] = True
+        
+        ordered = sorted(years)
+        result = {"harvest_years": ordered, "years": [years[year] for year in ordered]}
+        harvest_years_cache.put("harvest_years", version, result)
+    return result
 
 @api_router.delete("/fields/{field_id}")
 async def delete_field(field_id: str):
     result = await db.fields.delete_one({"id": field_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Field not found")
+    await fields_changed()
     return {"message": "Field deleted"}
 
 
@@ -362,6 +1285,7 @@ async def create_shed(input: ShedCreate):
     shed_obj = Shed(**input.model_dump())
     doc = shed_obj.model_dump()
     await db.sheds.insert_one(doc)
+    await cache_bus.invalidate("layout")
     return shed_obj
 
 @api_router.get("/sheds", response_model=List[Shed])
@@ -369,7 +1293,7 @@ async def get_sheds():
     sheds = await db.sheds.find({}, {"_id": 0}).to_list(1000)
     # Sort by order field (Excel sheet order), fallback to name if order doesn't exist
     sheds.sort(key=lambda x: (x.get('order', 9999), x.get('name', '')))
-    return sheds
+    return fast_list_response(Shed, sheds)
 
 @api_router.get("/sheds/{shed_id}", response_model=Shed)
 async def get_shed(shed_id: str):
@@ -388,6 +1312,7 @@ async def update_shed_crop_type(shed_id: str, crop_type: str):
     )
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Shed not found")
+    await cache_bus.invalidate("layout")
     return {"message": "Shed crop type updated", "crop_type": crop_type}
 
 @api_router.delete("/sheds/{shed_id}")
@@ -399,22 +1324,31 @@ async def delete_shed(shed_id: str):
     await db.zones.delete_many({"shed_id": shed_id})
     await db.fridges.delete_many({"shed_id": shed_id})
     await db.doors.delete_many({"shed_id": shed_id})
+    await cache_bus.invalidate("layout")
     return {"message": "Shed deleted"}
 
 
 # Zone Routes
+async def layout_changed(shed_id: Optional[str]):
+    """Call after editing a shed's zones, fridges or doors by hand"""
+    if shed_id:
+        # The next upload must re-read this shed's sheet instead of trusting its hash
+        await db.sheds.update_one({"id": shed_id}, {"$unset": {"sheet_hash": ""}})
+    await cache_bus.invalidate("layout")
+
 @api_router.post("/zones", response_model=Zone)
 async def create_zone(input: ZoneCreate):
     zone_obj = Zone(**input.model_dump())
     doc = zone_obj.model_dump()
     await db.zones.insert_one(doc)
+    await layout_changed(input.shed_id)
     return zone_obj
 
 @api_router.get("/zones", response_model=List[Zone])
 async def get_zones(shed_id: Optional[str] = None):
     query = {"shed_id": shed_id} if shed_id else {}
     zones = await db.zones.find(query, {"_id": 0}).to_list(length=None)
-    return zones
+    return fast_list_response(Zone, zones)
 
 @api_router.put("/zones/{zone_id}", response_model=Zone)
 async def update_zone(zone_id: str, quantity: float):
@@ -426,15 +1360,17 @@ async def update_zone(zone_id: str, quantity: float):
         {"id": zone_id},
         {"$set": {"total_quantity": quantity}}
     )
+    await cache_bus.invalidate("stock")
     
     zone["total_quantity"] = quantity
     return zone
 
 @api_router.delete("/zones/{zone_id}")
 async def delete_zone(zone_id: str):
-    result = await db.zones.delete_one({"id": zone_id})
-    if result.deleted_count == 0:
+    zone = await db.zones.find_one_and_delete({"id": zone_id}, {"_id": 0, "shed_id": 1})
+    if zone is None:
         raise HTTPException(status_code=404, detail="Zone not found")
+    await layout_changed(zone.get("shed_id"))
     return {"message": "Zone deleted"}
 
 
@@ -444,19 +1380,21 @@ async def create_fridge(input: FridgeCreate):
     fridge_obj = Fridge(**input.model_dump())
     doc = fridge_obj.model_dump()
     await db.fridges.insert_one(doc)
+    await layout_changed(input.shed_id)
     return fridge_obj
 
 @api_router.get("/fridges", response_model=List[Fridge])
 async def get_fridges(shed_id: Optional[str] = None):
     query = {"shed_id": shed_id} if shed_id else {}
     fridges = await db.fridges.find(query, {"_id": 0}).to_list(length=None)
-    return fridges
+    return fast_list_response(Fridge, fridges)
 
 @api_router.delete("/fridges/{fridge_id}")
 async def delete_fridge(fridge_id: str):
-    result = await db.fridges.delete_one({"id": fridge_id})
-    if result.deleted_count == 0:
+    fridge = await db.fridges.find_one_and_delete({"id": fridge_id}, {"_id": 0, "shed_id": 1})
+    if fridge is None:
         raise HTTPException(status_code=404, detail="Fridge not found")
+    await layout_changed(fridge.get("shed_id"))
     return {"message": "Fridge deleted"}
 
 
@@ -466,22 +1404,175 @@ async def create_door(input: DoorCreate):
     door_obj = Door(**input.model_dump())
     doc = door_obj.model_dump()
     await db.doors.insert_one(doc)
+    await layout_changed(input.shed_id)
     return door_obj
 
 @api_router.get("/doors", response_model=List[Door])
 async def get_doors(shed_id: Optional[str] = None):
     query = {"shed_id": shed_id} if shed_id else {}
     doors = await db.doors.find(query, {"_id": 0}).to_list(length=None)
-    return doors
+    return fast_list_response(Door, doors)
 
 @api_router.delete("/doors/{door_id}")
 async def delete_door(door_id: str):
-    result = await db.doors.delete_one({"id": door_id})
-    if result.deleted_count == 0:
+    door = await db.doors.find_one_and_delete({"id": door_id}, {"_id": 0, "shed_id": 1})
+    if door is None:
         raise HTTPException(status_code=404, detail="Door not found")
+    await layout_changed(door.get("shed_id"))
     return {"message": "Door deleted"}
 
 
+# Floor Plan Route (compact payload for slow shed Wi-Fi)
+PLAN_FORMAT_VERSION = 1
+
+
+def _compact_number(value):
+    """Render whole-number floats as ints so 2.0 is sent as 2"""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _columnar(items: list, columns: dict, strings: list, string_index: dict) -> dict:
+    """
+    Convert a list of documents into column arrays.
+    columns maps output key -> (document key, default, is_string).
+    String columns are stored as indexes into the shared string table.
+    """
+    result = {key: [] for key in columns}
+    for item in items:
+        for key, (doc_key, default, is_string) in columns.items():
+            value = item.get(doc_key, default)
+            if is_string:
+                value = "" if value is None else str(value)
+                if value not in string_index:
+                    string_index[value] = len(strings)
+                    strings.append(value)
+                result[key].append(string_index[value])
+            else:
+                result[key].append(_compact_number(value))
+    return result
+
+
+@api_router.get("/sheds/{shed_id}/plan")
+async def get_shed_plan(shed_id: str, request: Request):
+    """
+    Return a shed's whole layout (zones, fridges, doors) in one columnar payload.
+    Ids and names go into a shared string table and each object type is a set of
+    parallel arrays. The ETag lets clients revalidate with If-None-Match, and
+    gzip/brotli is negotiated by CompressionMiddleware.
+    """
+    shed = await db.sheds.find_one({"id": shed_id}, {"_id": 0})
+    if not shed:
+        raise HTTPException(status_code=404, detail="Shed not found")
+
+    geometry = {"_id": 0, "id": 1, "name": 1, "x": 1, "y": 1, "width": 1, "height": 1}
+    zones = await db.zones.find(
+        {"shed_id": shed_id}, {**geometry, "max_capacity": 1, "total_quantity": 1}
+    ).to_list(length=None)
+    fridges = await db.fridges.find({"shed_id": shed_id}, geometry).to_list(length=None)
+    doors = await db.doors.find({"shed_id": shed_id}, geometry).to_list(length=None)
+
+    strings = []
+    string_index = {}
+    geometry_columns = {
+        "id": ("id", "", True),
+        "name": ("name", "", True),
+        "x": ("x", 0, False),
+        "y": ("y", 0, False),
+        "w": ("width", 0, False),
+        "h": ("height", 0, False),
+    }
+    zone_columns = {
+        **geometry_columns,
+        "capacity": ("max_capacity", 6, False),
+        "quantity": ("total_quantity", 0, False),
+    }
+
+    plan = {
+        "v": PLAN_FORMAT_VERSION,
+        "shed": shed,
+        "zones": _columnar(zones, zone_columns, strings, string_index),
+        "fridges": _columnar(fridges, geometry_columns, strings, string_index),
+        "doors": _columnar(doors, geometry_columns, strings, string_index),
+        "strings": strings,
+    }
+    body = orjson.dumps(plan)
+
+    # Weak ETag: the same plan is valid whichever encoding CompressionMiddleware picks
+    etag = 'W/"' + hashlib.sha1(body).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+# Zone occupancy for tooltips, per shed
+occupancy_cache = VersionedCache("fields", "stock", "layout")
+OCCUPANCY_COLUMNS = ["field_name", "variety", "grade", "quantity"]
+
+
+@api_router.get("/sheds/{shed_id}/occupancy")
+async def get_shed_occupancy(shed_id: str, request: Request):
+    """
+    Per zone: stored quantity, capacity, free space and what is in it, as
+    [field_name, variety, grade, quantity] rows (see "columns"). Built from this
+    shed's intakes only. The ETag changes only when this shed's occupancy does,
+    so clients revalidate with If-None-Match.
+    """
+    cached = occupancy_cache.get(shed_id)
+    if cached is None:
+        version = occupancy_cache.version()
+        zones = await db.zones.find(
+            {"shed_id": shed_id}, {"_id": 0, "id": 1, "total_quantity": 1, "max_capacity": 1}
+        ).to_list(length=None)
+        if not zones and not await db.sheds.find_one({"id": shed_id}, {"_id": 1}):
+            raise HTTPException(status_code=404, detail="Shed not found")
+        
+        contents = await db.stock_intakes.aggregate([
+            {"$match": {"shed_id": shed_id}},
+            {"$group": {
+                "_id": {"zone_id": "$zone_id", "field_id": "$field_id", "grade": "$grade"},
+                "quantity": {"$sum": "$quantity"},
+                "field_name": {"$first": "$field_name"},
+                "variety": {"$first": "$variety"},
+            }},
+            {"$lookup": {"from": "fields", "localField": "_id.field_id", "foreignField": "id", "as": "field"}},
+            {"$project": {
+                "_id": 1, "quantity": 1, "field_name": 1,
+                "variety": {"$ifNull": [{"$arrayElemAt": ["$field.variety", 0]}, "$variety"]},
+            }},
+            {"$sort": {"quantity": -1}},
+        ]).to_list(length=None)
+        
+        rows = defaultdict(list)
+        for row in contents:
+            rows[row["_id"]["zone_id"]].append(
+                [row["field_name"], row.get("variety") or "Unknown", row["_id"].get("grade") or "No grade",
+                 _compact_number(row["quantity"])]
+            )
+        occupancy = {}
+        for zone in zones:
+            quantity = zone.get("total_quantity", 0)
+            capacity = zone.get("max_capacity", 6)
+            occupancy[zone["id"]] = {
+                "quantity": _compact_number(quantity),
+                "capacity": capacity,
+                "free": _compact_number(max(0, capacity - quantity)),
+                "contents": rows.get(zone["id"], []),
+            }
+        body = orjson.dumps({"shed_id": shed_id, "columns": OCCUPANCY_COLUMNS, "zones": occupancy})
+        cached = (body, 'W/"' + hashlib.sha1(body).hexdigest() + '"')
+        occupancy_cache.put(shed_id, version, cached)
+    
+    body, etag = cached
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 # Batch Stock Intake Route (for performance optimization)
 @api_router.post("/stock-intakes/batch")
 async def create_batch_stock_intakes(intakes: List[StockIntakeCreate]):
@@ -513,6 +1604,7 @@ async def create_batch_stock_intakes(intakes: List[StockIntakeCreate]):
                 {"$set": {"total_quantity": new_quantity}}
             )
     
+    await cache_bus.invalidate("stock")
     return {
         "message": f"Created {len(created_intakes)} stock intakes",
         "intakes_created": len(created_intakes),
@@ -520,36 +1612,183 @@ async def create_batch_stock_intakes(intakes: List[StockIntakeCreate]):
     }
 
 
-# Stock Intake Routes
-@api_router.post("/stock-intakes", response_model=StockIntake)
-async def create_stock_intake(input: StockIntakeCreate):
-    intake_obj = StockIntake(**input.model_dump())
-    doc = intake_obj.model_dump()
-    await db.stock_intakes.insert_one(doc)
-    
-    # Update zone quantity
-    zone = await db.zones.find_one({"id": input.zone_id})
-    if zone:
-        new_quantity = zone.get("total_quantity", 0) + input.quantity
-        await db.zones.update_one(
-            {"id": input.zone_id},
-            {"$set": {"total_quantity": new_quantity}}
-        )
-    
-    return intake_obj
+# Intake distribution
+# Zone increments are conditional on the zone still having room, so two people filling
+# the same zones at once can't overfill them; a lost race is retried from fresh totals.
+DISTRIBUTE_ATTEMPTS = 3
+CAPACITY_EPSILON = 1e-6
 
-@api_router.get("/stock-intakes", response_model=List[StockIntake])
-async def get_stock_intakes():
-    intakes = await db.stock_intakes.find({}, {"_id": 0}).to_list(None)  # No limit
-    return intakes
 
-@api_router.get("/stock-intakes/zone/{zone_id}", response_model=List[StockIntake])
-async def get_zone_stock_intakes(zone_id: str):
-    intakes = await db.stock_intakes.find({"zone_id": zone_id}, {"_id": 0}).to_list(1000)
-    return intakes
+def _zone_free(zone: dict) -> float:
+    return max(0.0, zone.get("max_capacity", 6) - zone.get("total_quantity", 0))
 
-@api_router.put("/stock-intakes/{intake_id}", response_model=StockIntake)
-async def update_stock_intake(intake_id: str, input: StockIntakeCreate):
+
+def plan_distribution(zones: list, quantity: float) -> list:
+    """Fill zones in order up to their free capacity; returns [(zone, quantity)] or None if it doesn't fit"""
+    allocations = []
+    remaining = quantity
+    for zone in zones:
+        if remaining <= CAPACITY_EPSILON:
+            break
+        take = min(_zone_free(zone), remaining)
+        if take > CAPACITY_EPSILON:
+            allocations.append((zone, take))
+            remaining -= take
+    if remaining > CAPACITY_EPSILON:
+        return None
+    if allocations:
+        # Rounding leftovers go to the last zone, as the intake dialog always did
+        zone, take = allocations[-1]
+        allocations[-1] = (zone, take + remaining)
+    return allocations
+
+
+async def _candidate_zones(input: IntakeDistribution) -> list:
+    projection = {"_id": 0, "id": 1, "name": 1, "shed_id": 1, "x": 1, "y": 1, "total_quantity": 1, "max_capacity": 1}
+    if input.zone_ids:
+        found = {z["id"]: z for z in await db.zones.find({"id": {"$in": input.zone_ids}}, projection).to_list(length=None)}
+        missing = [zone_id for zone_id in input.zone_ids if zone_id not in found]
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Zones not found: {', '.join(missing)}")
+        zones = [found[zone_id] for zone_id in dict.fromkeys(input.zone_ids)]
+    elif input.auto_pick and input.shed_id:
+        zones = await db.zones.find({"shed_id": input.shed_id}, projection).to_list(length=None)
+    else:
+        raise HTTPException(status_code=400, detail="Give zone_ids, or auto_pick with a shed_id")
+    if input.auto_pick:
+        # Fewest zones first: largest free space, then floor position so picks stay together
+        zones.sort(key=lambda z: (-_zone_free(z), z.get("y", 0), z.get("x", 0)))
+    return zones
+
+
+async def _reserve_capacity(allocations: list) -> bool:
+    """
+    Increment every zone only while it stays within max_capacity, in one
+    bulk_write; undo all if any zone lost the race. Each increment pushes a
+    token onto the zone's reservations so the undo knows which ones applied.
+    """
+    def room_for(quantity):
+        return {"$expr": {"$lte": [{"$add": [{"$ifNull": ["$total_quantity", 0]}, quantity]},
+                                    {"$add": [{"$ifNull": ["$max_capacity", 6]}, CAPACITY_EPSILON]}]}}
+
+    token = uuid.uuid4().hex
+    result = await db.zones.bulk_write([
+        UpdateOne({"id": zone["id"], **room_for(quantity)},
+                  {"$inc": {"total_quantity": quantity}, "$push": {"reservations": token}})
+        for zone, quantity in allocations
+    ], ordered=False)
+    reserved = result.modified_count == len(allocations)
+    if reserved:
+        release = [UpdateMany({"reservations": token}, {"$pull": {"reservations": token}})]
+    else:
+        release = [
+            UpdateOne({"id": zone["id"], "reservations": token},
+                      {"$inc": {"total_quantity": -quantity}, "$pull": {"reservations": token}})
+            for zone, quantity in allocations
+        ]
+    # Drop the emptied marker array (the filter keeps other in-flight reservations)
+    release.append(UpdateMany({"id": {"$in": [zone["id"] for zone, _ in allocations]}, "reservations": {"$size": 0}},
+                              {"$unset": {"reservations": ""}}))
+    await db.zones.bulk_write(release)
+    return reserved
+
+
+async def _release_capacity(allocations: list):
+    """Undo a successful _reserve_capacity"""
+    await db.zones.bulk_write(
+        [UpdateOne({"id": zone["id"]}, {"$inc": {"total_quantity": -quantity}}) for zone, quantity in allocations],
+        ordered=False,
+    )
+
+
+@api_router.post("/intakes/distribute")
+async def distribute_intake(input: IntakeDistribution):
+    """
+    Spread one intake over zones, filling each to max_capacity against current totals,
+    and write the intakes and their movement log entries in bulk.
+    """
+    if input.quantity <= CAPACITY_EPSILON:
+        raise HTTPException(status_code=400, detail="Quantity must be positive")
+    field = await db.fields.find_one({"id": input.field_id}, {"_id": 0, "name": 1, "variety": 1})
+    if not field:
+        raise HTTPException(status_code=404, detail="Field not found")
+
+    for attempt in range(1, DISTRIBUTE_ATTEMPTS + 1):
+        zones = await _candidate_zones(input)
+        allocations = plan_distribution(zones, input.quantity)
+        if allocations is None:
+            available = sum(_zone_free(zone) for zone in zones)
+            raise HTTPException(status_code=409, detail=f"Quantity exceeds available capacity. Max available: {available:g} units")
+        if await _reserve_capacity(allocations):
+            break
+        logger.debug("Intake distribution lost a capacity race (attempt %d)", attempt)
+    else:
+        raise HTTPException(status_code=409, detail="Zones are being filled by someone else, please try again")
+
+    intakes, movements = [], []
+    for zone, quantity in allocations:
+        intakes.append(StockIntake(
+            field_id=input.field_id, field_name=field["name"], variety=field.get("variety"),
+            zone_id=zone["id"], shed_id=zone["shed_id"], quantity=quantity, date=input.date, grade=input.grade,
+        ).model_dump())
+        movements.append(StockMovement(
+            from_zone_id=zone["id"], to_zone_id=zone["id"], from_shed_id="NO_LOCATION", to_shed_id=zone["shed_id"],
+            quantity=quantity, date=input.date, employee_number=input.employee_number or "Unknown",
+            field_id=input.field_id, field_name=field["name"], grade=input.grade,
+        ).model_dump())
+    try:
+        await db.stock_intakes.insert_many(intakes)
+        await db.stock_movements.insert_many(movements)
+    except Exception:
+        # Give the reserved capacity back and drop any intakes and movements that were written
+        await _release_capacity(allocations)
+        await db.stock_intakes.delete_many({"id": {"$in": [doc["id"] for doc in intakes]}})
+        await db.stock_movements.delete_many({"id": {"$in": [doc["id"] for doc in movements]}})
+        raise
+    await cache_bus.invalidate("stock")
+
+    return {
+        "message": f"Stock added to {len(allocations)} zone(s) from {field['name']} ({input.grade})",
+        "allocations": [{"zone_id": zone["id"], "zone_name": zone.get("name"), "shed_id": zone["shed_id"],
+                         "quantity": quantity} for zone, quantity in allocations],
+        "intakes": [{k: v for k, v in doc.items() if k != "_id"} for doc in intakes],
+    }
+
+
+# Stock Intake Routes
+@api_router.post("/stock-intakes", response_model=StockIntake)
+async def create_stock_intake(input: StockIntakeCreate):
+    intake_obj = StockIntake(**input.model_dump())
+    doc = intake_obj.model_dump()
+    await db.stock_intakes.insert_one(doc)
+    
+    # Update zone quantity
+    zone = await db.zones.find_one({"id": input.zone_id})
+    if zone:
+        new_quantity = zone.get("total_quantity", 0) + input.quantity
+        await db.zones.update_one(
+            {"id": input.zone_id},
+            {"$set": {"total_quantity": new_quantity}}
+        )
+    
+    await cache_bus.invalidate("stock")
+    return intake_obj
+
+@api_router.get("/stock-intakes", response_model=List[StockIntake])
+async def get_stock_intakes(harvest_year: Optional[str] = None):
+    """Current stock; pass harvest_year to read one season, including an archived one"""
+    if harvest_year:
+        return fast_list_response(StockIntake, await find_stock_for_harvest_year("stock_intakes", harvest_year))
+    intakes = await db.stock_intakes.find({}, {"_id": 0}).to_list(None)  # No limit
+    return fast_list_response(StockIntake, intakes)
+
+@api_router.get("/stock-intakes/zone/{zone_id}", response_model=List[StockIntake])
+async def get_zone_stock_intakes(zone_id: str):
+    intakes = await db.stock_intakes.find({"zone_id": zone_id}, {"_id": 0}).to_list(1000)
+    return fast_list_response(StockIntake, intakes)
+
+@api_router.put("/stock-intakes/{intake_id}", response_model=StockIntake)
+async def update_stock_intake(intake_id: str, input: StockIntakeCreate):
     # Get existing intake
     existing = await db.stock_intakes.find_one({"id": intake_id})
     if not existing:
@@ -561,6 +1800,7 @@ async def update_stock_intake(intake_id: str, input: StockIntakeCreate):
     doc = intake_obj.model_dump()
     await db.stock_intakes.update_one({"id": intake_id}, {"$set": doc})
     
+    await cache_bus.invalidate("stock")
     return intake_obj
 
 @api_router.delete("/stock-intakes/{intake_id}")
@@ -568,6 +1808,7 @@ async def delete_stock_intake(intake_id: str):
     result = await db.stock_intakes.delete_one({"id": intake_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Stock intake not found")
+    await cache_bus.invalidate("stock")
     return {"message": "Stock intake deleted"}
 
 
@@ -599,6 +1840,7 @@ async def create_stock_movement(input: StockMovementCreate):
             {"id": input.to_zone_id},
             {"$inc": {"total_quantity": input.quantity}}
         )
+    await cache_bus.invalidate("stock")
     
     return movement_obj
 
@@ -611,38 +1853,277 @@ async def log_movement(input: StockMovementCreate):
     return {"message": "Movement logged successfully"}
 
 @api_router.get("/stock-movements", response_model=List[StockMovement])
-async def get_stock_movements():
+async def get_stock_movements(harvest_year: Optional[str] = None):
+    """Movement log; pass harvest_year to read one season, including an archived one"""
+    if harvest_year:
+        return fast_list_response(StockMovement, await find_stock_for_harvest_year("stock_movements", harvest_year))
     movements = await db.stock_movements.find({}, {"_id": 0}).to_list(length=None)
-    return movements
+    return fast_list_response(StockMovement, movements)
+
+
+# Harvest Year Archive
+# Closing a season moves its intakes and movements (matched through their
+# field's harvest_year) out of the hot collections into stock_intakes_archive_<year>
+# and stock_movements_archive_<year>, and records rollup totals in harvest_rollups.
+# Archived stock is released from zone totals, so only close seasons whose stores
+# have been emptied.
+ARCHIVE_BATCH_SIZE = 1000
+HARVEST_YEAR_PATTERN = re.compile(r"^[0-9A-Za-z_-]{1,20}$")
+
+
+def archive_collection_name(kind: str, harvest_year: str) -> str:
+    return f"{kind}_archive_{harvest_year}"
+
+
+def validate_harvest_year(harvest_year: str) -> str:
+    if not HARVEST_YEAR_PATTERN.match(harvest_year):
+        raise HTTPException(status_code=400, detail="Invalid harvest year")
+    return harvest_year
+
+
+async def find_stock_for_harvest_year(kind: str, harvest_year: str) -> list:
+    """Archived plus still-hot documents of one season (both exist while an archive is running)"""
+    validate_harvest_year(harvest_year)
+    archived = await db[archive_collection_name(kind, harvest_year)].find({}, {"_id": 0}).to_list(length=None)
+    field_ids = await db.fields.distinct("id", {"harvest_year": harvest_year})
+    hot = await db[kind].find({"field_id": {"$in": field_ids}}, {"_id": 0}).to_list(length=None)
+    return archived + hot
+
+
+async def _move_to_archive(kind: str, harvest_year: str, query: dict, on_batch=None) -> int:
+    """
+    Copy matching documents to the archive collection in batches, then delete them
+    from the hot one. Copies are upserts by id, so a rerun after a crash is safe.
+    """
+    archive = db[archive_collection_name(kind, harvest_year)]
+    await archive.create_index("id", unique=True)
+    moved = 0
+    while True:
+        batch = await db[kind].find(query, {"_id": 0}).limit(ARCHIVE_BATCH_SIZE).to_list(length=None)
+        if not batch:
+            return moved
+        await archive.bulk_write([ReplaceOne({"id": doc["id"]}, doc, upsert=True) for doc in batch], ordered=False)
+        await db[kind].delete_many({"id": {"$in": [doc["id"] for doc in batch]}})
+        if on_batch:
+            await on_batch(batch)
+        moved += len(batch)
+
+
+async def _harvest_rollup(harvest_year: str) -> dict:
+    """Totals that stay queryable after a season's documents leave the hot collections"""
+    archive = db[archive_collection_name("stock_intakes", harvest_year)]
+
+    async def totals(group_id, **extra):
+        pipeline = [
+            {"$group": {"_id": group_id, "quantity": {"$sum": "$quantity"}, "intakes": {"$sum": 1}, **extra}},
+            {"$sort": {"quantity": -1}},
+        ]
+        return await archive.aggregate(pipeline).to_list(length=None)
+
+    by_field = await totals("$field_id", field_name={"$first": "$field_name"}, variety={"$first": "$variety"})
+    by_shed = await totals("$shed_id")
+    by_grade = await totals("$grade")
+    return {
+        "harvest_year": harvest_year,
+        "intakes": sum(row["intakes"] for row in by_field),
+        "movements": await db[archive_collection_name("stock_movements", harvest_year)].count_documents({}),
+        "total_quantity": sum(row["quantity"] for row in by_field),
+        "by_field": [{"field_id": r["_id"], "field_name": r["field_name"], "variety": r["variety"],
+                      "quantity": r["quantity"], "intakes": r["intakes"]} for r in by_field],
+        "by_shed": [{"shed_id": r["_id"], "quantity": r["quantity"], "intakes": r["intakes"]} for r in by_shed],
+        "by_grade": [{"grade": r["_id"], "quantity": r["quantity"], "intakes": r["intakes"]} for r in by_grade],
+        "archived_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+async def archive_harvest_year(job: JobContext, harvest_year: str) -> dict:
+    archive_start = time.perf_counter()
+    field_ids = await db.fields.distinct("id", {"harvest_year": harvest_year})
+    query = {"field_id": {"$in": field_ids}}
+    intakes_total = await db.stock_intakes.count_documents(query)
+    zones_released = set()
+    archived = 0
+
+    async def release_zone_stock(batch):
+        # Keep zone totals equal to the sum of their (hot) intakes
+        nonlocal archived
+        released = defaultdict(float)
+        for intake in batch:
+            released[intake["zone_id"]] += intake.get("quantity", 0)
+        await db.zones.bulk_write(
+            [UpdateOne({"id": zone_id}, {"$inc": {"total_quantity": -quantity}}) for zone_id, quantity in released.items()],
+            ordered=False,
+        )
+        zones_released.update(released)
+        await cache_bus.invalidate("stock")
+        archived += len(batch)
+        await job.progress(80 * archived / max(intakes_total, 1), "Archiving stock intakes")
+
+    intakes_moved = await _move_to_archive("stock_intakes", harvest_year, query, on_batch=release_zone_stock)
+    await job.progress(80, "Archiving stock movements")
+    movements_moved = await _move_to_archive("stock_movements", harvest_year, query)
+
+    await job.progress(90, "Recording rollup totals")
+    rollup = await _harvest_rollup(harvest_year)
+    await db.harvest_rollups.replace_one({"harvest_year": harvest_year}, rollup, upsert=True)
+    await cache_bus.invalidate("stock")
+
+    log_event("harvest_archive", harvest_year=harvest_year, intakes=intakes_moved, movements=movements_moved,
+              zones=len(zones_released), duration_ms=_elapsed_ms(archive_start))
+    return {
+        "harvest_year": harvest_year,
+        "intakes_archived": intakes_moved,
+        "movements_archived": movements_moved,
+        "zones_released": len(zones_released),
+        "total_quantity": rollup["total_quantity"],
+    }
 
 
 # User Management and Authentication Routes
+# Users are looked up on every login and permission check but only change when
+# a name list is imported, so the whole collection is cached per worker and
+# reloaded when the "users" topic moves
+users_cache = VersionedCache("users", max_entries=1)
+
+# Permission columns from the name list, in session token bit order
+PERMISSIONS = ("stock_movement", "admin_control", "qc", "daily_check", "workshop_control", "operations")
+PERMISSION_BITS = {name: 1 << bit for bit, name in enumerate(PERMISSIONS)}
+
+SESSION_TTL = timedelta(hours=float(os.environ.get('SESSION_TTL_HOURS', '12')))
+# Tokens must verify on every worker: use SESSION_SECRET, or a secret generated
+# once and shared through MongoDB (see load_session_secret)
+_session_secret: Optional[bytes] = os.environ.get('SESSION_SECRET', '').encode() or None
+
+HARDCODED_ADMIN = {
+    "employee_number": "1234",
+    "name": "Admin User",
+    "stock_movement": "Yes",
+    "admin_control": "YES",
+    "qc": "Yes",
+    "daily_check": "Yes",
+    "workshop_control": "Yes",
+    "operations": "Yes"
+}
+
+async def user_directory() -> dict:
+    """employee_number -> user for every user, loaded once per "users" version"""
+    directory = users_cache.get("all")
+    if directory is None:
+        version = users_cache.version()
+        users = await db.users.find({}, {"_id": 0}).to_list(length=None)
+        directory = {user["employee_number"]: user for user in users}
+        users_cache.put("all", version, directory)
+    return directory
+
+async def lookup_user(employee_number: Optional[str]) -> Optional[dict]:
+    if not employee_number:
+        return None
+    # Hardcoded admin access for employee 1234
+    if employee_number == HARDCODED_ADMIN["employee_number"]:
+        return {"id": str(uuid.uuid4()), **HARDCODED_ADMIN}
+    return (await user_directory()).get(employee_number)
+
+def permission_bits(user: dict) -> int:
+    return sum(bit for name, bit in PERMISSION_BITS.items() if str(user.get(name) or "").upper() == "YES")
+
+async def load_session_secret():
+    """Read (or create on first start) the token signing secret shared by all workers"""
+    global _session_secret
+    if _session_secret:
+        return
+    try:
+        doc = await db.metadata.find_one_and_update(
+            {"_id": "session_secret"},
+            {"$setOnInsert": {"secret": secrets.token_urlsafe(32)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+    except DuplicateKeyError:
+        # Another worker created it at the same moment
+        doc = await db.metadata.find_one({"_id": "session_secret"})
+    _session_secret = doc["secret"].encode()
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+def _sign(payload: str) -> str:
+    return _b64encode(hmac.new(_session_secret, payload.encode(), hashlib.sha256).digest())
+
+def issue_session_token(user: dict) -> str:
+    """Signed "<payload>.<signature>" carrying the employee number, permission bits and expiry"""
+    expires = datetime.now(timezone.utc) + SESSION_TTL
+    payload = _b64encode(orjson.dumps({
+        "sub": user["employee_number"],
+        "perms": permission_bits(user),
+        "exp": int(expires.timestamp()),
+    }))
+    return f"{payload}.{_sign(payload)}"
+
+def read_session_token(token: str) -> Optional[dict]:
+    """The token's claims, or None when the signature is wrong or it has expired"""
+    payload, _, signature = token.partition(".")
+    if not _session_secret:
+        return None
+    try:
+        # compare_digest only takes ASCII str, and tokens come straight from a header
+        if not hmac.compare_digest(signature.encode(), _sign(payload).encode()):
+            return None
+        claims = orjson.loads(_b64decode(payload))
+        expires = claims["exp"]
+    except (TypeError, ValueError, KeyError):
+        return None
+    if expires < time.time():
+        return None
+    return claims
+
 @api_router.post("/login")
 async def login(input: LoginRequest):
-    """Login with employee number"""
-    # Hardcoded admin access for employee 1234
-    if input.employee_number == "1234":
-        return {
-            "id": str(uuid.uuid4()),
-            "employee_number": "1234",
-            "name": "Admin User",
-            "stock_movement": "Yes",
-            "admin_control": "YES",
-            "qc": "Yes",
-            "daily_check": "Yes",
-            "workshop_control": "Yes",
-            "operations": "Yes"
-        }
-    
-    user = await db.users.find_one({"employee_number": input.employee_number}, {"_id": 0})
+    """Login with employee number; the returned token authorises later requests"""
+    user = await lookup_user(input.employee_number)
     if not user:
         raise HTTPException(status_code=404, detail="Employee number not found")
-    return user
+    return {**user, "permissions": permission_bits(user), "token": issue_session_token(user)}
+
+def read_authorization(authorization: Optional[str]) -> Optional[dict]:
+    """
+    The caller's employee number and permission bits from an "Authorization:
+    Bearer <token>" header, checked by signature alone (no database read).
+    None without the header; 401 when the token is invalid or expired.
+    """
+    if not authorization:
+        return None
+    scheme, _, token = authorization.partition(" ")
+    claims = read_session_token(token.strip()) if scheme.lower() == "bearer" else None
+    if claims is None:
+        raise HTTPException(status_code=401, detail="Invalid or expired session; please log in again")
+    return {"employee_number": claims["sub"], "permissions": claims["perms"]}
+
+async def current_session(authorization: Optional[str] = Header(None)) -> Optional[dict]:
+    return read_authorization(authorization)
+
+def has_permission(session: Optional[dict], permission: str) -> bool:
+    return session is not None and bool(session["permissions"] & PERMISSION_BITS[permission])
+
+def require_permission(permission: str, detail: Optional[str] = None):
+    """Dependency factory for routes that need one of the PERMISSIONS; returns the employee number"""
+    async def dependency(session: Optional[dict] = Depends(current_session)) -> str:
+        if session is None:
+            raise HTTPException(status_code=401, detail="Log in to continue")
+        if not has_permission(session, permission):
+            raise HTTPException(status_code=403, detail=detail or f"{permission} permission required")
+        return session["employee_number"]
+
+    return dependency
+
+require_admin = require_permission("admin_control", "Admin access required")
 
 @api_router.get("/users", response_model=List[User])
 async def get_users():
     users = await db.users.find({}, {"_id": 0}).to_list(length=None)
-    return users
+    return fast_list_response(User, users)
 
 @api_router.get("/users/{employee_number}", response_model=User)
 async def get_user(employee_number: str):
@@ -651,843 +2132,1110 @@ async def get_user(employee_number: str):
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
-@api_router.post("/upload-name-list")
+@api_router.post("/upload-name-list", status_code=202)
 async def upload_name_list(file: UploadFile = File(...)):
-    """Upload and parse name list Excel file"""
+    """Queue a name list import; poll GET /api/jobs/{job_id} for the result"""
+    workbook_pool.check_capacity()
+    contents = await file.read()
+    job = await job_runner.submit("name_list_import", import_name_list, contents,
+                                  dedupe_key=hashlib.sha1(contents).hexdigest())
+    return job_accepted(job)
+
+NAME_LIST_COLUMNS = [  # (user key, default) for columns C onwards
+    ("qc", "No"), ("daily_check", "No"), ("stock_movement", "No"), ("workshop_control", "No"),
+    ("admin_control", "NO"), ("operations", "No"),
+]
+
+
+def parse_name_list(contents: bytes) -> dict:
+    """Parse a name list workbook into user rows (runs in the workbook process pool)"""
+    # Read-only mode streams rows instead of building every cell object up front
+    wb = openpyxl.load_workbook(io.BytesIO(contents), read_only=True, data_only=True)
     try:
-        contents = await file.read()
-        wb = openpyxl.load_workbook(io.BytesIO(contents))
-        
         # Get the first sheet (assuming name list is in first sheet)
-        ws = wb.active
-        
-        # Clear existing users
-        await db.users.delete_many({})
-        
-        users_created = 0
-        
-        # Find header row (usually row 1)
-        headers = []
-        for col_idx in range(1, ws.max_column + 1):
-            header = ws.cell(1, col_idx).value
-            if header:
-                headers.append(str(header).strip())
+        rows = wb.active.iter_rows(values_only=True)
         
-        print(f"Found headers: {headers}")
+        # Header row is row 1
+        headers = [str(header).strip() for header in next(rows, ()) if header]
+        logger.debug("Name list headers: %s", headers)
         
-        # Parse user data starting from row 2
-        for row_idx in range(2, ws.max_row + 1):
-            employee_number = ws.cell(row_idx, 1).value
-            name = ws.cell(row_idx, 2).value
-            
+        # User data starts from row 2: employee number, name, then the permission columns
+        users = {}
+        for row in rows:
+            row = tuple(row) + (None,) * (2 + len(NAME_LIST_COLUMNS) - len(row))
+            employee_number, name = row[0], row[1]
             if not employee_number or not name:
                 continue
-            
-            # Parse columns based on headers
-            user_doc = {
-                "id": str(uuid.uuid4()),
-                "employee_number": str(employee_number).strip(),
-                "name": str(name).strip(),
-                "qc": str(ws.cell(row_idx, 3).value or "No").strip(),
-                "daily_check": str(ws.cell(row_idx, 4).value or "No").strip(),
-                "stock_movement": str(ws.cell(row_idx, 5).value or "No").strip(),
-                "workshop_control": str(ws.cell(row_idx, 6).value or "No").strip(),
-                "admin_control": str(ws.cell(row_idx, 7).value or "NO").strip().upper(),
-                "operations": str(ws.cell(row_idx, 8).value or "No").strip()
-            }
-            
-            await db.users.insert_one(user_doc)
-            users_created += 1
-            print(f"Created user: {user_doc['employee_number']} - {user_doc['name']} (Admin: {user_doc['admin_control']})")
+            user = {"employee_number": str(employee_number).strip(), "name": str(name).strip()}
+            for (key, default), value in zip(NAME_LIST_COLUMNS, row[2:]):
+                user[key] = str(value or default).strip()
+            user["admin_control"] = user["admin_control"].upper()
+            if user["employee_number"] in users:
+                logger.warning("Employee %s appears more than once in the name list; keeping the last row",
+                               user["employee_number"])
+            users[user["employee_number"]] = user
+    finally:
+        wb.close()
+    
+    return {"headers": headers, "users": list(users.values())}
+
+async def import_name_list(job: JobContext, contents: bytes) -> dict:
+    """
+    Sync the users collection with an uploaded name list: upsert by employee_number
+    and delete only employees missing from the sheet, so logins keep working
+    throughout the import.
+    """
+    import_start = time.perf_counter()
+    try:
+        await job.progress(1, "Parsing name list")
+        parsed = await workbook_pool.run(parse_name_list, contents)
+        headers = parsed["headers"]
+        users = parsed["users"]
+        if not users:
+            # Most likely the wrong file; don't lock everyone out
+            raise HTTPException(status_code=400, detail="No users found in the name list")
         
+        await job.progress(50, "Importing users")
+        existing = {
+            user["employee_number"]: user
+            for user in await db.users.find({}, {"_id": 0, "id": 0}).to_list(length=None)
+        }
+        writes = []
+        added, changed = [], []
+        for user in users:
+            old = existing.get(user["employee_number"])
+            if old == user:
+                continue
+            (added if old is None else changed).append(user["employee_number"])
+            writes.append(UpdateOne(
+                {"employee_number": user["employee_number"]},
+                {"$set": user, "$setOnInsert": {"id": str(uuid.uuid4())}},
+                upsert=True,
+            ))
+        if writes:
+            await db.users.bulk_write(writes, ordered=False)
+        
+        listed = {user["employee_number"] for user in users}
+        removed = sorted(number for number in existing if number not in listed)
+        if removed:
+            await db.users.delete_many({"employee_number": {"$in": removed}})
+        if writes or removed:
+            await cache_bus.invalidate("users")
+        
+        log_event("name_list_import", columns=len(headers), users=len(users), added=len(added),
+                  changed=len(changed), removed=len(removed), duration_ms=_elapsed_ms(import_start))
         return {
-            "message": f"Name list uploaded successfully. {users_created} users created.",
-            "users_created": users_created
+            "message": (f"Name list uploaded successfully. {len(added)} added, {len(changed)} changed, "
+                        f"{len(removed)} removed."),
+            "users_created": len(added),
+            "users_changed": len(changed),
+            "users_removed": len(removed),
+            "users_unchanged": len(users) - len(added) - len(changed),
+            "added": added,
+            "changed": changed,
+            "removed": removed,
         }
     
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error uploading name list: {str(e)}")
+        logger.exception("Name list upload failed")
         raise HTTPException(status_code=500, detail=f"Failed to upload name list: {str(e)}")
 
 
 # Excel Upload for Fields and Store Plans
-@api_router.post("/upload-excel")
+@api_router.post("/upload-excel", status_code=202)
 async def upload_excel(file: UploadFile = File(...)):
-    try:
-        contents = await file.read()
-        wb = openpyxl.load_workbook(io.BytesIO(contents))
-        
-        fields_created = 0
-        stores_created = 0
-        zones_created = 0
-        
-        # Parse grade tables from "Grade Options Page" sheet
-        grade_tables = {
-            'onion': [],
-            'onion_special': [],
-            'maincrop': [],
-            'salad': [],
-            'carrot': []
-        }
+    """Queue an Excel import; poll GET /api/jobs/{job_id} for the result"""
+    workbook_pool.check_capacity()
+    contents = await file.read()
+    job = await job_runner.submit("excel_import", import_excel_workbook, contents,
+                                  dedupe_key=hashlib.sha1(contents).hexdigest())
+    return job_accepted(job)
+
+IMPORT_HASH_VERSION = 2  # Bump when the sheet parsers change so every sheet is re-read once
+GRADE_SHEET = "Grade Options Page"
+DEFAULT_GRADE_TABLE = "default"
+DEFAULT_GRADES = ['Whole Crop']
+STORE_SKIP_SHEETS = ["FRONT PAGE", "Master Harvest 25", "Master Harevst 26", "Master Harvest 26", "Master Cropping", "Grade Options Page", "Sheet1", "Sheet2", "Sheet3"]
+
+
+def sheet_hash(ws) -> str:
+    """Fingerprint of what the importer reads from a sheet: cell values, fills and merged ranges"""
+    digest = hashlib.sha1(f"v{IMPORT_HASH_VERSION}".encode())
+    for row in ws.iter_rows():
+        for cell in row:
+            fill = getattr(cell.fill.start_color, "rgb", None) if cell.fill and cell.fill.fill_type else None
+            if cell.value is None and fill is None:
+                continue
+            digest.update(repr((cell.row, cell.column, cell.value, fill)).encode())
+    for merged in sorted(str(merged_range) for merged_range in ws.merged_cells.ranges):
+        digest.update(merged.encode())
+    return digest.hexdigest()
+
+
+def _harvest_sheet_names(wb) -> list:
+    """Field data sheets (various possible names)"""
+    return [sheet_name for sheet_name in wb.sheetnames
+            if any(keyword in sheet_name.lower()
+                   for keyword in ["master harvest", "master harevst", "master cropping", "front page", "fields"])]
+
+
+def parse_master_workbook(contents: bytes, known_hashes: Optional[dict] = None) -> dict:
+    """
+    Parse a master workbook into plain data (runs in the workbook process pool).
+    Returns the parsed field documents and one entry per candidate store sheet in
+    sheet order; nothing here touches the database.
+
+    known_hashes ({"fields": hash, "stores": {name: hash}}) are the sheet hashes of
+    the previous import. Sheets whose hash still matches are not parsed: fields is
+    None when no field or grade sheet changed, and unchanged stores only carry
+    their name and hash. grade_tables (crop key -> grades) is None when fields is.
+    """
+    load_start = time.perf_counter()
+    wb = openpyxl.load_workbook(io.BytesIO(contents))
+    log_event("excel_import.load", sheets=len(wb.sheetnames), bytes=len(contents),
+              duration_ms=_elapsed_ms(load_start))
+    known_hashes = known_hashes or {}
+    
+    field_sheets = _harvest_sheet_names(wb) + ([GRADE_SHEET] if GRADE_SHEET in wb.sheetnames else [])
+    fields_hash = hashlib.sha1("|".join(f"{name}:{sheet_hash(wb[name])}" for name in field_sheets).encode()).hexdigest()
+    if fields_hash == known_hashes.get("fields"):
+        harvest_sheets, fields, grade_tables = _harvest_sheet_names(wb), None, None
+    else:
+        harvest_sheets, fields, grade_tables = _parse_field_sheets(wb)
+    
+    # Parse Store Sheets (each sheet = one store)
+    # Skip field sheets, Grade Options Page, and other non-store sheets
+    known_stores = known_hashes.get("stores", {})
+    stores = []
+    for sheet_name in wb.sheetnames:
+        if sheet_name in STORE_SKIP_SHEETS:
+            logger.debug("Skipping sheet %r (in skip list)", sheet_name)
+            continue
+        store_name = sheet_name.strip()
+        store_hash = sheet_hash(wb[sheet_name])
+        if known_stores.get(store_name) == store_hash:
+            stores.append({"name": store_name, "sheet_hash": store_hash, "unchanged": True})
+            continue
+        store = _parse_store_sheet(wb[sheet_name], store_name)
+        store["sheet_hash"] = store_hash
+        stores.append(store)
+    
+    return {
+        "harvest_sheets": harvest_sheets,
+        "fields": fields,
+        "grade_tables": grade_tables,
+        "fields_hash": fields_hash,
+        "stores": stores,
+    }
+
+
+def _parse_field_sheets(wb) -> tuple:
+    """Grade tables and field rows; returns (harvest sheet names, field documents, grade tables)"""
+    phase_start = time.perf_counter()
+    
+    # Parse grade tables from "Grade Options Page" sheet
+    grade_tables = {
+        'onion': [],
+        'onion_special': [],
+        'maincrop': [],
+        'salad': [],
+        'carrot': []
+    }
+    
+    if "Grade Options Page" in wb.sheetnames:
+        ws_grades = wb["Grade Options Page"]
         
-        if "Grade Options Page" in wb.sheetnames:
-            ws_grades = wb["Grade Options Page"]
-            print("=== Parsing Grade Options Page ===")
-            
-            # Row 1 contains headers (crop types)
-            # Find which column corresponds to which crop type
-            crop_columns = {}
-            for col_idx in range(1, ws_grades.max_column + 1):
-                header = ws_grades.cell(1, col_idx).value
-                if header:
-                    header_str = str(header).strip().lower()
-                    print(f"Column {col_idx}: '{header}'")
-                    
-                    if 'onion' in header_str and 'special' in header_str:
-                        crop_columns['onion_special'] = col_idx
-                    elif 'onion' in header_str:
-                        crop_columns['onion'] = col_idx
-                    elif 'maincrop' in header_str or 'main crop' in header_str:
-                        crop_columns['maincrop'] = col_idx
-                    elif 'salad' in header_str:
-                        crop_columns['salad'] = col_idx
-                    elif 'carrot' in header_str:
-                        crop_columns['carrot'] = col_idx
-            
-            print(f"Found crop columns: {crop_columns}")
-            
-            # Read grades from row 2 onwards for each crop type
-            for crop_type, col_idx in crop_columns.items():
-                grades = []
-                for row_idx in range(2, ws_grades.max_row + 1):
-                    grade_val = ws_grades.cell(row_idx, col_idx).value
-                    if grade_val:
-                        grade_str = str(grade_val).strip()
-                        if grade_str:
-                            grades.append(grade_str)
+        # Row 1 contains headers (crop types)
+        # Find which column corresponds to which crop type
+        crop_columns = {}
+        for col_idx in range(1, ws_grades.max_column + 1):
+            header = ws_grades.cell(1, col_idx).value
+            if header:
+                header_str = str(header).strip().lower()
+                logger.debug("Grade column %d: %r", col_idx, header)
                 
-                grade_tables[crop_type] = grades
-                print(f"{crop_type}: {len(grades)} grades - {grades[:3]}...")
-            
-            print(f"Final grade tables: {grade_tables}")
-        else:
-            print("Warning: 'Grade Options Page' sheet not found")
-        
-        # Parse harvest year sheets for fields
-        harvest_sheets = []
+                if 'onion' in header_str and 'special' in header_str:
+                    crop_columns['onion_special'] = col_idx
+                elif 'onion' in header_str:
+                    crop_columns['onion'] = col_idx
+                elif 'maincrop' in header_str or 'main crop' in header_str:
+                    crop_columns['maincrop'] = col_idx
+                elif 'salad' in header_str:
+                    crop_columns['salad'] = col_idx
+                elif 'carrot' in header_str:
+                    crop_columns['carrot'] = col_idx
         
-        # Check for field data sheets (various possible names)
-        for sheet_name in wb.sheetnames:
-            sheet_lower = sheet_name.lower()
-            if any(keyword in sheet_lower for keyword in ["master harvest", "master harevst", "master cropping", "front page", "fields"]):
-                harvest_sheets.append(sheet_name)
         
-        # If no recognized sheets, skip field import
-        if not harvest_sheets:
-            print("Warning: No field sheets found (looking for 'Master Harvest', 'Master Cropping', 'FRONT PAGE', etc.)")
+        # Read grades from row 2 onwards for each crop type
+        for crop_type, col_idx in crop_columns.items():
+            grades = []
+            for row_idx in range(2, ws_grades.max_row + 1):
+                grade_val = ws_grades.cell(row_idx, col_idx).value
+                if grade_val:
+                    grade_str = str(grade_val).strip()
+                    if grade_str:
+                        grades.append(grade_str)
+            
+            grade_tables[crop_type] = grades
+            logger.debug("Grade table %s: %d grades", crop_type, len(grades))
         
-        # Store old field name -> ID mapping before clearing (to update stock intakes)
-        old_fields = await db.fields.find({}, {"_id": 0}).to_list(length=None)
-        old_field_mapping = {f['name']: f['id'] for f in old_fields}
-        print(f"DEBUG: Stored {len(old_field_mapping)} old field mappings")
+        log_event("excel_import.grades", tables={k: len(v) for k, v in grade_tables.items()},
+                  duration_ms=_elapsed_ms(phase_start))
+    else:
+        logger.warning("Excel import: 'Grade Options Page' sheet not found")
+    
+    # Parse harvest year sheets for fields
+    harvest_sheets = _harvest_sheet_names(wb)
+    
+    # If no recognized sheets, skip field import
+    if not harvest_sheets:
+        logger.warning("Excel import: no field sheets found (looking for 'Master Harvest', 'Master Cropping', 'FRONT PAGE', etc.)")
+    
+    # STEP 1: Parse all new fields from Excel first (before clearing database)
+    new_fields_to_create = []
+    
+    for sheet_name in harvest_sheets:
+        ws = wb[sheet_name]
         
-        # Create a mapping of old fields: name -> {variety, type, crop_type}
-        old_field_data = {f['name']: {'variety': f.get('variety', 'Unknown'), 'type': f.get('type'), 'crop_type': f.get('crop_type', 'Unknown')} for f in old_fields}
+        # Detect column layout by checking row 3 or row 4 for headers
+        # Master Harvest 25: Row 3 has headers, data starts row 4, columns C-G
+        # Master Harvest 26: Row 4 has headers, data starts row 5, columns D-H (or more if Year column exists)
         
-        # STEP 1: Parse all new fields from Excel first (before clearing database)
-        new_fields_to_create = []
+        farm_col = 3  # Default: Column C
+        field_col = 4  # Default: Column D
+        area_col = 5  # Default: Column E
+        crop_col = 6  # Default: Column F
+        variety_col = 7  # Default: Column G
+        type_col = 8  # Default: Column H (Type column)
+        year_col = None  # Will be detected if exists
+        start_row = 4  # Default data start row
         
-        for sheet_name in harvest_sheets:
-            ws = wb[sheet_name]
+        # Check if row 4 has header values (indicates Master Harvest 26 format)
+        row4_field = ws.cell(4, 5).value  # Check column E in row 4
+        if row4_field and str(row4_field).lower() in ['field', 'farm']:
+            # Master Harvest 26 format: columns shifted right, headers in row 4
+            farm_col = 4  # Column D
+            field_col = 5  # Column E
+            area_col = 6  # Column F
+            crop_col = 7  # Column G
+            variety_col = 8  # Column H
+            type_col = 9  # Column I (Type column)
+            start_row = 5  # Data starts row 5
             
-            print(f"\n=== Processing {sheet_name} ===")
+            # Check for Year column (could be column J or beyond)
+            for col_idx in range(10, ws.max_column + 1):
+                header_val = ws.cell(4, col_idx).value
+                if header_val and 'year' in str(header_val).lower():
+                    year_col = col_idx
+                    break
             
-            # Detect column layout by checking row 3 or row 4 for headers
-            # Master Harvest 25: Row 3 has headers, data starts row 4, columns C-G
-            # Master Harvest 26: Row 4 has headers, data starts row 5, columns D-H (or more if Year column exists)
+            logger.debug("%s: Harvest 26 layout (columns D-I, row 5), year_col=%s", sheet_name, year_col)
+        else:
+            # Check for Year column in row 3 (Master Harvest 25 format)
+            for col_idx in range(9, ws.max_column + 1):
+                header_val = ws.cell(3, col_idx).value
+                if header_val and 'year' in str(header_val).lower():
+                    year_col = col_idx
+                    break
             
-            farm_col = 3  # Default: Column C
-            field_col = 4  # Default: Column D
-            area_col = 5  # Default: Column E
-            crop_col = 6  # Default: Column F
-            variety_col = 7  # Default: Column G
-            type_col = 8  # Default: Column H (Type column)
-            year_col = None  # Will be detected if exists
-            start_row = 4  # Default data start row
+            logger.debug("%s: Harvest 25 layout (columns C-H, row 4), year_col=%s", sheet_name, year_col)
+        
+        # Parse fields from data start row onwards
+        for row_idx in range(start_row, ws.max_row + 1):
+            farm = ws.cell(row_idx, farm_col).value
+            field_name = ws.cell(row_idx, field_col).value
+            area = ws.cell(row_idx, area_col).value
+            crop = ws.cell(row_idx, crop_col).value
+            variety_excel = ws.cell(row_idx, variety_col).value  # Column 7 = Classification (Red/Brown/Special)
+            type_excel = ws.cell(row_idx, type_col).value  # Column 8 = Actual variety name
             
-            # Check if row 4 has header values (indicates Master Harvest 26 format)
-            row4_field = ws.cell(4, 5).value  # Check column E in row 4
-            if row4_field and str(row4_field).lower() in ['field', 'farm']:
-                # Master Harvest 26 format: columns shifted right, headers in row 4
-                farm_col = 4  # Column D
-                field_col = 5  # Column E
-                area_col = 6  # Column F
-                crop_col = 7  # Column G
-                variety_col = 8  # Column H
-                type_col = 9  # Column I (Type column)
-                start_row = 5  # Data starts row 5
-                
-                # Check for Year column (could be column J or beyond)
-                for col_idx in range(10, ws.max_column + 1):
-                    header_val = ws.cell(4, col_idx).value
-                    if header_val and 'year' in str(header_val).lower():
-                        year_col = col_idx
-                        break
-                
-                print(f"Detected Harvest 26 format: columns D-H, Type=I, starting row 5, year_col={year_col}")
+            # Read year from column if it exists, otherwise use sheet name
+            if year_col:
+                year_value = ws.cell(row_idx, year_col).value
+                harvest_year = str(year_value) if year_value else "2025"
             else:
-                # Check for Year column in row 3 (Master Harvest 25 format)
-                for col_idx in range(9, ws.max_column + 1):
-                    header_val = ws.cell(3, col_idx).value
-                    if header_val and 'year' in str(header_val).lower():
-                        year_col = col_idx
-                        break
-                
-                print(f"Detected Harvest 25 format: columns C-G, Type=H, starting row 4, year_col={year_col}")
-            
-            # Parse fields from data start row onwards
-            for row_idx in range(start_row, ws.max_row + 1):
-                farm = ws.cell(row_idx, farm_col).value
-                field_name = ws.cell(row_idx, field_col).value
-                area = ws.cell(row_idx, area_col).value
-                crop = ws.cell(row_idx, crop_col).value
-                variety_excel = ws.cell(row_idx, variety_col).value  # Column 7 = Classification (Red/Brown/Special)
-                type_excel = ws.cell(row_idx, type_col).value  # Column 8 = Actual variety name
-                
-                # Read year from column if it exists, otherwise use sheet name
-                if year_col:
-                    year_value = ws.cell(row_idx, year_col).value
-                    harvest_year = str(year_value) if year_value else "2025"
+                # Fallback: extract from sheet name
+                if "25" in sheet_name:
+                    harvest_year = "2025"
+                elif "26" in sheet_name:
+                    harvest_year = "2026"
                 else:
-                    # Fallback: extract from sheet name
-                    if "25" in sheet_name:
-                        harvest_year = "2025"
-                    elif "26" in sheet_name:
-                        harvest_year = "2026"
-                    else:
-                        harvest_year = "2025"
-                
-                if not farm or not field_name:
-                    continue
-                
-                # Assign grades based on crop type from parsed tables
-                grades = []
-                crop_str = str(crop).lower() if crop else ""
-                
-                # For grade matching, use the classification from variety_excel (Column 7)
-                classification_str = str(variety_excel).lower() if variety_excel else ""
-                
-                # Match crop type to grade table
-                if 'onion' in crop_str:
-                    # Check if it's a special onion variety
-                    if 'special' in classification_str or 'shallot' in classification_str or 'special' in crop_str.lower():
-                        grades = grade_tables.get('onion_special', grade_tables.get('onion', []))
-                    else:
-                        grades = grade_tables.get('onion', [])
-                elif 'maincrop' in crop_str or 'main crop' in crop_str or 'potato' in crop_str:
-                    grades = grade_tables.get('maincrop', [])
-                elif 'salad' in crop_str:
-                    grades = grade_tables.get('salad', [])
-                elif 'carrot' in crop_str:
-                    grades = grade_tables.get('carrot', [])
-                
-                # If no grades found, add a default
-                if not grades:
-                    grades = ['Whole Crop']
-                
-                full_field_name = f"{farm} - {field_name}"
-                area_str = f"{area} Acres" if area else "N/A"
-                
-                # IMPORTANT: Excel columns are:
-                # - Column 7 (variety_excel) = Classification (Red, Brown, Special)
-                # - Column 8 (type_excel) = Actual variety name (Figaro, Hybound, etc.)
-                # So we store: variety = type_excel (actual variety name)
-                #              type = variety_excel (classification)
-                field_doc = {
-                    "id": str(uuid.uuid4()),
-                    "name": full_field_name,
-                    "area": area_str,
-                    "crop_type": str(crop) if crop else "Unknown",
-                    "variety": str(type_excel) if type_excel else "Unknown",  # Column 8 = variety name
-                    "available_grades": grades,
-                    "harvest_year": harvest_year,
-                    "type": str(variety_excel) if variety_excel else None  # Column 7 = classification (Red/Brown/Special)
-                }
-                new_fields_to_create.append(field_doc)
-                print(f"  Parsed field: {full_field_name} (Harvest {harvest_year})")
-        
-        # STEP 2: Data Integrity Check - Detect variety changes
-        variety_conflicts = []
-        
-        for new_field in new_fields_to_create:
-            field_name = new_field['name']
-            new_variety = new_field['variety']
-            new_type = new_field.get('type')
-            
-            if field_name in old_field_data:
-                old_variety = old_field_data[field_name]['variety']
-                old_type = old_field_data[field_name].get('type')
-                
-                # Check if variety or type has changed
-                variety_changed = (new_variety != old_variety)
-                type_changed = (new_type != old_type) and (old_type is not None or new_type is not None)
-                
-                if variety_changed or type_changed:
-                    # Check how much stock would be affected
-                    stock_count = await db.stock_intakes.count_documents({"field_name": field_name})
-                    
-                    if stock_count > 0:
-                        conflict_info = {
-                            "field_name": field_name,
-                            "old_variety": old_variety,
-                            "new_variety": new_variety,
-                            "old_type": old_type,
-                            "new_type": new_type,
-                            "affected_stock_records": stock_count
-                        }
-                        variety_conflicts.append(conflict_info)
-                        print(f"  WARNING: Field '{field_name}' variety changed from '{old_variety}' to '{new_variety}' (affects {stock_count} stock records)")
-        
-        # STEP 3: Insert all new fields into database
-        await db.fields.delete_many({})
-        
-        for field_doc in new_fields_to_create:
-            await db.fields.insert_one(field_doc)
-            fields_created += 1
-        
-        print(f"Created {fields_created} fields")
-        
-        # Update stock intakes with new field IDs (preserve existing stock data)
-        if old_field_mapping:
-            print("\n=== Updating Stock Intakes with New Field IDs ===")
-            new_fields = await db.fields.find({}, {"_id": 0}).to_list(length=None)
-            new_field_mapping = {f['name']: f['id'] for f in new_fields}
-            
-            intakes_updated = 0
-            for old_name, old_id in old_field_mapping.items():
-                if old_name in new_field_mapping:
-                    new_id = new_field_mapping[old_name]
-                    # Update all stock intakes that reference the old field ID
-                    result = await db.stock_intakes.update_many(
-                        {"field_id": old_id},
-                        {"$set": {"field_id": new_id}}
-                    )
-                    if result.modified_count > 0:
-                        print(f"  Updated {result.modified_count} stock intakes for field '{old_name}'")
-                        intakes_updated += result.modified_count
+                    harvest_year = "2025"
             
-            print(f"Total stock intakes updated: {intakes_updated}")
-        
-        # Parse Store Sheets (each sheet = one store)
-        # Skip field sheets, Grade Options Page, and other non-store sheets
-        skip_sheets = ["FRONT PAGE", "Master Harvest 25", "Master Harevst 26", "Master Harvest 26", "Master Cropping", "Grade Options Page", "Sheet1", "Sheet2", "Sheet3"]
-        
-        print("=== Processing Store Sheets ===")
-        print(f"All sheets in workbook: {wb.sheetnames}")
-        print(f"Skip list: {skip_sheets}")
-        
-        sheet_order = 0  # Track order of sheets
-        for sheet_name in wb.sheetnames:
-            if sheet_name in skip_sheets:
-                print(f"Skipping sheet: '{sheet_name}' (in skip list)")
-                continue
-            
-            store_name = sheet_name.strip()
-            
-            # Check if store already exists
-            existing_shed = await db.sheds.find_one({"name": store_name})
-            if existing_shed:
-                print(f"Store '{store_name}' already exists in database, skipping...")
+            if not farm or not field_name:
                 continue
             
-            print(f"Processing new store: '{store_name}'")
-            sheet_order += 1  # Increment order for each processed sheet
+            # Assign a grade table based on crop type
+            table = None
+            crop_str = str(crop).lower() if crop else ""
             
-            ws = wb[sheet_name]
+            # For grade matching, use the classification from variety_excel (Column 7)
+            classification_str = str(variety_excel).lower() if variety_excel else ""
             
-            # First, scan for storage type indicator (Box or Bulk)
-            # Look for cells containing "Box" or "Bulk" keywords
-            storage_type = "box"  # Default to box storage
-            for row_idx in range(1, min(20, ws.max_row + 1)):  # Check first 20 rows
-                for col_idx in range(1, ws.max_column + 1):
-                    cell = ws.cell(row_idx, col_idx)
-                    if cell.value:
-                        cell_str = str(cell.value).lower()
-                        if 'bulk' in cell_str:
-                            storage_type = "bulk"
-                            print("  Detected BULK storage type")
-                            break
-                        elif 'box' in cell_str:
-                            storage_type = "box"
-                            print("  Detected BOX storage type")
-                            break
-                if storage_type == "bulk":
-                    break
+            # Match crop type to grade table
+            if 'onion' in crop_str:
+                # Check if it's a special onion variety
+                if 'special' in classification_str or 'shallot' in classification_str or 'special' in crop_str.lower():
+                    table = 'onion_special'
+                else:
+                    table = 'onion'
+            elif 'maincrop' in crop_str or 'main crop' in crop_str or 'potato' in crop_str:
+                table = 'maincrop'
+            elif 'salad' in crop_str:
+                table = 'salad'
+            elif 'carrot' in crop_str:
+                table = 'carrot'
             
-            # Find all zones, fridges, and doors - scan the entire sheet
-            zone_positions = []  # Will store (row, col, capacity, width, height)
-            fridge_positions = []  # Will store (row, col, width, height) for fridges
-            door_positions = []  # Will store (row, col, width, height) for doors (blue cells)
-            max_col = 0
-            max_row = 0
-            min_col = float('inf')
-            min_row = float('inf')
-            processed_cells = set()  # Track cells we've already processed
+            # If no grades found, use the default table
+            if not grade_tables.get(table):
+                table = DEFAULT_GRADE_TABLE
             
-            for row_idx in range(1, ws.max_row + 1):
-                for col_idx in range(1, ws.max_column + 1):
-                    # Skip if we've already processed this cell as part of a merged range
-                    if (row_idx, col_idx) in processed_cells:
-                        continue
-                    
-                    cell = ws.cell(row_idx, col_idx)
-                    
-                    # Handle merged cells properly - get the actual value from top-left cell
-                    cell_value = None
-                    cell_width = 1
-                    cell_height = 1
-                    is_merged = False
-                    
-                    # Check if this cell is part of a merged range
-                    for merged_range in ws.merged_cells.ranges:
-                        if cell.coordinate in merged_range:
-                            is_merged = True
-                            # Only process if this is the top-left cell of the merge
-                            if row_idx == merged_range.min_row and col_idx == merged_range.min_col:
-                                cell_value = cell.value
-                                cell_height = merged_range.max_row - merged_range.min_row + 1
-                                cell_width = merged_range.max_col - merged_range.min_col + 1
-                                
-                                # Mark all cells in this merged range as processed
-                                for r in range(merged_range.min_row, merged_range.max_row + 1):
-                                    for c in range(merged_range.min_col, merged_range.max_col + 1):
-                                        processed_cells.add((r, c))
-                            else:
-                                # This is NOT the top-left, skip it
-                                break
-                            break
-                    
-                    # If not part of a merged range, it's a regular cell
-                    if not is_merged:
-                        cell_value = cell.value
-                    
-                    if cell_value is not None:
-                        # Safely convert to string
-                        try:
-                            cell_str = str(cell_value).strip()
-                        except Exception as e:
-                            print(f"  Warning: Could not convert cell value to string: {e}")
-                            continue
-                        
-                        # Check for DOOR markers (blue cells with "Door" text)
-                        if 'door' in cell_str.lower():
-                            # Check if cell has blue fill
-                            cell_fill = cell.fill
-                            is_blue = False
-                            color_str = None
-                            
-                            if cell_fill and cell_fill.start_color:
-                                # Check for blue color (hex: 0000FF, 0070C0, etc.)
-                                color_value = cell_fill.start_color.rgb if hasattr(cell_fill.start_color, 'rgb') else None
-                                if color_value:
-                                    # Blue variants: FF0000FF, 0000FF, 000070C0, FF0070C0, etc.
-                                    color_str = str(color_value).upper()
-                                    print(f"  DEBUG: Found 'door' text at row={row_idx}, col={col_idx}, color={color_str}")
-                                    
-                                    # Check for various blue shades - expanded list
-                                    if (color_str.endswith('0000FF') or color_str.endswith('0070C0') or 
-                                        color_str.endswith('4472C4') or color_str.endswith('5B9BD5') or
-                                        color_str.endswith('4BACC6') or color_str.endswith('00B0F0') or
-                                        '0000FF' in color_str or '0070C0' in color_str):
-                                        is_blue = True
-                                else:
-                                    print(f"  DEBUG: Found 'door' text at row={row_idx}, col={col_idx}, but no color_value")
-                            else:
-                                print(f"  DEBUG: Found 'door' text at row={row_idx}, col={col_idx}, but no cell_fill or start_color")
-                            
-                            if is_blue:
-                                print(f"  Found DOOR at row={row_idx}, col={col_idx}, size={cell_width}x{cell_height}, color={color_str}")
-                                door_positions.append((row_idx, col_idx, cell_width, cell_height))
-                                max_col = max(max_col, col_idx + cell_width - 1)
-                                max_row = max(max_row, row_idx + cell_height - 1)
-                                min_col = min(min_col, col_idx)
-                                min_row = min(min_row, row_idx)
-                                continue  # Don't process as zone
-                            else:
-                                # DOOR text found but not blue - skip it, don't try to parse as zone
-                                print(f"  Skipping non-blue DOOR cell at row={row_idx}, col={col_idx}")
-                                continue
-                        
-                        # Check for FRIDGE markers (yellow cells with "Fridge" text)
-                        if 'fridge' in cell_str.lower():
-                            # Check if cell has yellow fill
-                            cell_fill = cell.fill
-                            is_yellow = False
-                            if cell_fill and cell_fill.start_color:
-                                # Check for yellow color (hex: FFFF00 or similar)
-                                color_value = cell_fill.start_color.rgb if hasattr(cell_fill.start_color, 'rgb') else None
-                                if color_value:
-                                    # Yellow variants: FFFFFF00, FFFF00, 00FFFF00, etc.
-                                    color_str = str(color_value).upper()
-                                    if 'FFFF00' in color_str or (color_str.endswith('FFFF00')):
-                                        is_yellow = True
-                            
-                            if is_yellow:
-                                print(f"  Found FRIDGE at row={row_idx}, col={col_idx}, size={cell_width}x{cell_height}")
-                                fridge_positions.append((row_idx, col_idx, cell_width, cell_height))
-                                max_col = max(max_col, col_idx + cell_width - 1)
-                                max_row = max(max_row, row_idx + cell_height - 1)
-                                min_col = min(min_col, col_idx)
-                                min_row = min(min_row, row_idx)
-                                continue  # Don't process as zone
-                        
-                        # Check for bulk storage (tonnage like "175t", "200t", etc.)
-                        if cell_str.lower().endswith('t') and len(cell_str) > 1:
-                            try:
-                                # Extract the number before 't'
-                                tonnage = int(cell_str[:-1])
-                                # Create ONE zone for the entire merged cell
-                                zone_positions.append((row_idx, col_idx, tonnage, cell_width, cell_height))
-                                max_col = max(max_col, col_idx + cell_width - 1)
-                                max_row = max(max_row, row_idx + cell_height - 1)
-                                min_col = min(min_col, col_idx)
-                                min_row = min(min_row, row_idx)
-                            except (ValueError, TypeError) as e:
-                                print(f"  Warning: Could not parse tonnage '{cell_str}': {e}")
-                                pass
-                        # Check for numeric capacity (box storage like "5", "6", "7", "8", etc.)
-                        else:
-                            try:
-                                capacity = int(cell_str)
-                                # Only accept reasonable capacity numbers (1-50)
-                                if 1 <= capacity <= 50:
-                                    # Create ONE zone for the entire merged cell
-                                    zone_positions.append((row_idx, col_idx, capacity, cell_width, cell_height))
-                                    max_col = max(max_col, col_idx + cell_width - 1)
-                                    max_row = max(max_row, row_idx + cell_height - 1)
-                                    min_col = min(min_col, col_idx)
-                                    min_row = min(min_row, row_idx)
-                            except (ValueError, TypeError) as e:
-                                print(f"  Warning: Could not parse capacity '{cell_str}': {e}")
-                                pass
+            full_field_name = f"{farm} - {field_name}"
+            area_str = f"{area} Acres" if area else "N/A"
             
-            if not zone_positions:
-                print(f"No zones found in {store_name}, skipping...")
+            # IMPORTANT: Excel columns are:
+            # - Column 7 (variety_excel) = Classification (Red, Brown, Special)
+            # - Column 8 (type_excel) = Actual variety name (Figaro, Hybound, etc.)
+            # So we store: variety = type_excel (actual variety name)
+            #              type = variety_excel (classification)
+            variety = str(type_excel) if type_excel else "Unknown"  # Column 8 = variety name
+            field_doc = {
+                "id": field_id_for(full_field_name, variety, harvest_year),
+                "name": full_field_name,
+                "area": area_str,
+                "crop_type": str(crop) if crop else "Unknown",
+                "variety": variety,
+                "grade_table": table,
+                "harvest_year": harvest_year,
+                "type": str(variety_excel) if variety_excel else None  # Column 7 = classification (Red/Brown/Special)
+            }
+            new_fields_to_create.append(field_doc)
+            logger.debug("Parsed field: %s (harvest %s)", full_field_name, harvest_year)
+    
+    return harvest_sheets, new_fields_to_create, {**grade_tables, DEFAULT_GRADE_TABLE: DEFAULT_GRADES}
+
+
+def _parse_store_sheet(ws, store_name: str) -> dict:
+    """
+    Lay out one store sheet. Zones are (name, x, y, width, height, capacity) tuples,
+    fridges and doors are (x, y, width, height) tuples, all in metres.
+    """
+    # First, scan for storage type indicator (Box or Bulk)
+    # Look for cells containing "Box" or "Bulk" keywords
+    storage_type = "box"  # Default to box storage
+    for row_idx in range(1, min(20, ws.max_row + 1)):  # Check first 20 rows
+        for col_idx in range(1, ws.max_column + 1):
+            cell = ws.cell(row_idx, col_idx)
+            if cell.value:
+                cell_str = str(cell.value).lower()
+                if 'bulk' in cell_str:
+                    storage_type = "bulk"
+                    break
+                elif 'box' in cell_str:
+                    storage_type = "box"
+                    break
+        if storage_type == "bulk":
+            break
+    
+    # Find all zones, fridges, and doors - scan the entire sheet
+    zone_positions = []  # Will store (row, col, capacity, width, height)
+    fridge_positions = []  # Will store (row, col, width, height) for fridges
+    door_positions = []  # Will store (row, col, width, height) for doors (blue cells)
+    max_col = 0
+    max_row = 0
+    min_col = float('inf')
+    min_row = float('inf')
+    processed_cells = set()  # Track cells we've already processed
+    
+    for row_idx in range(1, ws.max_row + 1):
+        for col_idx in range(1, ws.max_column + 1):
+            # Skip if we've already processed this cell as part of a merged range
+            if (row_idx, col_idx) in processed_cells:
                 continue
             
-            print(f"Store {store_name}: Found {len(zone_positions)} zones")
-            print(f"  Bounds: rows {min_row}-{max_row}, cols {min_col}-{max_col}")
-            
-            # Debug: Show zone distribution by row
-            from collections import defaultdict
-            zones_by_row = defaultdict(list)
-            for row_idx, col_idx, capacity, cell_width, cell_height in zone_positions:
-                zones_by_row[row_idx].append((col_idx, cell_width, cell_height, capacity))
-            
-            print("  Zone distribution by row:")
-            for row in sorted(zones_by_row.keys())[:5]:  # Show first 5 rows
-                zones = zones_by_row[row]
-                widths = [z[1] for z in zones]
-                print(f"    Row {row}: {len(zones)} zones, widths: {widths[:10]}{'...' if len(widths) > 10 else ''}")
-            
-            # Calculate zone, fridge, and door positions
-            # Group zones, fridges, and doors by row for proper x-position calculation
-            zones_by_row = {}
-            for row_idx, col_idx, capacity, cell_width, cell_height in zone_positions:
-                if row_idx not in zones_by_row:
-                    zones_by_row[row_idx] = []
-                zones_by_row[row_idx].append((col_idx, capacity, cell_width, cell_height, 'zone'))
+            cell = ws.cell(row_idx, col_idx)
             
-            # Add fridges to the same row structure for position calculation
-            for row_idx, col_idx, cell_width, cell_height in fridge_positions:
-                if row_idx not in zones_by_row:
-                    zones_by_row[row_idx] = []
-                zones_by_row[row_idx].append((col_idx, 0, cell_width, cell_height, 'fridge'))  # capacity=0 for fridges
+            # Handle merged cells properly - get the actual value from top-left cell
+            cell_value = None
+            cell_width = 1
+            cell_height = 1
+            is_merged = False
             
-            # Add doors to the same row structure for position calculation
-            for row_idx, col_idx, cell_width, cell_height in door_positions:
-                if row_idx not in zones_by_row:
-                    zones_by_row[row_idx] = []
-                zones_by_row[row_idx].append((col_idx, 0, cell_width, cell_height, 'door'))  # capacity=0 for doors
-            
-            # Sort items in each row by column
-            for row_idx in zones_by_row:
-                zones_by_row[row_idx].sort(key=lambda x: x[0])  # Sort by col_idx
+            # Check if this cell is part of a merged range
+            for merged_range in ws.merged_cells.ranges:
+                if cell.coordinate in merged_range:
+                    is_merged = True
+                    # Only process if this is the top-left cell of the merge
+                    if row_idx == merged_range.min_row and col_idx == merged_range.min_col:
+                        cell_value = cell.value
+                        cell_height = merged_range.max_row - merged_range.min_row + 1
+                        cell_width = merged_range.max_col - merged_range.min_col + 1
+                        
+                        # Mark all cells in this merged range as processed
+                        for r in range(merged_range.min_row, merged_range.max_row + 1):
+                            for c in range(merged_range.min_col, merged_range.max_col + 1):
+                                processed_cells.add((r, c))
+                    else:
+                        # This is NOT the top-left, skip it
+                        break
+                    break
             
-            # Calculate x positions for each zone based on its row
-            # This handles mixed merged/unmerged cells properly
-            zone_x_positions = {}  # {(row_idx, col_idx): x_position}
-            max_width_per_row = {}  # Track max width of each row
+            # If not part of a merged range, it's a regular cell
+            if not is_merged:
+                cell_value = cell.value
             
-            for row_idx in sorted(zones_by_row.keys()):
-                row_items = zones_by_row[row_idx]
-                current_x = 0
-                prev_col_idx = min_col - 1
+            if cell_value is not None:
+                # Safely convert to string
+                try:
+                    cell_str = str(cell_value).strip()
+                except Exception as e:
+                    logger.debug("Could not convert cell value to string: %s", e)
+                    continue
                 
-                for col_idx, capacity, cell_width, cell_height, item_type in row_items:
-                    # Check if there are empty columns between previous item and this one
-                    if col_idx > prev_col_idx + 1:
-                        # Add gaps for empty columns
-                        gap_cols = col_idx - (prev_col_idx + 1)
-                        current_x += gap_cols * 2  # 2m per empty column
+                # Check for DOOR markers (blue cells with "Door" text)
+                if 'door' in cell_str.lower():
+                    # Check if cell has blue fill
+                    cell_fill = cell.fill
+                    is_blue = False
+                    color_str = None
                     
-                    # Store position for this zone or fridge
-                    zone_x_positions[(row_idx, col_idx)] = current_x
+                    if cell_fill and cell_fill.start_color:
+                        # Check for blue color (hex: 0000FF, 0070C0, etc.)
+                        color_value = cell_fill.start_color.rgb if hasattr(cell_fill.start_color, 'rgb') else None
+                        if color_value:
+                            # Blue variants: FF0000FF, 0000FF, 000070C0, FF0070C0, etc.
+                            color_str = str(color_value).upper()
+                            
+                            # Check for various blue shades - expanded list
+                            if (color_str.endswith('0000FF') or color_str.endswith('0070C0') or 
+                                color_str.endswith('4472C4') or color_str.endswith('5B9BD5') or
+                                color_str.endswith('4BACC6') or color_str.endswith('00B0F0') or
+                                '0000FF' in color_str or '0070C0' in color_str):
+                                is_blue = True
                     
-                    # Calculate width and advance current_x
-                    if storage_type == "bulk":
-                        item_width = 8 * cell_width
+                    if is_blue:
+                        logger.debug("%s: door at row=%d col=%d size=%dx%d color=%s",
+                                     store_name, row_idx, col_idx, cell_width, cell_height, color_str)
+                        door_positions.append((row_idx, col_idx, cell_width, cell_height))
+                        max_col = max(max_col, col_idx + cell_width - 1)
+                        max_row = max(max_row, row_idx + cell_height - 1)
+                        min_col = min(min_col, col_idx)
+                        min_row = min(min_row, row_idx)
+                        continue  # Don't process as zone
                     else:
-                        item_width = 2 * cell_width
+                        # DOOR text found but not blue - skip it, don't try to parse as zone
+                        logger.debug("%s: skipping non-blue door cell at row=%d col=%d color=%s",
+                                     store_name, row_idx, col_idx, color_str)
+                        continue
+                
+                # Check for FRIDGE markers (yellow cells with "Fridge" text)
+                if 'fridge' in cell_str.lower():
+                    # Check if cell has yellow fill
+                    cell_fill = cell.fill
+                    is_yellow = False
+                    if cell_fill and cell_fill.start_color:
+                        # Check for yellow color (hex: FFFF00 or similar)
+                        color_value = cell_fill.start_color.rgb if hasattr(cell_fill.start_color, 'rgb') else None
+                        if color_value:
+                            # Yellow variants: FFFFFF00, FFFF00, 00FFFF00, etc.
+                            color_str = str(color_value).upper()
+                            if 'FFFF00' in color_str or (color_str.endswith('FFFF00')):
+                                is_yellow = True
                     
-                    current_x += item_width
-                    prev_col_idx = col_idx + cell_width - 1  # Last column occupied by this item
+                    if is_yellow:
+                        logger.debug("%s: fridge at row=%d col=%d size=%dx%d",
+                                     store_name, row_idx, col_idx, cell_width, cell_height)
+                        fridge_positions.append((row_idx, col_idx, cell_width, cell_height))
+                        max_col = max(max_col, col_idx + cell_width - 1)
+                        max_row = max(max_row, row_idx + cell_height - 1)
+                        min_col = min(min_col, col_idx)
+                        min_row = min(min_row, row_idx)
+                        continue  # Don't process as zone
                 
-                max_width_per_row[row_idx] = current_x
-            
-            # Calculate total store dimensions
-            # Use the widest row as the store width
-            store_width = max(max_width_per_row.values()) + 2  # Add 2m buffer
-            store_height = (max_row - min_row + 1) * 2
+                # Check for bulk storage (tonnage like "175t", "200t", etc.)
+                if cell_str.lower().endswith('t') and len(cell_str) > 1:
+                    try:
+                        # Extract the number before 't'
+                        tonnage = int(cell_str[:-1])
+                        # Create ONE zone for the entire merged cell
+                        zone_positions.append((row_idx, col_idx, tonnage, cell_width, cell_height))
+                        max_col = max(max_col, col_idx + cell_width - 1)
+                        max_row = max(max_row, row_idx + cell_height - 1)
+                        min_col = min(min_col, col_idx)
+                        min_row = min(min_row, row_idx)
+                    except (ValueError, TypeError) as e:
+                        logger.debug("%s: could not parse tonnage %r: %s", store_name, cell_str, e)
+                        pass
+                # Check for numeric capacity (box storage like "5", "6", "7", "8", etc.)
+                else:
+                    try:
+                        capacity = int(cell_str)
+                        # Only accept reasonable capacity numbers (1-50)
+                        if 1 <= capacity <= 50:
+                            # Create ONE zone for the entire merged cell
+                            zone_positions.append((row_idx, col_idx, capacity, cell_width, cell_height))
+                            max_col = max(max_col, col_idx + cell_width - 1)
+                            max_row = max(max_row, row_idx + cell_height - 1)
+                            min_col = min(min_col, col_idx)
+                            min_row = min(min_row, row_idx)
+                    except (ValueError, TypeError) as e:
+                        logger.debug("%s: could not parse capacity %r: %s", store_name, cell_str, e)
+                        pass
+    
+    if not zone_positions:
+        logger.debug("No zones found in %r, skipping", store_name)
+        return {"name": store_name, "storage_type": storage_type, "zones": []}
+    
+    logger.debug("%s: %d zones, bounds rows %s-%s cols %s-%s",
+                 store_name, len(zone_positions), min_row, max_row, min_col, max_col)
+    
+    # Calculate zone, fridge, and door positions
+    # Group zones, fridges, and doors by row for proper x-position calculation
+    zones_by_row = {}
+    for row_idx, col_idx, capacity, cell_width, cell_height in zone_positions:
+        if row_idx not in zones_by_row:
+            zones_by_row[row_idx] = []
+        zones_by_row[row_idx].append((col_idx, capacity, cell_width, cell_height, 'zone'))
+    
+    # Add fridges to the same row structure for position calculation
+    for row_idx, col_idx, cell_width, cell_height in fridge_positions:
+        if row_idx not in zones_by_row:
+            zones_by_row[row_idx] = []
+        zones_by_row[row_idx].append((col_idx, 0, cell_width, cell_height, 'fridge'))  # capacity=0 for fridges
+    
+    # Add doors to the same row structure for position calculation
+    for row_idx, col_idx, cell_width, cell_height in door_positions:
+        if row_idx not in zones_by_row:
+            zones_by_row[row_idx] = []
+        zones_by_row[row_idx].append((col_idx, 0, cell_width, cell_height, 'door'))  # capacity=0 for doors
+    
+    # Sort items in each row by column
+    for row_idx in zones_by_row:
+        zones_by_row[row_idx].sort(key=lambda x: x[0])  # Sort by col_idx
+    
+    # Calculate x positions for each zone based on its row
+    # This handles mixed merged/unmerged cells properly
+    zone_x_positions = {}  # {(row_idx, col_idx): x_position}
+    max_width_per_row = {}  # Track max width of each row
+    
+    for row_idx in sorted(zones_by_row.keys()):
+        row_items = zones_by_row[row_idx]
+        current_x = 0
+        prev_col_idx = min_col - 1
+        
+        for col_idx, capacity, cell_width, cell_height, item_type in row_items:
+            # Check if there are empty columns between previous item and this one
+            if col_idx > prev_col_idx + 1:
+                # Add gaps for empty columns
+                gap_cols = col_idx - (prev_col_idx + 1)
+                current_x += gap_cols * 2  # 2m per empty column
             
-            print(f"  Store dimensions: width={store_width}m, height={store_height}m")
-            print(f"  Row widths: {[(row, width) for row, width in max_width_per_row.items()][:5]}...")
+            # Store position for this zone or fridge
+            zone_x_positions[(row_idx, col_idx)] = current_x
             
-            # Detect doors - look for cells containing "DOOR" text (both inside and outside grid)
-            doors = []
+            # Calculate width and advance current_x
+            if storage_type == "bulk":
+                item_width = 8 * cell_width
+            else:
+                item_width = 2 * cell_width
             
-            # Process doors that were found inside the grid
-            for door_row, door_col, door_cell_width, door_cell_height in door_positions:
+            current_x += item_width
+            prev_col_idx = col_idx + cell_width - 1  # Last column occupied by this item
+        
+        max_width_per_row[row_idx] = current_x
+    
+    # Calculate total store dimensions
+    # Use the widest row as the store width
+    store_width = max(max_width_per_row.values()) + 2  # Add 2m buffer
+    store_height = (max_row - min_row + 1) * 2
+    
+    logger.debug("%s: dimensions %sm x %sm", store_name, store_width, store_height)
+    
+    # Detect doors - look for cells containing "DOOR" text (both inside and outside grid)
+    doors = []
+    
+    # Process doors that were found inside the grid
+    for door_row, door_col, door_cell_width, door_cell_height in door_positions:
+        door_side = None
+        door_position = 0
+        
+        # Determine which edge this door is closest to
+        # Check if it's on the boundary of the zone grid
+        if door_col == min_col:
+            # Left edge
+            door_side = 'left'
+            door_position = (door_row - min_row) * 2
+        elif door_col == max_col:
+            # Right edge
+            door_side = 'right'
+            door_position = (door_row - min_row) * 2
+        elif door_row == min_row:
+            # Top edge
+            door_side = 'top'
+            # Use simple calculation for door position
+            door_position = (door_col - min_col) * 2
+        elif door_row == max_row:
+            # Bottom edge
+            door_side = 'bottom'
+            # Use simple calculation for door position
+            door_position = (door_col - min_col) * 2
+        else:
+            # Door is in the middle of grid, use closest edge
+            # For now, default to right side
+            door_side = 'right'
+            door_position = (door_row - min_row) * 2
+        
+        if door_side:
+            door_dict = {"side": door_side, "position": door_position}
+            if door_dict not in doors:
+                doors.append(door_dict)
+                logger.debug("%s: door %s at %sm (grid row=%d col=%d)",
+                             store_name, door_side, door_position, door_row, door_col)
+    
+    # Also check for doors OUTSIDE the grid (original logic)
+    for row_idx in range(1, ws.max_row + 1):
+        for col_idx in range(1, ws.max_column + 1):
+            cell = ws.cell(row_idx, col_idx)
+            if cell.value and 'door' in str(cell.value).lower():
+                # Skip if already processed (was in door_positions)
+                if any(row_idx == door_row and col_idx == door_col for door_row, door_col, _, _ in door_positions):
+                    continue
+                
+                # Determine which side this door is on relative to the zone area
                 door_side = None
                 door_position = 0
                 
-                # Determine which edge this door is closest to
-                # Check if it's on the boundary of the zone grid
-                if door_col == min_col:
-                    # Left edge
-                    door_side = 'left'
-                    door_position = (door_row - min_row) * 2
-                elif door_col == max_col:
-                    # Right edge
-                    door_side = 'right'
-                    door_position = (door_row - min_row) * 2
-                elif door_row == min_row:
-                    # Top edge
+                # Top: row is above zone area
+                if row_idx < min_row and col_idx >= min_col and col_idx <= max_col:
                     door_side = 'top'
                     # Use simple calculation for door position
-                    door_position = (door_col - min_col) * 2
-                elif door_row == max_row:
-                    # Bottom edge
+                    door_position = (col_idx - min_col) * 2
+                # Bottom: row is below zone area
+                elif row_idx > max_row and col_idx >= min_col and col_idx <= max_col:
                     door_side = 'bottom'
                     # Use simple calculation for door position
-                    door_position = (door_col - min_col) * 2
-                else:
-                    # Door is in the middle of grid, use closest edge
-                    # For now, default to right side
+                    door_position = (col_idx - min_col) * 2
+                # Left: column is left of zone area
+                elif col_idx < min_col and row_idx >= min_row and row_idx <= max_row:
+                    door_side = 'left'
+                    door_position = (row_idx - min_row) * 2
+                # Right: column is right of zone area
+                elif col_idx > max_col and row_idx >= min_row and row_idx <= max_row:
                     door_side = 'right'
-                    door_position = (door_row - min_row) * 2
+                    door_position = (row_idx - min_row) * 2
                 
                 if door_side:
                     door_dict = {"side": door_side, "position": door_position}
                     if door_dict not in doors:
                         doors.append(door_dict)
-                        print(f"  Added door: {door_side} at {door_position}m (from grid cell {openpyxl.utils.get_column_letter(door_col)}{door_row})")
-            
-            # Also check for doors OUTSIDE the grid (original logic)
-            for row_idx in range(1, ws.max_row + 1):
-                for col_idx in range(1, ws.max_column + 1):
-                    cell = ws.cell(row_idx, col_idx)
-                    if cell.value and 'door' in str(cell.value).lower():
-                        # Skip if already processed (was in door_positions)
-                        if any(row_idx == door_row and col_idx == door_col for door_row, door_col, _, _ in door_positions):
-                            continue
-                        
-                        # Determine which side this door is on relative to the zone area
-                        door_side = None
-                        door_position = 0
-                        
-                        # Top: row is above zone area
-                        if row_idx < min_row and col_idx >= min_col and col_idx <= max_col:
-                            door_side = 'top'
-                            # Use simple calculation for door position
-                            door_position = (col_idx - min_col) * 2
-                        # Bottom: row is below zone area
-                        elif row_idx > max_row and col_idx >= min_col and col_idx <= max_col:
-                            door_side = 'bottom'
-                            # Use simple calculation for door position
-                            door_position = (col_idx - min_col) * 2
-                        # Left: column is left of zone area
-                        elif col_idx < min_col and row_idx >= min_row and row_idx <= max_row:
-                            door_side = 'left'
-                            door_position = (row_idx - min_row) * 2
-                        # Right: column is right of zone area
-                        elif col_idx > max_col and row_idx >= min_row and row_idx <= max_row:
-                            door_side = 'right'
-                            door_position = (row_idx - min_row) * 2
-                        
-                        if door_side:
-                            door_dict = {"side": door_side, "position": door_position}
-                            if door_dict not in doors:
-                                doors.append(door_dict)
-                                print(f"  Found door: {door_side} at {door_position}m (cell {openpyxl.utils.get_column_letter(col_idx)}{row_idx})")
-            
-            # Create shed
-            shed_id = str(uuid.uuid4())
-            shed_doc = {
-                "id": shed_id,
-                "name": store_name,
-                "width": store_width,
-                "height": store_height,
-                "description": f"Imported from Excel - {len(zone_positions)} zones",
-                "doors": doors,
-                "order": sheet_order  # Preserve Excel sheet order
-            }
-            await db.sheds.insert_one(shed_doc)
-            stores_created += 1
-            
-            # Create zones
-            # Use the zone_x_positions we calculated above
-            for row_idx, col_idx, capacity, cell_width, cell_height in zone_positions:
-                # Get position from our calculated positions
-                zone_x = zone_x_positions.get((row_idx, col_idx), 0)
-                zone_y = (row_idx - min_row) * 2
-                
-                # Generate zone name (column letter + row number)
-                col_letter = openpyxl.utils.get_column_letter(col_idx - min_col + 1)
-                zone_name = f"{col_letter}{row_idx - min_row + 1}"
-                
-                # Use merged cell dimensions to determine zone size
-                if storage_type == "bulk":
-                    base_width = 8  # Bulk storage base width
-                else:
-                    base_width = 2  # Box storage base width
-                
-                # Scale zone dimensions based on merged cell size
-                zone_width = base_width * cell_width
-                zone_height = 2 * cell_height
-                
-                zone_doc = {
-                    "id": str(uuid.uuid4()),
-                    "shed_id": shed_id,
-                    "name": zone_name,
-                    "x": zone_x,
-                    "y": zone_y,
-                    "width": zone_width,
-                    "height": zone_height,
-                    "total_quantity": 0,
-                    "max_capacity": capacity  # Use the capacity from the cell (6 for boxes, tonnage for bulk)
-                }
-                await db.zones.insert_one(zone_doc)
-                zones_created += 1
-            
-            # Create fridges
-            fridges_created = 0
-            for fridge_row, fridge_col, fridge_cell_width, fridge_cell_height in fridge_positions:
-                # Calculate fridge position using same logic as zones
-                # For fridges, we need to calculate x position based on its row
-                fridge_x = zone_x_positions.get((fridge_row, fridge_col), 0)
-                fridge_y = (fridge_row - min_row) * 2
-                
-                # Fridge dimensions (same as zones)
-                if storage_type == "bulk":
-                    base_width = 8
-                else:
-                    base_width = 2
-                
-                fridge_width = base_width * fridge_cell_width
-                fridge_height = 2 * fridge_cell_height
-                
-                fridge_doc = {
-                    "id": str(uuid.uuid4()),
-                    "shed_id": shed_id,
-                    "name": "Fridge",
-                    "x": fridge_x,
-                    "y": fridge_y,
-                    "width": fridge_width,
-                    "height": fridge_height
-                }
-                await db.fridges.insert_one(fridge_doc)
-                fridges_created += 1
-                print(f"  Created fridge at ({fridge_x}, {fridge_y}) with size {fridge_width}x{fridge_height}")
+                        logger.debug("%s: door %s at %sm (outside grid row=%d col=%d)",
+                                     store_name, door_side, door_position, row_idx, col_idx)
+    
+    # Use merged cell dimensions to determine item size
+    if storage_type == "bulk":
+        base_width = 8  # Bulk storage base width
+    else:
+        base_width = 2  # Box storage base width
+    
+    # Zones: use the zone_x_positions we calculated above
+    zones = []
+    for row_idx, col_idx, capacity, cell_width, cell_height in zone_positions:
+        # Generate zone name (column letter + row number)
+        col_letter = openpyxl.utils.get_column_letter(col_idx - min_col + 1)
+        zones.append((
+            f"{col_letter}{row_idx - min_row + 1}",
+            zone_x_positions.get((row_idx, col_idx), 0),
+            (row_idx - min_row) * 2,
+            base_width * cell_width,
+            2 * cell_height,
+            capacity,  # Use the capacity from the cell (6 for boxes, tonnage for bulk)
+        ))
+    
+    # Fridges and door blocks are positioned with the same logic as zones
+    fridges = [
+        (zone_x_positions.get((row_idx, col_idx), 0), (row_idx - min_row) * 2, base_width * cell_width, 2 * cell_height)
+        for row_idx, col_idx, cell_width, cell_height in fridge_positions
+    ]
+    door_blocks = [
+        (zone_x_positions.get((row_idx, col_idx), 0), (row_idx - min_row) * 2, base_width * cell_width, 2 * cell_height)
+        for row_idx, col_idx, cell_width, cell_height in door_positions
+    ]
+    
+    return {
+        "name": store_name,
+        "storage_type": storage_type,
+        "width": store_width,
+        "height": store_height,
+        "doors": doors,
+        "zones": zones,
+        "fridges": fridges,
+        "door_blocks": door_blocks,
+    }
+
+
+async def _import_fields(job: JobContext, harvest_sheets: list, new_fields_to_create: list) -> dict:
+    """Upsert the workbook's fields by id and drop fields no longer in it"""
+    phase_start = time.perf_counter()
+    fields_created = 0
+    
+    # Current fields, to diff the workbook against
+    old_fields = await db.fields.find({}, {"_id": 0}).to_list(length=None)
+    
+    # Create a mapping of old fields: name -> {variety, type, crop_type}
+    old_field_data = {f['name']: {'variety': f.get('variety', 'Unknown'), 'type': f.get('type'), 'crop_type': f.get('crop_type', 'Unknown')} for f in old_fields}
+    
+    # STEP 2: Data Integrity Check - Detect variety changes
+    variety_conflicts = []
+    
+    for new_field in new_fields_to_create:
+        field_name = new_field['name']
+        new_variety = new_field['variety']
+        new_type = new_field.get('type')
+        
+        if field_name in old_field_data:
+            old_variety = old_field_data[field_name]['variety']
+            old_type = old_field_data[field_name].get('type')
             
-            if fridges_created > 0:
-                print(f"Store {store_name}: Created {fridges_created} fridges")
+            # Check if variety or type has changed
+            variety_changed = (new_variety != old_variety)
+            type_changed = (new_type != old_type) and (old_type is not None or new_type is not None)
             
-            # Create doors
-            doors_created = 0
-            for door_row, door_col, door_cell_width, door_cell_height in door_positions:
-                # Calculate door position using same logic as zones
-                door_x = zone_x_positions.get((door_row, door_col), 0)
-                door_y = (door_row - min_row) * 2
-                
-                # Door dimensions (same as zones)
-                if storage_type == "bulk":
-                    base_width = 8
-                else:
-                    base_width = 2
+            if variety_changed or type_changed:
+                # Check how much stock would be affected
+                stock_count = await db.stock_intakes.count_documents({"field_name": field_name})
                 
-                door_width = base_width * door_cell_width
-                door_height = 2 * door_cell_height
-                
-                door_doc = {
-                    "id": str(uuid.uuid4()),
-                    "shed_id": shed_id,
-                    "name": "Door",
-                    "x": door_x,
-                    "y": door_y,
-                    "width": door_width,
-                    "height": door_height
-                }
-                await db.doors.insert_one(door_doc)
-                doors_created += 1
-                print(f"  Created door at ({door_x}, {door_y}) with size {door_width}x{door_height}")
+                if stock_count > 0:
+                    conflict_info = {
+                        "field_name": field_name,
+                        "old_variety": old_variety,
+                        "new_variety": new_variety,
+                        "old_type": old_type,
+                        "new_type": new_type,
+                        "affected_stock_records": stock_count
+                    }
+                    variety_conflicts.append(conflict_info)
+                    logger.warning("Field %r variety changed from %r to %r (affects %d stock records)",
+                                   field_name, old_variety, new_variety, stock_count)
+    
+    # STEP 3: Upsert fields by id. Ids come from the natural key, so unchanged fields
+    # are left alone and only new or edited ones are written
+    parsed_by_id = {}
+    for field_doc in new_fields_to_create:
+        if field_doc["id"] in parsed_by_id:
+            logger.warning("Field %r (%s, %s) appears more than once; keeping the last row",
+                           field_doc["name"], field_doc["variety"], field_doc["harvest_year"])
+        parsed_by_id[field_doc["id"]] = field_doc
+    old_by_id = {f["id"]: f for f in old_fields}
+    
+    field_writes = []
+    fields_updated = 0
+    for field_id, field_doc in parsed_by_id.items():
+        old = old_by_id.get(field_id)
+        if old == field_doc:
+            continue
+        if old is None:
+            fields_created += 1
+        else:
+            fields_updated += 1
+        field_writes.append(ReplaceOne({"id": field_id}, field_doc, upsert=True))
+    removed_ids = [field_id for field_id in old_by_id if field_id not in parsed_by_id]
+    if field_writes:
+        await db.fields.bulk_write(field_writes, ordered=False)
+    if removed_ids:
+        await db.fields.delete_many({"id": {"$in": removed_ids}})
+    if field_writes or removed_ids:
+        await fields_changed()
+    
+    log_event("excel_import.fields", sheets=harvest_sheets, parsed=len(new_fields_to_create),
+              created=fields_created, updated=fields_updated, removed=len(removed_ids),
+              unchanged=len(parsed_by_id) - fields_created - fields_updated,
+              variety_conflicts=len(variety_conflicts), duration_ms=_elapsed_ms(phase_start))
+    phase_start = time.perf_counter()
+    
+    # Stock of a removed field follows it to its replacement: the derived id for
+    # fields stored before ids came from the natural key, otherwise the one
+    # imported field with the same name and harvest year (e.g. after a variety
+    # correction). Stock with no single replacement is reported as orphaned.
+    by_name_year = defaultdict(list)
+    for field_doc in parsed_by_id.values():
+        by_name_year[(field_doc["name"], field_doc["harvest_year"])].append(field_doc)
+    remapped_ids, unmapped_ids = {}, []
+    for field_id in removed_ids:
+        old = old_by_id[field_id]
+        derived = field_id_for(old["name"], old.get("variety", "Unknown"), old.get("harvest_year", "2025"))
+        candidates = by_name_year.get((old["name"], old.get("harvest_year", "2025")), [])
+        if derived in parsed_by_id:
+            remapped_ids[field_id] = parsed_by_id[derived]
+        elif len(candidates) == 1:
+            remapped_ids[field_id] = candidates[0]
+        else:
+            unmapped_ids.append(field_id)
+    
+    intakes_updated = 0
+    if remapped_ids:
+        await job.progress(30, "Updating stock intake field references")
+        result = await db.stock_intakes.bulk_write([
+            UpdateMany({"field_id": old_id}, {"$set": {"field_id": new["id"], "variety": new["variety"]}})
+            for old_id, new in remapped_ids.items()
+        ], ordered=False)
+        intakes_updated = result.modified_count
+        await db.stock_movements.bulk_write(
+            [UpdateMany({"field_id": old_id}, {"$set": {"field_id": new["id"]}}) for old_id, new in remapped_ids.items()],
+            ordered=False,
+        )
+        await cache_bus.invalidate("stock")
+    orphaned_intakes = []
+    if unmapped_ids:
+        orphaned_intakes = await db.stock_intakes.find(
+            {"field_id": {"$in": unmapped_ids}},
+            {"_id": 0, "id": 1, "field_id": 1, "field_name": 1, "variety": 1, "zone_id": 1, "quantity": 1},
+        ).to_list(length=None)
+        for intake in orphaned_intakes:
+            intake["harvest_year"] = old_by_id[intake["field_id"]].get("harvest_year", "2025")
+    if remapped_ids or orphaned_intakes:
+        log_event("excel_import.field_remap", fields_remapped=len(remapped_ids), intakes_updated=intakes_updated,
+                  orphaned_intakes=len(orphaned_intakes), duration_ms=_elapsed_ms(phase_start))
+    
+    return {
+        "fields_created": fields_created,
+        "fields_updated": fields_updated,
+        "fields_removed": len(removed_ids),
+        "fields_remapped": len(remapped_ids),
+        "orphaned_intakes": orphaned_intakes,
+        "variety_conflicts": variety_conflicts,
+    }
+
+
+async def _import_grade_tables(grade_tables: dict):
+    """Write grade tables that differ from the stored ones; fields only reference them"""
+    stored = {doc["id"]: doc["grades"] for doc in await db.grade_tables.find({}, {"_id": 0, "id": 1, "grades": 1}).to_list(length=None)}
+    now = datetime.now(timezone.utc).isoformat()
+    writes = [ReplaceOne({"id": table_id}, {"id": table_id, "grades": grades, "updated_at": now}, upsert=True)
+              for table_id, grades in grade_tables.items() if stored.get(table_id) != grades]
+    if writes:
+        await db.grade_tables.bulk_write(writes, ordered=False)
+        await cache_bus.invalidate("grades")
+    log_event("excel_import.grades_written", tables=len(grade_tables), changed=len(writes))
+
+
+async def _known_sheet_hashes() -> dict:
+    """Sheet hashes stored by the previous import, for parse_master_workbook"""
+    meta = await db.metadata.find_one({"_id": "workbook_import"}) or {}
+    sheds = await db.sheds.find({"sheet_hash": {"$exists": True}}, {"_id": 0, "name": 1, "sheet_hash": 1}).to_list(length=None)
+    return {"fields": meta.get("fields_hash"), "stores": {shed["name"]: shed["sheet_hash"] for shed in sheds}}
+
+
+def _layout_docs(shed_id: str, name: str, blocks: list) -> list:
+    return [{"id": str(uuid.uuid4()), "shed_id": shed_id, "name": name, "x": x, "y": y, "width": width, "height": height}
+            for x, y, width, height in blocks]
+
+
+async def _sync_store_layout(shed: dict, store: dict, order: int) -> dict:
+    """
+    Bring an existing shed in line with its re-parsed sheet. Zones are matched by
+    position: a zone whose (x, y) cell is unchanged keeps its id and stock and only
+    gets its size, name or capacity updated. Zones gone from the sheet are deleted
+    unless they still hold stock; fridges and doors hold nothing and are replaced.
+    """
+    shed_id = shed["id"]
+    zones = await db.zones.find({"shed_id": shed_id}, {"_id": 0}).to_list(length=None)
+    by_position = {(zone["x"], zone["y"]): zone for zone in zones}
+    
+    writes = []
+    matched = set()
+    created = updated = 0
+    for zone_name, zone_x, zone_y, zone_width, zone_height, capacity in store["zones"]:
+        old = by_position.pop((zone_x, zone_y), None)
+        if old is None:
+            writes.append(InsertOne({
+                "id": str(uuid.uuid4()), "shed_id": shed_id, "name": zone_name, "x": zone_x, "y": zone_y,
+                "width": zone_width, "height": zone_height, "total_quantity": 0, "max_capacity": capacity,
+            }))
+            created += 1
+            continue
+        matched.add(old["id"])
+        target = {"name": zone_name, "width": zone_width, "height": zone_height, "max_capacity": capacity}
+        changes = {key: value for key, value in target.items() if old.get(key) != value}
+        if changes:
+            writes.append(UpdateOne({"id": old["id"]}, {"$set": changes}))
+            updated += 1
+    
+    gone = [zone for zone in zones if zone["id"] not in matched]
+    stocked = set(await db.stock_intakes.distinct("zone_id", {"zone_id": {"$in": [zone["id"] for zone in gone]}}))
+    writes += [DeleteOne({"id": zone["id"]}) for zone in gone if zone["id"] not in stocked]
+    if writes:
+        await db.zones.bulk_write(writes, ordered=False)
+    
+    for collection, name, blocks in (("fridges", "Fridge", store["fridges"]), ("doors", "Door", store["door_blocks"])):
+        await db[collection].delete_many({"shed_id": shed_id})
+        docs = _layout_docs(shed_id, name, blocks)
+        if docs:
+            await db[collection].insert_many(docs)
+    
+    await db.sheds.update_one({"id": shed_id}, {"$set": {
+        "width": store["width"],
+        "height": store["height"],
+        "doors": store["doors"],
+        "description": f"Imported from Excel - {len(store['zones'])} zones",
+        "order": order,
+        "sheet_hash": store["sheet_hash"],
+    }})
+    return {
+        "created": created,
+        "updated": updated,
+        "removed": len(gone) - len(stocked),
+        "kept_with_stock": [{"shed": shed["name"], "zone": zone["name"]} for zone in gone if zone["id"] in stocked],
+    }
+
+
+async def _create_store(store: dict, order: int):
+    shed_id = str(uuid.uuid4())
+    await db.sheds.insert_one({
+        "id": shed_id,
+        "name": store["name"],
+        "width": store["width"],
+        "height": store["height"],
+        "description": f"Imported from Excel - {len(store['zones'])} zones",
+        "doors": store["doors"],
+        "order": order,  # Preserve Excel sheet order
+        "sheet_hash": store["sheet_hash"],
+    })
+    await db.zones.insert_many([{
+        "id": str(uuid.uuid4()), "shed_id": shed_id, "name": zone_name, "x": zone_x, "y": zone_y,
+        "width": zone_width, "height": zone_height, "total_quantity": 0, "max_capacity": capacity,
+    } for zone_name, zone_x, zone_y, zone_width, zone_height, capacity in store["zones"]])
+    for collection, name, blocks in (("fridges", "Fridge", store["fridges"]), ("doors", "Door", store["door_blocks"])):
+        docs = _layout_docs(shed_id, name, blocks)
+        if docs:
+            await db[collection].insert_many(docs)
+
+
+async def import_excel_workbook(job: JobContext, contents: bytes) -> dict:
+    """
+    Import fields, grade tables and store plans from a master workbook. Sheets
+    unchanged since the last import (by sheet_hash) are neither parsed nor written.
+    """
+    import_start = time.perf_counter()
+    try:
+        await job.progress(1, "Parsing workbook")
+        parsed = await workbook_pool.run(parse_master_workbook, contents, await _known_sheet_hashes())
+        await job.progress(30, "Importing fields")
+        
+        if parsed["fields"] is None:
+            log_event("excel_import.fields", sheets=parsed["harvest_sheets"], unchanged=True)
+            field_result = {"fields_created": 0, "fields_updated": 0, "fields_removed": 0, "fields_remapped": 0,
+                            "orphaned_intakes": [], "variety_conflicts": []}
+        else:
+            await _import_grade_tables(parsed["grade_tables"])
+            field_result = await _import_fields(job, parsed["harvest_sheets"], parsed["fields"])
+            await db.metadata.update_one({"_id": "workbook_import"},
+                                         {"$set": {"fields_hash": parsed["fields_hash"]}}, upsert=True)
+        variety_conflicts = field_result.pop("variety_conflicts")
+        
+        phase_start = time.perf_counter()
+        existing_sheds = {shed["name"]: shed for shed in await db.sheds.find({}, {"_id": 0}).to_list(length=None)}
+        stores_created = stores_updated = stores_unchanged = 0
+        zone_counts = defaultdict(int)
+        zones_kept_with_stock = []
+        
+        for order, store in enumerate(parsed["stores"], start=1):
+            await job.progress(40 + 60 * (order - 1) / len(parsed["stores"]), f"Importing store {store['name']}")
+            shed = existing_sheds.get(store["name"])
+            if store.get("unchanged"):
+                stores_unchanged += 1
+                if shed.get("order") != order:
+                    await db.sheds.update_one({"id": shed["id"]}, {"$set": {"order": order}})
+                continue
+            if not store["zones"]:
+                continue
             
-            if doors_created > 0:
-                print(f"Store {store_name}: Created {doors_created} doors")
+            store_start = time.perf_counter()
+            if shed is None:
+                await _create_store(store, order)
+                stores_created += 1
+                zone_counts["created"] += len(store["zones"])
+            else:
+                changes = await _sync_store_layout(shed, store, order)
+                stores_updated += 1
+                for key in ("created", "updated", "removed"):
+                    zone_counts[key] += changes[key]
+                zones_kept_with_stock += changes["kept_with_stock"]
+            log_event("excel_import.store", level=logging.DEBUG, store=store["name"], storage_type=store["storage_type"],
+                      zones=len(store["zones"]), fridges=len(store["fridges"]), doors=len(store["door_blocks"]),
+                      new=shed is None, duration_ms=_elapsed_ms(store_start))
+        
+        log_event("excel_import.stores", created=stores_created, updated=stores_updated, unchanged=stores_unchanged,
+                  zones_created=zone_counts["created"], zones_updated=zone_counts["updated"],
+                  zones_removed=zone_counts["removed"], zones_kept_with_stock=len(zones_kept_with_stock),
+                  duration_ms=_elapsed_ms(phase_start))
+        if stores_created or stores_updated:
+            await cache_bus.invalidate("layout")
+        log_event("excel_import.done", fields_created=field_result["fields_created"], stores_created=stores_created,
+                  stores_updated=stores_updated, zones_created=zone_counts["created"], duration_ms=_elapsed_ms(import_start))
         
         response_data = {
             "message": "Excel uploaded successfully",
-            "fields_created": fields_created,
+            **field_result,
             "stores_created": stores_created,
-            "zones_created": zones_created
+            "stores_updated": stores_updated,
+            "stores_unchanged": stores_unchanged,
+            "zones_created": zone_counts["created"],
+            "zones_updated": zone_counts["updated"],
+            "zones_removed": zone_counts["removed"],
         }
         
         # Include variety conflicts if any were detected
+        warnings = []
         if variety_conflicts:
             response_data["variety_conflicts"] = variety_conflicts
-            response_data["warning"] = f"{len(variety_conflicts)} field(s) have variety changes that may affect existing stock attribution"
+            warnings.append(f"{len(variety_conflicts)} field(s) have variety changes that may affect existing stock attribution")
+        if field_result["orphaned_intakes"]:
+            warnings.append(f"{len(field_result['orphaned_intakes'])} stock intake(s) belong to fields no longer "
+                            "in the workbook and could not be matched to a single replacement field")
+        if warnings:
+            response_data["warning"] = "; ".join(warnings)
+        if zones_kept_with_stock:
+            # Removed from the sheet but still holding stock: kept until the stock is moved out
+            response_data["zones_kept_with_stock"] = zones_kept_with_stock
         
         return response_data
     
     except Exception as e:
-        print(f"Error processing file: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Excel import failed")
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
 
-
 # Database integrity check endpoint
-@api_router.get("/database-integrity")
-async def check_database_integrity():
+@api_router.get("/database-integrity", status_code=202)
+async def database_integrity():
+    """Queue an integrity check; the report is the job result"""
+    job = await job_runner.submit("integrity_check", check_database_integrity, dedupe_key="integrity_check")
+    return job_accepted(job)
+
+async def check_database_integrity(job: JobContext) -> dict:
     """Check database integrity and report any inconsistencies"""
+    check_start = time.perf_counter()
     try:
         issues = []
         stats = {}
         
         # Count documents
-        sheds_count = await db.sheds.count_documents({})
-        zones_count = await db.zones.count_documents({})
-        intakes_count = await db.stock_intakes.count_documents({})
-        fields_count = await db.fields.count_documents({})
+        sheds_count = await report_db.sheds.count_documents({})
+        zones_count = await report_db.zones.count_documents({})
+        intakes_count = await report_db.stock_intakes.count_documents({})
+        fields_count = await report_db.fields.count_documents({})
         
         stats["sheds"] = sheds_count
         stats["zones"] = zones_count
         stats["stock_intakes"] = intakes_count
         stats["fields"] = fields_count
         
+        await job.progress(20, "Checking zones")
+        
         # Check for orphaned zones (zones whose shed_id doesn't exist)
-        zones = await db.zones.find({}).to_list(length=None)
-        shed_ids = set([s["id"] for s in await db.sheds.find({}).to_list(length=None)])
+        zones = await report_db.zones.find({}).to_list(length=None)
+        shed_ids = set([s["id"] for s in await report_db.sheds.find({}).to_list(length=None)])
         
         orphaned_zones = []
         for zone in zones:
@@ -1502,8 +3250,10 @@ async def check_database_integrity():
                 "examples": orphaned_zones[:5]
             })
         
+        await job.progress(40, "Checking stock intakes")
+        
         # Check for stock intakes with invalid zone_id or shed_id
-        intakes = await db.stock_intakes.find({}).to_list(length=None)
+        intakes = await report_db.stock_intakes.find({}).to_list(length=None)
         zone_ids = set([z["id"] for z in zones])
         
         invalid_intakes = []
@@ -1529,6 +3279,8 @@ async def check_database_integrity():
                 "examples": invalid_intakes[:5]
             })
         
+        await job.progress(70, "Checking zone quantities")
+        
         # Check for zone quantity mismatches
         quantity_mismatches = []
         for zone in zones:
@@ -1554,6 +3306,9 @@ async def check_database_integrity():
                 "examples": quantity_mismatches[:10]
             })
         
+        log_event("integrity_check", **stats, issues={issue["type"]: issue["count"] for issue in issues},
+                  duration_ms=_elapsed_ms(check_start))
+        
         return {
             "status": "healthy" if len(issues) == 0 else "issues_found",
             "stats": stats,
@@ -1565,22 +3320,26 @@ async def check_database_integrity():
 
 
 # Clear all data endpoint
-@api_router.delete("/clear-all-data")
+@api_router.delete("/clear-all-data", status_code=202)
 async def clear_all_data():
+    """Queue clearing all data from the database"""
+    job = await job_runner.submit("clear_all_data", clear_all_collections, dedupe_key="clear_all_data")
+    return job_accepted(job)
+
+async def clear_all_collections(job: JobContext) -> dict:
     """Clear all data from the database"""
     try:
         # Delete all documents from each collection
-        await db.fields.delete_many({})
-        await db.sheds.delete_many({})
-        await db.zones.delete_many({})
-        await db.fridges.delete_many({})
-        await db.doors.delete_many({})
-        await db.stock_intakes.delete_many({})
-        await db.stock_movements.delete_many({})
+        collections = ["fields", "grade_tables", "sheds", "zones", "fridges", "doors", "stock_intakes", "stock_movements"]
+        for index, collection in enumerate(collections):
+            await job.progress(100 * index / len(collections), f"Clearing {collection}")
+            await db[collection].delete_many({})
+        await fields_changed()
+        await cache_bus.invalidate("stock", "layout", "grades")
         
         return {
             "message": "All data cleared successfully",
-            "collections_cleared": ["fields", "sheds", "zones", "fridges", "doors", "stock_intakes", "stock_movements"]
+            "collections_cleared": collections
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error clearing data: {str(e)}")
@@ -1596,6 +3355,7 @@ async def clear_stores():
         
         # Reset all zone quantities to 0
         await db.zones.update_many({}, {"$set": {"total_quantity": 0}})
+        await cache_bus.invalidate("stock")
         
         return {
             "message": "All stock cleared successfully. Sheds and zones preserved.",
@@ -1605,105 +3365,1086 @@ async def clear_stores():
         raise HTTPException(status_code=500, detail=f"Error clearing stock: {str(e)}")
 
 
-@api_router.get("/export-excel")
+EXPORT_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+@api_router.get("/export-excel", status_code=202)
 async def export_excel():
+    """Queue an Excel export; download it from GET /api/jobs/{job_id}/download when done"""
+    workbook_pool.check_capacity()
+    job = await job_runner.submit("excel_export", build_excel_export, dedupe_key="excel_export")
+    return job_accepted(job)
+
+EXPORT_SHEETS = [
+    ("Fields", "fields",
+     [("ID", "id", ''), ("Name", "name", ''), ("Area", "area", ''), ("Crop Type", "crop_type", ''),
+      ("Variety", "variety", ''), ("Harvest Year", "harvest_year", ''), ("Available Grades", "available_grades", [])]),
+    ("Sheds", "sheds",
+     [("ID", "id", ''), ("Name", "name", ''), ("Width", "width", 0), ("Height", "height", 0),
+      ("Description", "description", '')]),
+    ("Zones", "zones",
+     [("ID", "id", ''), ("Shed ID", "shed_id", ''), ("Name", "name", ''), ("X", "x", 0), ("Y", "y", 0),
+      ("Width", "width", 0), ("Height", "height", 0), ("Total Quantity", "total_quantity", 0),
+      ("Max Capacity", "max_capacity", 6)]),
+    ("Stock Intakes", "stock_intakes",
+     [("ID", "id", ''), ("Field ID", "field_id", ''), ("Field Name", "field_name", ''), ("Zone ID", "zone_id", ''),
+      ("Shed ID", "shed_id", ''), ("Quantity", "quantity", 0), ("Grade", "grade", ''), ("Date", "date", '')]),
+]
+
+def render_workbook(sheets: list) -> bytes:
+    """Build an .xlsx from [(title, header, rows)] (runs in the workbook process pool)"""
+    wb = openpyxl.Workbook(write_only=True)
+    for title, header, rows in sheets:
+        ws = wb.create_sheet(title)
+        ws.append(header)
+        for row in rows:
+            ws.append(row)
+    output = io.BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+async def build_excel_export(job: JobContext) -> dict:
     """Export all data to Excel file"""
     try:
-        # Create a new workbook
-        wb = openpyxl.Workbook()
-        
-        # Remove default sheet
-        wb.remove(wb.active)
-        
-        # Export Fields
-        ws_fields = wb.create_sheet("Fields")
-        ws_fields.append(["ID", "Name", "Area", "Crop Type", "Variety", "Harvest Year", "Available Grades"])
-        
-        fields = await db.fields.find({}).to_list(length=None)
-        for field in fields:
-            ws_fields.append([
-                field.get('id', ''),
-                field.get('name', ''),
-                field.get('area', ''),
-                field.get('crop_type', ''),
-                field.get('variety', ''),
-                field.get('harvest_year', ''),
-                ', '.join(field.get('available_grades', []))
-            ])
-        
-        # Export Sheds
-        ws_sheds = wb.create_sheet("Sheds")
-        ws_sheds.append(["ID", "Name", "Width", "Height", "Description"])
-        
-        sheds = await db.sheds.find({}).to_list(length=None)
-        for shed in sheds:
-            ws_sheds.append([
-                shed.get('id', ''),
-                shed.get('name', ''),
-                shed.get('width', 0),
-                shed.get('height', 0),
-                shed.get('description', '')
-            ])
-        
-        # Export Zones
-        ws_zones = wb.create_sheet("Zones")
-        ws_zones.append(["ID", "Shed ID", "Name", "X", "Y", "Width", "Height", "Total Quantity", "Max Capacity"])
-        
-        zones = await db.zones.find({}).to_list(length=None)
-        for zone in zones:
-            ws_zones.append([
-                zone.get('id', ''),
-                zone.get('shed_id', ''),
-                zone.get('name', ''),
-                zone.get('x', 0),
-                zone.get('y', 0),
-                zone.get('width', 0),
-                zone.get('height', 0),
-                zone.get('total_quantity', 0),
-                zone.get('max_capacity', 6)
-            ])
-        
-        # Export Stock Intakes
-        ws_intakes = wb.create_sheet("Stock Intakes")
-        ws_intakes.append(["ID", "Field ID", "Field Name", "Zone ID", "Shed ID", "Quantity", "Grade", "Date"])
-        
-        intakes = await db.stock_intakes.find({}).to_list(length=None)
-        for intake in intakes:
-            ws_intakes.append([
-                intake.get('id', ''),
-                intake.get('field_id', ''),
-                intake.get('field_name', ''),
-                intake.get('zone_id', ''),
-                intake.get('shed_id', ''),
-                intake.get('quantity', 0),
-                intake.get('grade', ''),
-                intake.get('date', '')
-            ])
+        # Read each collection as compact rows; the workbook itself is built in a worker process
+        sheets = []
+        for index, (title, collection, columns) in enumerate(EXPORT_SHEETS):
+            await job.progress(60 * index / len(EXPORT_SHEETS), f"Exporting {title.lower()}")
+            projection = {"_id": 0, **{key: 1 for _, key, _ in columns}}
+            if collection == "fields":
+                projection["grade_table"] = 1
+            docs = await report_db[collection].find({}, projection).to_list(length=None)
+            if collection == "fields":
+                docs = await expand_field_grades(docs)
+            rows = [
+                [', '.join(value) if isinstance(value, list) else value
+                 for value in (doc.get(key, default) for _, key, default in columns)]
+                for doc in docs
+            ]
+            sheets.append((title, [name for name, _, _ in columns], rows))
         
-        # Save to bytes
-        output = io.BytesIO()
-        wb.save(output)
-        output.seek(0)
+        await job.progress(60, "Writing workbook")
+        data = await workbook_pool.run(render_workbook, sheets)
         
-        # Return as downloadable file
-        return StreamingResponse(
-            output,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": "attachment; filename=stock-control-export.xlsx"}
-        )
+        # Keep the file with the job so GET /api/jobs/{id}/download can serve it
+        await db.job_files.insert_one({
+            "job_id": job.id,
+            "filename": "stock-control-export.xlsx",
+            "media_type": EXPORT_MEDIA_TYPE,
+            "data": data,
+            "expires_at": datetime.now(timezone.utc) + JOB_RETENTION,
+        })
+        return {"filename": "stock-control-export.xlsx", "size": len(data),
+                "download_url": f"/api/jobs/{job.id}/download"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error exporting to Excel: {str(e)}")
 
 
+# Job Routes
+def _public_job(job: dict) -> dict:
+    return {k: v for k, v in job.items() if k not in ("_id", "dedupe_key", "expires_at")}
+
+@api_router.get("/jobs")
+async def list_jobs(kind: Optional[str] = None, limit: int = 20):
+    """Most recent jobs, optionally filtered by kind"""
+    query = {"kind": kind} if kind else {}
+    jobs = await db.jobs.find(query, {"_id": 0}).sort("created_at", -1).to_list(length=min(limit, 100))
+    return {"jobs": [_public_job(j) for j in jobs]}
+
+@api_router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Poll a job's status, progress and (when done) result"""
+    job = await db.jobs.find_one({"id": job_id}, {"_id": 0})
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _public_job(job)
+
+@api_router.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Server-Sent Events stream of job progress; ends when the job finishes"""
+    if not await db.jobs.find_one({"id": job_id}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def stream():
+        last = None
+        while True:
+            job = await db.jobs.find_one({"id": job_id}, {"_id": 0})
+            if job is None:
+                return
+            snapshot = (job["status"], job.get("progress"), job.get("message"))
+            if snapshot != last:
+                last = snapshot
+                yield b"event: progress\ndata: " + orjson.dumps(_public_job(job)) + b"\n\n"
+            if job["status"] not in JOB_ACTIVE_STATES:
+                return
+            await asyncio.sleep(0.5)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@api_router.get("/jobs/{job_id}/download")
+async def download_job_file(job_id: str):
+    """Download the file produced by a finished job (e.g. the Excel export)"""
+    job_file = await db.job_files.find_one({"job_id": job_id}, {"_id": 0})
+    if not job_file:
+        raise HTTPException(status_code=404, detail="No file for this job")
+    return Response(
+        content=job_file["data"],
+        media_type=job_file["media_type"],
+        headers={"Content-Disposition": f"attachment; filename={job_file['filename']}"}
+    )
+
+
+# Harvest Archive Routes
+@api_router.post("/admin/harvest-years/{harvest_year}/archive", status_code=202)
+async def archive_harvest_year_route(harvest_year: str, admin: str = Depends(require_admin)):
+    """Queue archiving a closed season; the newest harvest year is the working season and can't be archived"""
+    validate_harvest_year(harvest_year)
+    years = await db.fields.distinct("harvest_year")
+    if harvest_year not in years:
+        raise HTTPException(status_code=404, detail="No fields for this harvest year")
+    if harvest_year == max(years):
+        raise HTTPException(status_code=400, detail=f"{harvest_year} is the current season")
+    job = await job_runner.submit("harvest_archive", archive_harvest_year, harvest_year,
+                                  dedupe_key=harvest_year, submitted_by=admin)
+    return job_accepted(job)
+
+@api_router.get("/harvest-archives")
+async def list_harvest_archives():
+    """Archived seasons with their headline totals"""
+    rollups = await db.harvest_rollups.find(
+        {}, {"_id": 0, "by_field": 0, "by_shed": 0, "by_grade": 0}
+    ).sort("harvest_year", -1).to_list(length=None)
+    return {"archives": rollups}
+
+@api_router.get("/harvest-archives/{harvest_year}")
+async def get_harvest_archive(harvest_year: str):
+    """Rollup totals of an archived season, by field, shed and grade"""
+    rollup = await db.harvest_rollups.find_one({"harvest_year": harvest_year}, {"_id": 0})
+    if not rollup:
+        raise HTTPException(status_code=404, detail="Harvest year has not been archived")
+    return rollup
+
+
+# Zone Remap Route
+# After stock is copied onto a layout that was imported separately, intakes
+# still point at the source deployment's zone ids. They are moved to the zone at
+# the same position: same shed (by id, else by name) and the same x, y.
+def _position_key(shed, x, y) -> tuple:
+    return (shed, round(float(x), 3), round(float(y), 3))
+
+
+async def remap_intake_zones(request: ZoneRemapRequest) -> dict:
+    remap_start = time.perf_counter()
+    zones = await db.zones.aggregate([
+        {"$lookup": {"from": "sheds", "localField": "shed_id", "foreignField": "id", "as": "shed"}},
+        {"$project": {"_id": 0, "id": 1, "shed_id": 1, "x": 1, "y": 1,
+                      "shed_name": {"$arrayElemAt": ["$shed.name", 0]}}},
+    ]).to_list(length=None)
+    by_shed_id = {_position_key(zone["shed_id"], zone["x"], zone["y"]): zone for zone in zones}
+    by_shed_name = {_position_key(zone["shed_name"], zone["x"], zone["y"]): zone
+                    for zone in zones if zone.get("shed_name")}
+    source_zones = {zone.id: zone for zone in request.zones}
+    source_shed_names = {shed.id: shed.name for shed in request.sheds}
+
+    # Intakes whose zone no longer exists, grouped by that zone
+    orphans = await db.stock_intakes.aggregate([
+        {"$match": {"zone_id": {"$nin": [zone["id"] for zone in zones]}}},
+        {"$group": {"_id": "$zone_id", "quantity": {"$sum": "$quantity"}, "intake_ids": {"$push": "$id"}}},
+    ]).to_list(length=None)
+
+    writes, moved, unmatched = [], defaultdict(float), []
+    remapped = unmatched_intakes = 0
+    for orphan in orphans:
+        source = source_zones.get(orphan["_id"])
+        target = None
+        if source is not None:
+            target = (by_shed_id.get(_position_key(source.shed_id, source.x, source.y))
+                      or by_shed_name.get(_position_key(source_shed_names.get(source.shed_id), source.x, source.y)))
+        if target is None:
+            unmatched.append({
+                "zone_id": orphan["_id"],
+                "reason": "no zone at this position" if source else "zone not in the source layout",
+                "quantity": orphan["quantity"],
+                "intake_ids": orphan["intake_ids"],
+            })
+            unmatched_intakes += len(orphan["intake_ids"])
+            continue
+        writes.append(UpdateMany(
+            {"zone_id": orphan["_id"], "id": {"$in": orphan["intake_ids"]}},
+            {"$set": {"zone_id": target["id"], "shed_id": target["shed_id"]}},
+        ))
+        moved[target["id"]] += orphan["quantity"]
+        remapped += len(orphan["intake_ids"])
+
+    if writes and not request.dry_run:
+        await db.stock_intakes.bulk_write(writes, ordered=False)
+        await db.zones.bulk_write(
+            [UpdateOne({"id": zone_id}, {"$inc": {"total_quantity": quantity}}) for zone_id, quantity in moved.items()],
+            ordered=False,
+        )
+        await cache_bus.invalidate("stock")
+
+    log_event("zone_remap", dry_run=request.dry_run, zones=len(zones), stale_zones=len(orphans),
+              intakes_remapped=remapped, unmatched_zones=len(unmatched), duration_ms=_elapsed_ms(remap_start))
+    return {
+        "dry_run": request.dry_run,
+        "zones_indexed": len(zones),
+        "zones_remapped": len(writes),
+        "intakes_remapped": remapped,
+        "quantity_remapped": sum(moved.values()),
+        "unmatched_intakes": unmatched_intakes,
+        "unmatched": unmatched,
+    }
+
+
+@api_router.post("/admin/remap-zones")
+async def remap_zones(request: ZoneRemapRequest, admin: str = Depends(require_admin)):
+    """Point intakes at zones that no longer exist to the zone now at the same shed position"""
+    return await remap_intake_zones(request)
+
+
+# Dump and Restore Routes
+# Deployments are copied with one streamed dump instead of crawling the list
+# endpoints. A dump is gzip-compressed NDJSON: a {"$dump": ...} marker line,
+# then for each collection a {"$collection": name} line followed by its
+# documents, and a closing {"$end": ...} line with the document counts. ObjectIds
+# and datetimes are written as {"$oid": ...} / {"$date": ...} so _ids survive.
+# A restore checkpoints after every batch in metadata, so re-posting the same
+# dump after a failure carries on where it stopped.
+DUMP_FORMAT = 1
+DUMP_COLLECTIONS = ["grade_tables", "fields", "sheds", "zones", "fridges", "doors", "users",
+                    "stock_intakes", "stock_movements", "harvest_rollups"]
+ARCHIVE_COLLECTION_PATTERN = re.compile(r"^stock_(intakes|movements)_archive_[0-9A-Za-z_-]{1,20}$")
+DUMP_BATCH_SIZE = int(os.environ.get('DUMP_BATCH_SIZE', '2000'))
+RESTORE_BATCH_SIZE = int(os.environ.get('RESTORE_BATCH_SIZE', '5000'))
+RESTORE_CHECKPOINT = "restore_checkpoint"
+
+
+def _dump_default(value):
+    if isinstance(value, ObjectId):
+        return {"$oid": str(value)}
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    raise TypeError(f"Type is not dumpable: {type(value).__name__}")
+
+
+def _dump_line(doc: dict) -> bytes:
+    return orjson.dumps(doc, default=_dump_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+
+
+def _restore_types(value):
+    """Inverse of _dump_default"""
+    if isinstance(value, dict):
+        if len(value) == 1:
+            if "$oid" in value:
+                return ObjectId(value["$oid"])
+            if "$date" in value:
+                return datetime.fromisoformat(value["$date"])
+        return {key: _restore_types(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_restore_types(item) for item in value]
+    return value
+
+
+def _dump_lines(contents: bytes):
+    """Decompress a dump incrementally and yield its non-empty lines (plain NDJSON is accepted too)"""
+    chunk_size = 1 << 20
+    decompressor = None if contents[:1] == b"{" else zlib.decompressobj(47)  # gzip or zlib header
+    pending = b""
+    for offset in range(0, len(contents), chunk_size):
+        chunk = contents[offset:offset + chunk_size]
+        pending += decompressor.decompress(chunk) if decompressor else chunk
+        *lines, pending = pending.split(b"\n")
+        yield from (line for line in lines if line)
+    if decompressor:
+        pending += decompressor.flush()
+    yield from (line for line in pending.split(b"\n") if line)
+
+
+def _dumpable(name) -> bool:
+    return name in DUMP_COLLECTIONS or bool(ARCHIVE_COLLECTION_PATTERN.match(str(name)))
+
+
+def _read_dump_header(contents: bytes) -> dict:
+    try:
+        header = orjson.loads(next(_dump_lines(contents)))["$dump"]
+    except (StopIteration, KeyError, TypeError, zlib.error, orjson.JSONDecodeError):
+        raise HTTPException(status_code=400, detail="Not a stock control dump")
+    if header.get("format") != DUMP_FORMAT:
+        raise HTTPException(status_code=400, detail=f"Unsupported dump format {header.get('format')}")
+    unknown = [name for name in header.get("collections", []) if not _dumpable(name)]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Dump contains collections that are not restored: {', '.join(map(str, unknown))}")
+    return header
+
+
+async def _dump_collection_names() -> list:
+    names = await db.list_collection_names()
+    return DUMP_COLLECTIONS + sorted(name for name in names if ARCHIVE_COLLECTION_PATTERN.match(name))
+
+
+async def _snapshot_session():
+    """
+    A snapshot session on a replica set, so every collection is read at the same
+    point in time; None on a standalone server, where the dump is best effort.
+    Snapshot reads fail once the dump outlives minSnapshotHistoryWindowInSeconds
+    (5 minutes by default).
+    """
+    try:
+        hello = await client.admin.command("hello")
+    except Exception:
+        return None
+    if "setName" not in hello:
+        return None
+    return await client.start_session(snapshot=True)
+
+
+async def dump_stream(dump_id: str, admin: str):
+    dump_start = time.perf_counter()
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    session = await _snapshot_session()
+    counts = {}
+    try:
+        collections = await _dump_collection_names()
+        yield compressor.compress(_dump_line({"$dump": {
+            "format": DUMP_FORMAT,
+            "id": dump_id,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "snapshot": session is not None,
+            "collections": collections,
+        }}) + b"\n")
+        for name in collections:
+            lines = [_dump_line({"$collection": name})]
+            count = 0
+            async for doc in db[name].find({}, session=session, batch_size=DUMP_BATCH_SIZE):
+                lines.append(_dump_line(doc))
+                count += 1
+                if len(lines) >= DUMP_BATCH_SIZE:
+                    yield compressor.compress(b"\n".join(lines) + b"\n")
+                    lines = []
+            counts[name] = count
+            yield compressor.compress(b"\n".join(lines) + b"\n")
+        yield compressor.compress(_dump_line({"$end": {"id": dump_id, "counts": counts}}) + b"\n")
+        yield compressor.flush()
+    finally:
+        if session is not None:
+            await session.end_session()
+        log_event("admin_dump", dump_id=dump_id, admin=admin, snapshot=session is not None,
+                  documents=sum(counts.values()), duration_ms=_elapsed_ms(dump_start))
+
+
+@api_router.get("/admin/dump")
+async def dump_database(admin: str = Depends(require_admin)):
+    """Stream every data collection as a gzip-compressed NDJSON dump (see POST /api/admin/restore)"""
+    dump_id = uuid.uuid4().hex
+    filename = f"stock-dump-{datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')}.ndjson.gz"
+    return StreamingResponse(
+        dump_stream(dump_id, admin),
+        media_type="application/gzip",
+        headers={"Content-Disposition": f"attachment; filename={filename}", "X-Dump-Id": dump_id},
+    )
+
+
+async def _insert_restore_batch(collection, docs: list) -> int:
+    """insert_many that counts documents already present (same _id) as restored"""
+    try:
+        result = await collection.insert_many(docs, ordered=False)
+        return len(result.inserted_ids)
+    except BulkWriteError as e:
+        if any(error["code"] != 11000 for error in e.details.get("writeErrors", [])):
+            raise
+        return e.details.get("nInserted", 0)
+
+
+async def restore_dump(job: JobContext, contents: bytes, replace: bool = False) -> dict:
+    """
+    Insert a dump's documents in batches. A checkpoint for the same dump resumes
+    after the last applied batch; otherwise the target collections must be
+    empty, or are cleared first when replace is set.
+    """
+    restore_start = time.perf_counter()
+    header = _read_dump_header(contents)
+    lines = _dump_lines(contents)
+    next(lines)
+    checkpoint = await db.metadata.find_one({"_id": RESTORE_CHECKPOINT})
+    resumed = bool(checkpoint) and checkpoint["dump_id"] == header["id"]
+    if resumed:
+        completed = set(checkpoint["completed"])
+        resume_collection, resume_after = checkpoint["collection"], checkpoint["applied"]
+    else:
+        completed, resume_collection, resume_after = set(), None, 0
+        non_empty = [name for name in header["collections"] if await db[name].estimated_document_count()]
+        if non_empty and not replace:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Collections already hold data ({', '.join(non_empty)}); restore with replace=true to overwrite them",
+            )
+        for name in non_empty:
+            await db[name].delete_many({})
+        await db.metadata.replace_one({"_id": RESTORE_CHECKPOINT}, {
+            "dump_id": header["id"],
+            "completed": [],
+            "collection": None,
+            "applied": 0,
+            "started_at": datetime.now(timezone.utc).isoformat(),
+        }, upsert=True)
+
+    collection, position, batch = None, 0, []
+    seen, restored, end = {}, 0, None
+
+    async def flush():
+        nonlocal batch, restored
+        if batch:
+            restored += await _insert_restore_batch(db[collection], batch)
+            batch = []
+            await db.metadata.update_one({"_id": RESTORE_CHECKPOINT},
+                                         {"$set": {"collection": collection, "applied": position}})
+
+    async def finish_collection():
+        await flush()
+        if collection is not None:
+            seen[collection] = position
+            if collection not in completed:
+                completed.add(collection)
+                await db.metadata.update_one({"_id": RESTORE_CHECKPOINT}, {
+                    "$addToSet": {"completed": collection},
+                    "$set": {"collection": None, "applied": 0},
+                })
+
+    for line in lines:
+        record = orjson.loads(line)
+        if "$collection" in record:
+            await finish_collection()
+            collection, position = record["$collection"], 0
+            # Only the collections a dump exports, and that the marker announced, are written
+            if collection not in header["collections"]:
+                raise HTTPException(status_code=400, detail=f"Dump section {collection!r} is not in its marker line")
+            if ARCHIVE_COLLECTION_PATTERN.match(collection):
+                await db[collection].create_index("id", unique=True)
+            done = len(seen) / max(len(header["collections"]), 1)
+            await job.progress(95 * done, f"Restoring {collection}")
+            continue
+        if "$end" in record:
+            await finish_collection()
+            end = record["$end"]
+            break
+        position += 1
+        if collection in completed or (collection == resume_collection and position <= resume_after):
+            continue
+        batch.append(_restore_types(record))
+        if len(batch) >= RESTORE_BATCH_SIZE:
+            await flush()
+
+    if end is None:
+        raise HTTPException(status_code=400, detail="Dump is truncated; post the complete file again to resume")
+    mismatched = sorted(name for name, count in end["counts"].items() if seen.get(name) != count)
+    if mismatched:
+        raise HTTPException(status_code=400, detail=f"Dump is inconsistent: wrong document count for {', '.join(mismatched)}")
+
+    await job.progress(95, "Refreshing caches")
+    await db.metadata.delete_one({"_id": RESTORE_CHECKPOINT})
+    await fields_changed()
+    await cache_bus.invalidate("stock", "layout", "grades", "users")
+    log_event("admin_restore", dump_id=header["id"], resumed=resumed, documents=restored,
+              duration_ms=_elapsed_ms(restore_start))
+    return {
+        "dump_id": header["id"],
+        "snapshot": header["snapshot"],
+        "resumed": resumed,
+        "documents_restored": restored,
+        "collections": seen,
+    }
+
+
+@api_router.post("/admin/restore", status_code=202)
+async def restore_database(file: UploadFile = File(...), replace: bool = False,
+                           admin: str = Depends(require_admin)):
+    """Queue restoring a dump from GET /api/admin/dump; post the same file again to resume a failed restore"""
+    contents = await file.read()
+    header = _read_dump_header(contents)
+    job = await job_runner.submit("restore", restore_dump, contents, replace,
+                                  dedupe_key=header["id"], submitted_by=admin)
+    return job_accepted(job)
+
+
+# Analytics Routes
+# Management reports computed with pandas over columnar projections of the stock data.
+# Results are cached per data version, so repeated report views don't touch MongoDB.
+# Reads go through report_db, like the integrity check and the export.
+ANALYTICS_BATCH_SIZE = int(os.environ.get('ANALYTICS_BATCH_SIZE', '5000'))
+ACRES_PATTERN = r"(\d+(?:\.\d+)?)"
+
+analytics_cache = VersionedCache("fields", "stock", "layout")
+
+INTAKE_COLUMNS = {"field_id": "", "field_name": "", "grade": "Ungraded", "quantity": 0.0}
+FIELD_COLUMNS = {"id": "", "name": "", "area": "", "crop_type": "", "variety": "", "harvest_year": "2025"}
+
+
+async def _load_frame(collection, query: dict, columns: dict) -> pd.DataFrame:
+    """
+    Read only the given columns of matching documents into a DataFrame.
+    columns maps document key -> default for missing or null values.
+    """
+    data = {name: [] for name in columns}
+    projection = {"_id": 0, **{name: 1 for name in columns}}
+    async for doc in collection.find(query, projection, batch_size=ANALYTICS_BATCH_SIZE):
+        for name, default in columns.items():
+            value = doc.get(name)
+            data[name].append(default if value is None else value)
+    return pd.DataFrame(data)
+
+
+async def _load_season(harvest_year: Optional[str]):
+    """Fields and intakes of one season (hot plus archived), or of all hot data when harvest_year is None"""
+    if harvest_year is None:
+        fields = await _load_frame(report_db.fields, {}, FIELD_COLUMNS)
+        intakes = await _load_frame(report_db.stock_intakes, {}, INTAKE_COLUMNS)
+        return fields, intakes
+    validate_harvest_year(harvest_year)
+    fields = await _load_frame(report_db.fields, {"harvest_year": harvest_year}, FIELD_COLUMNS)
+    hot = await _load_frame(report_db.stock_intakes, {"field_id": {"$in": fields["id"].tolist()}}, INTAKE_COLUMNS)
+    archived = await _load_frame(report_db[archive_collection_name("stock_intakes", harvest_year)], {}, INTAKE_COLUMNS)
+    return fields, pd.concat([hot, archived], ignore_index=True)
+
+
+def _frame_records(frame: pd.DataFrame) -> list:
+    """DataFrame rows as plain Python dicts, with NaN as None"""
+    columns = {name: frame[name].tolist() for name in frame.columns}
+    return [
+        {name: (None if isinstance(value, float) and value != value else value)
+         for name, value in zip(columns, row)}
+        for row in zip(*columns.values())
+    ]
+
+
+def field_grade_report(fields: pd.DataFrame, intakes: pd.DataFrame) -> dict:
+    """Tonnes stored per field, split by grade"""
+    if intakes.empty:
+        return {"grades": [], "grade_totals": {}, "total": 0.0, "fields": []}
+    table = intakes.pivot_table(index="field_id", columns="grade", values="quantity",
+                                aggfunc="sum", fill_value=0.0)
+    grades = table.columns.tolist()
+    # Intakes carry their own field_name, which covers fields deleted since
+    names = intakes.groupby("field_id")["field_name"].first()
+    info = fields.drop_duplicates("id").set_index("id").reindex(table.index)
+    report = pd.DataFrame({
+        "field_id": table.index,
+        "field_name": info["name"].fillna(names).to_numpy(),
+        "crop_type": info["crop_type"].to_numpy(),
+        "variety": info["variety"].to_numpy(),
+        "total": table.sum(axis=1).to_numpy(),
+    })
+    report["grades"] = [{grade: tonnes for grade, tonnes in zip(grades, row) if tonnes}
+                        for row in table.to_numpy().tolist()]
+    report = report.sort_values("total", ascending=False)
+    return {
+        "grades": grades,
+        "grade_totals": dict(zip(grades, table.sum(axis=0).tolist())),
+        "total": float(report["total"].sum()),
+        "fields": _frame_records(report),
+    }
+
+
+def field_yield_report(fields: pd.DataFrame, intakes: pd.DataFrame) -> dict:
+    """Tonnes per acre for every field of the season, using the acreage in Field.area"""
+    report = fields.drop_duplicates("id").rename(columns={"id": "field_id", "name": "field_name"})
+    report["acres"] = pd.to_numeric(report["area"].astype(str).str.extract(ACRES_PATTERN)[0], errors="coerce")
+    tonnes = intakes.groupby("field_id")["quantity"].sum()
+    report["tonnes"] = report["field_id"].map(tonnes).fillna(0.0)
+    report["tonnes_per_acre"] = (report["tonnes"] / report["acres"]).where(report["acres"] > 0).round(2)
+    report = report.sort_values(["tonnes_per_acre", "tonnes"], ascending=False, na_position="last")
+
+    measured = report[report["acres"] > 0]
+    acres = float(measured["acres"].sum())
+    return {
+        "total_acres": acres,
+        "total_tonnes": float(report["tonnes"].sum()),
+        "tonnes_per_acre": round(float(measured["tonnes"].sum()) / acres, 2) if acres else None,
+        "fields_without_area": int(report["acres"].isna().sum()),
+        "fields": _frame_records(report.drop(columns=["area"])),
+    }
+
+
+def shed_fill_report(sheds: pd.DataFrame, zones: pd.DataFrame) -> dict:
+    """Stored quantity against max_capacity per shed"""
+    zones = zones.assign(full=zones["total_quantity"] >= zones["max_capacity"],
+                         empty=zones["total_quantity"] <= 0)
+    per_shed = zones.groupby("shed_id").agg(
+        zones=("shed_id", "size"), stored=("total_quantity", "sum"), capacity=("max_capacity", "sum"),
+        full_zones=("full", "sum"), empty_zones=("empty", "sum"),
+    )
+    report = sheds.drop_duplicates("id").rename(columns={"id": "shed_id", "name": "shed_name"})
+    report = report.join(per_shed, on="shed_id").fillna({"zones": 0, "stored": 0.0, "capacity": 0,
+                                                        "full_zones": 0, "empty_zones": 0})
+    report[["zones", "capacity", "full_zones", "empty_zones"]] = \
+        report[["zones", "capacity", "full_zones", "empty_zones"]].astype(np.int64)
+    report["fill_percent"] = (100 * report["stored"] / report["capacity"]).where(report["capacity"] > 0).round(1)
+    report = report.sort_values(["order", "shed_name"]).drop(columns=["order"])
+
+    capacity = int(report["capacity"].sum())
+    stored = float(report["stored"].sum())
+    return {
+        "stored": stored,
+        "capacity": capacity,
+        "fill_percent": round(100 * stored / capacity, 1) if capacity else None,
+        "sheds": _frame_records(report),
+    }
+
+
+async def _cached_report(key: tuple, build):
+    """Serve a report from analytics_cache, building it with build() on a miss"""
+    result = analytics_cache.get(key)
+    if result is None:
+        version = analytics_cache.version()
+        report_start = time.perf_counter()
+        result = await build()
+        result["generated_at"] = datetime.now(timezone.utc).isoformat()
+        analytics_cache.put(key, version, result)
+        log_event("analytics_report", report=key[0], harvest_year=key[1], duration_ms=_elapsed_ms(report_start))
+    return result
+
+
+@api_router.get("/analytics/field-grades")
+async def get_field_grade_report(harvest_year: Optional[str] = None):
+    """Tonnes per field per grade, for one harvest year or across all hot stock"""
+    async def build():
+        fields, intakes = await _load_season(harvest_year)
+        result = await asyncio.to_thread(field_grade_report, fields, intakes)
+        return {"harvest_year": harvest_year, **result}
+    return await _cached_report(("field-grades", harvest_year), build)
+
+@api_router.get("/analytics/field-yield")
+async def get_field_yield_report(harvest_year: Optional[str] = None):
+    """Tonnes and tonnes per acre per field, for one harvest year or across all hot stock"""
+    async def build():
+        fields, intakes = await _load_season(harvest_year)
+        result = await asyncio.to_thread(field_yield_report, fields, intakes)
+        return {"harvest_year": harvest_year, **result}
+    return await _cached_report(("field-yield", harvest_year), build)
+
+@api_router.get("/analytics/shed-fill")
+async def get_shed_fill_report():
+    """Current fill percentage of every shed against its zones' max_capacity"""
+    async def build():
+        sheds = await _load_frame(report_db.sheds, {}, {"id": "", "name": "", "order": 9999})
+        zones = await _load_frame(report_db.zones, {}, {"shed_id": "", "total_quantity": 0.0, "max_capacity": 6})
+        return await asyncio.to_thread(shed_fill_report, sheds, zones)
+    return await _cached_report(("shed-fill", None), build)
+
+
+# Dashboard Route
+# The landing page polls this; a short max_age keeps it cheap under many open tabs
+# while stock writes still show up through the version check (after any secondary lag,
+# as it reads from report_db).
+DASHBOARD_CACHE_SECONDS = float(os.environ.get('DASHBOARD_CACHE_SECONDS', '10'))
+
+dashboard_cache = VersionedCache("fields", "stock", "layout", max_entries=1, max_age=DASHBOARD_CACHE_SECONDS)
+
+
+@api_router.get("/dashboard")
+async def get_dashboard():
+    """Headline counters plus per-shed zone count, stock and utilisation (share of zones holding stock)"""
+    result = dashboard_cache.get("dashboard")
+    if result is None:
+        version = dashboard_cache.version()
+        facets = await report_db.zones.aggregate([
+            {"$facet": {
+                "totals": [{"$group": {"_id": None, "stock": {"$sum": "$total_quantity"}}}],
+                "per_shed": [{"$group": {
+                    "_id": "$shed_id",
+                    "zones": {"$sum": 1},
+                    "stock": {"$sum": "$total_quantity"},
+                    "occupied": {"$sum": {"$cond": [{"$gt": ["$total_quantity", 0]}, 1, 0]}},
+                }}],
+            }}
+        ]).to_list(length=None)
+        per_shed = {row["_id"]: row for row in facets[0]["per_shed"]}
+        sheds = await report_db.sheds.find(
+            {}, {"_id": 0, "id": 1, "name": 1, "width": 1, "height": 1, "crop_type": 1}
+        ).to_list(length=None)
+        
+        shed_rows = []
+        for shed in sheds:
+            zones = per_shed.get(shed["id"], {})
+            zone_count = zones.get("zones", 0)
+            shed_rows.append({
+                **shed,
+                "zones": zone_count,
+                "stock": zones.get("stock", 0),
+                "utilization": round(100 * zones["occupied"] / zone_count) if zone_count else 0,
+            })
+        totals = facets[0]["totals"]
+        result = {
+            "total_fields": await report_db.fields.estimated_document_count(),
+            "total_sheds": await report_db.sheds.estimated_document_count(),
+            "total_zones": await report_db.zones.estimated_document_count(),
+            "total_stock": totals[0]["stock"] if totals else 0,
+            "sheds": shed_rows,
+        }
+        dashboard_cache.put("dashboard", version, result)
+    return result
+
+
+# Admin Profiling Routes
+PROFILE_DIR = Path(os.environ.get('PROFILE_DIR', str(ROOT_DIR / 'profiles')))
+PROFILE_MAX_FILES = int(os.environ.get('PROFILE_MAX_FILES', '50'))
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', '1') != '0'
+
+
+def _save_profile(profiler, meta: dict) -> dict:
+    """Write a captured profile plus a JSON sidecar, then prune the oldest beyond PROFILE_MAX_FILES"""
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    stem = f"{datetime.fromisoformat(meta['created_at']).strftime('%Y%m%dT%H%M%S%f')}_{meta['id']}"
+    if meta["profiler"] == "pyinstrument":
+        meta["file"] = f"{stem}.html"
+        (PROFILE_DIR / meta["file"]).write_text(profiler.output_html())
+    else:
+        meta["file"] = f"{stem}.prof"  # pstats format, e.g. for snakeviz or flameprof
+        profiler.dump_stats(str(PROFILE_DIR / meta["file"]))
+    (PROFILE_DIR / f"{stem}.json").write_bytes(orjson.dumps(meta))
+
+    sidecars = sorted(PROFILE_DIR.glob("*.json"))
+    for old in sidecars[:-PROFILE_MAX_FILES] if len(sidecars) > PROFILE_MAX_FILES else []:
+        old_meta = orjson.loads(old.read_bytes())
+        (PROFILE_DIR / old_meta.get("file", "")).unlink(missing_ok=True)
+        old.unlink(missing_ok=True)
+    return meta
+
+
+def _list_profiles() -> list:
+    if not PROFILE_DIR.exists():
+        return []
+    return [orjson.loads(p.read_bytes()) for p in sorted(PROFILE_DIR.glob("*.json"), reverse=True)]
+
+
+@api_router.get("/admin/profiles")
+async def list_profiles(admin: str = Depends(require_admin)):
+    """List captured request profiles, newest first"""
+    profiles = await asyncio.to_thread(_list_profiles)
+    return {"profiles": profiles, "max_files": PROFILE_MAX_FILES}
+
+@api_router.get("/admin/profiles/{profile_id}")
+async def download_profile(profile_id: str, admin: str = Depends(require_admin)):
+    """Download one captured profile (HTML from pyinstrument, .prof from cProfile)"""
+    profiles = await asyncio.to_thread(_list_profiles)
+    meta = next((p for p in profiles if p["id"] == profile_id), None)
+    if not meta or not (PROFILE_DIR / meta["file"]).exists():
+        raise HTTPException(status_code=404, detail="Profile not found")
+    media_type = "text/html" if meta["file"].endswith(".html") else "application/octet-stream"
+    return FileResponse(PROFILE_DIR / meta["file"], media_type=media_type, filename=meta["file"])
+
+
+# Metrics Route
+@api_router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Per-route request timing, MongoDB round trips and pool waits in Prometheus text format"""
+    return PlainTextResponse(route_metrics.render() + pool_metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 # Root route
 @api_router.get("/")
 async def root():
     return {"message": "Stock Control API"}
 
 
+# Response compression
+def _accepted_encodings(header: str) -> dict:
+    """Parse Accept-Encoding into {coding: q}"""
+    accepted = {}
+    for part in header.lower().split(","):
+        coding, *params = (token.strip() for token in part.split(";"))
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def _negotiate_encoding(headers) -> Optional[str]:
+    """Pick the content encoding with the highest q the client accepts (br wins ties with gzip)"""
+    accepted = _accepted_encodings(headers.get("accept-encoding", ""))
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    for coding in (["br"] if brotli is not None else []) + ["gzip"]:
+        q = accepted.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class _StreamCompressor:
+    """Incremental gzip/brotli compressor used for streamed response bodies"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress a chunk and flush it so the client can decode it straight away"""
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+class CompressionMiddleware:
+    """
+    gzip/brotli compression for API responses.
+    Bodies smaller than minimum_size are sent uncompressed, streamed bodies are
+    compressed chunk by chunk, and compressed bodies of cacheable reference
+    responses are kept in a small LRU so they aren't re-compressed per request.
+    """
+
+    COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6,
+                 brotli_quality: int = 5, cache_size: int = 64, cacheable_paths: Optional[str] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache_size = cache_size
+        self.cacheable_paths = re.compile(cacheable_paths) if cacheable_paths else None
+        self._cache = OrderedDict()  # (path, query, encoding) -> (body digest, compressed body)
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 31)
+        return compressor.compress(body) + compressor.flush()
+
+    def _compress_cached(self, scope, body: bytes, encoding: str) -> bytes:
+        """Reuse the compressed body when a cacheable response is byte-for-byte unchanged"""
+        if (self.cacheable_paths is None or scope.get("method") != "GET"
+                or not self.cacheable_paths.match(scope["path"])):
+            return self._compress(body, encoding)
+
+        key = (scope["path"], scope.get("query_string", b""), encoding)
+        digest = hashlib.blake2b(body, digest_size=16).digest()
+        cached = self._cache.get(key)
+        if cached and cached[0] == digest:
+            self._cache.move_to_end(key)
+            return cached[1]
+
+        compressed = self._compress(body, encoding)
+        self._cache[key] = (digest, compressed)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return compressed
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = _negotiate_encoding(Headers(scope=scope))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        mode = None  # None until the first body chunk: "passthrough" or "stream" afterwards
+        stream_compressor = None
+
+        async def send_compressed(message):
+            nonlocal start_message, mode, stream_compressor
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or mode == "passthrough":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if mode == "stream":
+                chunk = stream_compressor.compress(body)
+                if not more_body:
+                    chunk += stream_compressor.finish()
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            content_type = headers.get("content-type", "")
+            compressible = (
+                start_message["status"] == 200
+                and "content-encoding" not in headers
+                and content_type.startswith(self.COMPRESSIBLE_TYPES)
+                and not content_type.startswith("text/event-stream")
+            )
+            if not compressible or (not more_body and len(body) < self.minimum_size):
+                mode = "passthrough"
+                await send(start_message)
+                await send(message)
+                return
+
+            headers["Content-Encoding"] = encoding
+            headers.add_vary_header("Accept-Encoding")
+
+            if not more_body:
+                compressed = self._compress_cached(scope, body, encoding)
+                headers["Content-Length"] = str(len(compressed))
+                await send(start_message)
+                await send({"type": "http.response.body", "body": compressed})
+                return
+
+            mode = "stream"
+            del headers["Content-Length"]
+            stream_compressor = _StreamCompressor(encoding, self.gzip_level, self.brotli_quality)
+            await send(start_message)
+            await send({"type": "http.response.body", "body": stream_compressor.compress(body), "more_body": True})
+
+        await self.app(scope, receive, send_compressed)
+
+
+class RequestTimingMiddleware:
+    """
+    Records wall time, MongoDB round trips and response size per request.
+    The numbers are sent back as a Server-Timing header and aggregated per route
+    for /api/metrics, so N+1 query patterns show up as a high "db" op count.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = RequestMetrics()
+        token = _request_metrics.set(metrics)
+        status = 500
+
+        async def send_timed(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                app_ms = (time.perf_counter() - metrics.start) * 1000
+                headers = MutableHeaders(raw=message["headers"])
+                headers.append(
+                    "Server-Timing",
+                    f'app;dur={app_ms:.1f}, db;dur={metrics.db_seconds * 1000:.1f};desc="{metrics.db_operations} ops", '
+                    f'pool;dur={metrics.pool_wait_seconds * 1000:.1f}',
+                )
+            elif message["type"] == "http.response.body":
+                metrics.response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            _request_metrics.reset(token)
+            route = scope.get("route")
+            route_path = route.path if route is not None else "unmatched"
+            route_metrics.observe(scope["method"], route_path, status, time.perf_counter() - metrics.start, metrics)
+
+
+class ProfilingMiddleware:
+    """
+    Runs a request under a profiler when it carries "X-Profile: 1" and comes from
+    an admin session (bearer token). pyinstrument is used when installed (sampling,
+    async-aware); otherwise cProfile, which also records other requests that run
+    on the event loop at the same time. The profile id is returned in X-Profile-Id.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not PROFILING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        session = None
+        if headers.get("x-profile") == "1":
+            try:
+                session = read_authorization(headers.get("authorization"))
+            except HTTPException:
+                pass  # the route itself answers 401 if it needs a session
+        if not has_permission(session, "admin_control"):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex[:12]
+        status = 500
+
+        async def send_profiled(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(raw=message["headers"])["X-Profile-Id"] = profile_id
+            await send(message)
+
+        start = time.perf_counter()
+        if SamplingProfiler is not None:
+            profiler = SamplingProfiler(async_mode="enabled")
+            profiler_name = "pyinstrument"
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler_name = "cProfile"
+            profiler.enable()
+        try:
+            await self.app(scope, receive, send_profiled)
+        finally:
+            if profiler_name == "pyinstrument":
+                profiler.stop()
+            else:
+                profiler.disable()
+            meta = {
+                "id": profile_id,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "status": status,
+                "duration_ms": _elapsed_ms(start),
+                "profiler": profiler_name,
+                "employee_number": session["employee_number"],
+            }
+            try:
+                await asyncio.to_thread(_save_profile, profiler, meta)
+                log_event("request_profiled", **meta)
+            except Exception:
+                logger.exception("Could not save request profile %s", profile_id)
+
+
 # Include the router in the main app
 app.include_router(api_router)
 
+# Innermost, so profiles only cover the route itself
+app.add_middleware(ProfilingMiddleware)
+
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.environ.get('COMPRESSION_MIN_SIZE', '1024')),
+    gzip_level=int(os.environ.get('COMPRESSION_GZIP_LEVEL', '6')),
+    brotli_quality=int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '5')),
+    cache_size=int(os.environ.get('COMPRESSION_CACHE_SIZE', '64')),
+    # Reference data that is re-requested far more often than it changes
+    cacheable_paths=r"^/api/(fields|sheds|harvest-years|sheds/[^/]+/plan)$",
+)
+
+# Outside compression so response sizes are measured as sent
+app.add_middleware(RequestTimingMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -1712,13 +4453,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
-
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await coordinator.stop()
+    await cache_bus.stop()
+    workbook_pool.shutdown()
     client.close()
\ No newline at end of file
@@ -14,6 +14,35 @@ import { Toaster } from "@/components/ui/sonner";
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 export const API = `${BACKEND_URL}/api`;
 
+// Send the session token from /login with every request
+export const setSessionToken = (token) => {
+  if (token) {
+    axios.defaults.headers.common["Authorization"] = `Bearer ${token}`;
+  } else {
+    delete axios.defaults.headers.common["Authorization"];
+  }
+};
+
+// An expired or invalid session token: send the user back to the login page
+axios.interceptors.response.use(
+  (response) => response,
+  (error) => {
+    if (error.response?.status === 401) {
+      localStorage.removeItem("user");
+      setSessionToken(null);
+      window.location.assign("/login");
+    }
+    return Promise.reject(error);
+  }
+);
+
+// Restore the token before the first render so early requests carry it
+try {
+  setSessionToken(JSON.parse(localStorage.getItem("user") || "null")?.token);
+} catch (error) {
+  setSessionToken(null);
+}
+
 // Protected Route Component
 const ProtectedRoute = ({ children, requireAdmin = false }) => {
   const navigate = useNavigate();
@@ -73,10 +102,12 @@ function App() {
   }, []);
 
   const handleLogin = (userData) => {
+    setSessionToken(userData.token);
     setUser(userData);
   };
 
   const handleLogout = () => {
+    setSessionToken(null);
     localStorage.removeItem("user");
     setUser(null);
   };
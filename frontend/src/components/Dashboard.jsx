@@ -19,9 +19,6 @@ const Dashboard = ({ user, onLogout }) => {
     totalStock: 0
   });
   const [sheds, setSheds] = useState([]);
-  const [shedDetails, setShedDetails] = useState({});
-  const [stockIntakes, setStockIntakes] = useState([]);
-  const [fields, setFields] = useState([]);
   const [selectedCropFilter, setSelectedCropFilter] = useState('All');
 
   useEffect(() => {
@@ -30,42 +27,16 @@ const Dashboard = ({ user, onLogout }) => {
 
   const fetchStats = async () => {
     try {
-      const [fieldsRes, shedsRes, zonesRes, stockRes] = await Promise.all([
-        axios.get(`${API}/fields`),
-        axios.get(`${API}/sheds`),
-        axios.get(`${API}/zones`),
-        axios.get(`${API}/stock-intakes`)
-      ]);
-      
-      setFields(fieldsRes.data);
-      setStockIntakes(stockRes.data);
-
-      const totalStock = zonesRes.data.reduce((sum, zone) => sum + (zone.total_quantity || 0), 0);
+      // Counters and per-shed totals are aggregated server-side
+      const { data } = await axios.get(`${API}/dashboard`);
 
       setStats({
-        totalFields: fieldsRes.data.length,
-        totalSheds: shedsRes.data.length,
-        totalZones: zonesRes.data.length,
-        totalStock: totalStock
-      });
-
-      setSheds(shedsRes.data);
-      
-      // Calculate details for each shed
-      const details = {};
-      shedsRes.data.forEach(shed => {
-        const shedZones = zonesRes.data.filter(z => z.shed_id === shed.id);
-        const shedStock = shedZones.reduce((sum, z) => sum + (z.total_quantity || 0), 0);
-        const utilization = shedZones.length > 0 ? 
-          ((shedZones.filter(z => z.total_quantity > 0).length / shedZones.length) * 100).toFixed(0) : 0;
-        
-        details[shed.id] = {
-          zoneCount: shedZones.length,
-          totalStock: shedStock,
-          utilization: utilization
-        };
+        totalFields: data.total_fields,
+        totalSheds: data.total_sheds,
+        totalZones: data.total_zones,
+        totalStock: data.total_stock
       });
-      setShedDetails(details);
+      setSheds(data.sheds);
     } catch (error) {
       console.error("Error fetching stats:", error);
       toast.error("Failed to load dashboard data");
@@ -277,8 +248,6 @@ const Dashboard = ({ user, onLogout }) => {
                     return a.name.localeCompare(b.name);
                   })
                   .map((shed) => {
-                  const details = shedDetails[shed.id] || { zoneCount: 0, totalStock: 0, utilization: 0 };
-                  
                   return (
                     <Card 
                       key={shed.id} 
@@ -298,13 +267,13 @@ const Dashboard = ({ user, onLogout }) => {
                             <strong>Dimensions:</strong> {shed.width}m × {shed.height}m
                           </p>
                           <p className="text-sm text-gray-600">
-                            <strong>Storage Zones:</strong> {details.zoneCount}
+                            <strong>Storage Zones:</strong> {shed.zones}
                           </p>
                           <p className="text-sm text-gray-600">
-                            <strong>Total Stock:</strong> {details.totalStock.toFixed(0)} units
+                            <strong>Total Stock:</strong> {shed.stock.toFixed(0)} units
                           </p>
                           <p className="text-sm text-gray-600">
-                            <strong>Utilization:</strong> {details.utilization}%
+                            <strong>Utilization:</strong> {shed.utilization}%
                           </p>
                         </div>
                       </CardContent>
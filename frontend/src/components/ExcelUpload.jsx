@@ -1,6 +1,7 @@
 import { useState } from "react";
 import axios from "axios";
 import { API } from "@/App";
+import { waitForJob } from "@/lib/jobs";
 import { Button } from "@/components/ui/button";
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from "@/components/ui/card";
 import { Input } from "@/components/ui/input";
@@ -10,6 +11,7 @@ import { toast } from "sonner";
 const ExcelUpload = ({ onUploadSuccess }) => {
   const [file, setFile] = useState(null);
   const [uploading, setUploading] = useState(false);
+  const [progress, setProgress] = useState(null);
 
   const handleFileChange = (e) => {
     const selectedFile = e.target.files[0];
@@ -39,18 +41,27 @@ const ExcelUpload = ({ onUploadSuccess }) => {
         },
       });
       
+      // The import runs as a background job; poll it until it finishes
+      const result = await waitForJob(response.data.job_id, {
+        onProgress: (job) => setProgress(job.progress),
+      });
+      
       toast.success(
-        `Upload successful! Created ${response.data.fields_created} fields, ${response.data.stores_created} stores with ${response.data.zones_created} zones`
+        `Upload successful! ${result.fields_created} new and ${result.fields_updated} updated fields, ${result.stores_created} stores with ${result.zones_created} zones`
       );
+      if (result.warning) {
+        toast.warning(result.warning);
+      }
       setFile(null);
       if (onUploadSuccess) {
         onUploadSuccess();
       }
     } catch (error) {
       console.error("Upload error:", error);
-      toast.error(error.response?.data?.detail || "Failed to upload file");
+      toast.error(error.response?.data?.detail || error.message || "Failed to upload file");
     } finally {
       setUploading(false);
+      setProgress(null);
     }
   };
 
@@ -82,7 +93,7 @@ const ExcelUpload = ({ onUploadSuccess }) => {
               data-testid="btn-upload-excel"
             >
               <Upload className="mr-2 w-4 h-4" />
-              {uploading ? "Uploading..." : "Upload"}
+              {uploading ? (progress !== null ? `Importing... ${progress}%` : "Uploading...") : "Upload"}
             </Button>
           </div>
           {file && (
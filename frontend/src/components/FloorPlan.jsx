@@ -166,9 +166,16 @@ const FloorPlan = ({ user }) => {
 
   const fetchFields = async () => {
     try {
-      // Fetch all fields - no filtering needed
-      const response = await axios.get(`${API}/fields`);
-      setFields(response.data);
+      // Fetch all fields - no filtering needed. Imported fields reference a shared
+      // grade table instead of carrying their own grade list, so resolve it here
+      const [fieldsRes, gradeTablesRes] = await Promise.all([
+        axios.get(`${API}/fields`),
+        axios.get(`${API}/grade-tables`)
+      ]);
+      const gradeTables = gradeTablesRes.data.grade_tables;
+      setFields(fieldsRes.data.map(field => field.grade_table
+        ? { ...field, available_grades: gradeTables[field.grade_table] || [] }
+        : field));
     } catch (error) {
       console.error("Error fetching fields:", error);
     }
@@ -891,94 +898,29 @@ const FloorPlan = ({ user }) => {
     const field = fields.find(f => f.id === selectedField);
     if (!field) return;
 
-    // Use selected zones (must have at least one)
-    if (selectedZones.length === 0) {
-      toast.warning("Please select zones first by clicking on them");
-      return;
-    }
-
-    const zonesToUpdate = selectedZones;
-    console.log(`DEBUG: zonesToUpdate has ${zonesToUpdate.length} zones:`, zonesToUpdate.map(z => z.name));
-
-    // Check available capacity
-    const totalAvailable = zonesToUpdate.reduce((sum, z) => {
-      const available = (z.max_capacity || 6) - (z.total_quantity || 0);
-      return sum + Math.max(0, available);
-    }, 0);
-
-    if (qty > totalAvailable) {
-      toast.error(`Quantity exceeds available capacity. Max available: ${totalAvailable} units`);
-      return;
-    }
-
     try {
       // Set submitting flag
       setIsSubmitting(true);
       console.log("Starting stock intake submission...");
-      
-      // Distribute quantity: fill each zone to capacity, put remainder in last zone
-      let remainingQty = qty;
-      const distributions = [];
-      
-      console.log(`DEBUG: Distributing ${qty} units across ${zonesToUpdate.length} zones`);
-      
-      for (let i = 0; i < zonesToUpdate.length; i++) {
-        const zone = zonesToUpdate[i];
-        const available = (zone.max_capacity || 6) - (zone.total_quantity || 0);
-        
-        if (i === zonesToUpdate.length - 1) {
-          // Last zone: put all remaining quantity here
-          distributions.push({ zone, quantity: remainingQty });
-          console.log(`DEBUG: Zone ${zone.name} (last): ${remainingQty} units`);
-          remainingQty = 0;
-        } else {
-          // Fill to capacity or take what's needed
-          const qtyForThisZone = Math.min(available, remainingQty);
-          distributions.push({ zone, quantity: qtyForThisZone });
-          console.log(`DEBUG: Zone ${zone.name}: ${qtyForThisZone} units (available: ${available}, remaining: ${remainingQty})`);
-          remainingQty -= qtyForThisZone;
-        }
-      }
-      
-      console.log(`DEBUG: Total distributions: ${distributions.length}, Total qty: ${distributions.reduce((s, d) => s + d.quantity, 0)}`);
-      
-      // Create stock intake records in BATCH for better performance
-      const intakesToCreate = distributions
-        .filter(({ quantity }) => quantity > 0)
-        .map(({ zone, quantity }) => ({
-          field_id: field.id,
-          field_name: field.name,
-          variety: field.variety,  // NEW: Include variety to distinguish same field with different varieties
-          zone_id: zone.id,
-          shed_id: shedId,
-          quantity: quantity,
-          date: intakeDate,
-          grade: selectedGrade
-        }));
-      
-      if (intakesToCreate.length > 0) {
-        console.log(`DEBUG: Creating ${intakesToCreate.length} intakes in batch`);
-        await axios.post(`${API}/stock-intakes/batch`, intakesToCreate);
-        
-        // Log movements in batch as well
-        const movementPromises = distributions
-          .filter(({ quantity }) => quantity > 0)
-          .map(({ zone, quantity }) => 
-            logMovement(
-              zone.id,
-              zone.id,
-              "NO_LOCATION",
-              shedId,
-              quantity,
-              field.id,
-              field.name,
-              selectedGrade
-            )
-          );
-        await Promise.all(movementPromises);
+
+      // The server fills the zones to capacity against their current totals and
+      // logs the movements; with no zones selected it picks zones in this shed
+      const request = {
+        field_id: field.id,
+        grade: selectedGrade,
+        quantity: qty,
+        date: intakeDate,
+        employee_number: user?.employee_number || "Unknown"
+      };
+      if (selectedZones.length > 0) {
+        request.zone_ids = selectedZones.map(z => z.id);
+      } else {
+        request.auto_pick = true;
+        request.shed_id = shedId;
       }
-      
-      toast.success(`Stock added to ${zonesToUpdate.length} zone(s) from ${field.name} (${selectedGrade})`);
+      const { data } = await axios.post(`${API}/intakes/distribute`, request);
+
+      toast.success(data.message);
       setShowIntakeDialog(false);
       setSelectedCrop("");
       setSelectedYear("");
@@ -990,7 +932,7 @@ const FloorPlan = ({ user }) => {
       await Promise.all([fetchZones(), fetchStockIntakes()]);
     } catch (error) {
       console.error("Error adding stock:", error);
-      toast.error("Failed to add stock");
+      toast.error(error.response?.data?.detail || "Failed to add stock");
     } finally {
       // Always reset the submitting flag
       setIsSubmitting(false);
@@ -2251,24 +2193,21 @@ const DestinationFloorPlan = ({ shed, onZoneClick, selectedZones = [] }) => {
   const [doors, setDoors] = useState([]);
   const [hoveredZone, setHoveredZone] = useState(null);
   const [tooltipPosition, setTooltipPosition] = useState({ x: 0, y: 0 });
-  const [stockIntakes, setStockIntakes] = useState([]);
-  const [fields, setFields] = useState([]);
+  const [occupancy, setOccupancy] = useState({});
   
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const [zonesRes, fridgesRes, doorsRes, stockRes, fieldsRes] = await Promise.all([
+        const [zonesRes, fridgesRes, doorsRes, occupancyRes] = await Promise.all([
           axios.get(`${API}/zones?shed_id=${shed.id}`),
           axios.get(`${API}/fridges?shed_id=${shed.id}`),
           axios.get(`${API}/doors?shed_id=${shed.id}`),
-          axios.get(`${API}/stock-intakes`),
-          axios.get(`${API}/fields`)
+          axios.get(`${API}/sheds/${shed.id}/occupancy`)
         ]);
         setZones(zonesRes.data);
         setFridges(fridgesRes.data);
         setDoors(doorsRes.data);
-        setStockIntakes(stockRes.data);
-        setFields(fieldsRes.data);
+        setOccupancy(occupancyRes.data.zones);
       } catch (error) {
         console.error("Error fetching data:", error);
       }
@@ -2278,31 +2217,19 @@ const DestinationFloorPlan = ({ shed, onZoneClick, selectedZones = [] }) => {
   
   // Function to get zone contents for tooltip
   const getZoneContents = (zone) => {
-    const zoneIntakes = stockIntakes.filter(intake => intake.zone_id === zone.id);
+    const zoneOccupancy = occupancy[zone.id];
     
-    if (zoneIntakes.length === 0) {
+    if (!zoneOccupancy || zoneOccupancy.contents.length === 0) {
       return { isEmpty: true, quantity: 0, capacity: zone.max_capacity, fields: [] };
     }
     
-    const fieldMap = {};
-    zoneIntakes.forEach(intake => {
-      if (!fieldMap[intake.field_id]) {
-        const field = fields.find(f => f.id === intake.field_id);
-        fieldMap[intake.field_id] = {
-          fieldName: intake.field_name,
-          variety: field?.variety || 'Unknown',
-          grade: intake.grade || 'No grade',
-          quantity: 0
-        };
-      }
-      fieldMap[intake.field_id].quantity += intake.quantity;
-    });
-    
     return {
       isEmpty: false,
-      quantity: zone.total_quantity,
-      capacity: zone.max_capacity,
-      fields: Object.values(fieldMap)
+      quantity: zoneOccupancy.quantity,
+      capacity: zoneOccupancy.capacity,
+      fields: zoneOccupancy.contents.map(([fieldName, variety, grade, quantity]) => ({
+        fieldName, variety, grade, quantity
+      }))
     };
   };
 
@@ -2,6 +2,7 @@ import { useState, useEffect } from "react";
 import { useNavigate } from "react-router-dom";
 import axios from "axios";
 import { API } from "@/App";
+import { waitForJob, jobDownloadUrl, errorMessage, JobFailedError } from "@/lib/jobs";
 import { Button } from "@/components/ui/button";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Input } from "@/components/ui/input";
@@ -71,7 +72,9 @@ const ShedsManager = () => {
   const handleExportToExcel = async () => {
     try {
       toast.info("Preparing Excel export...");
-      const response = await axios.get(`${API}/export-excel`, {
+      const job = await axios.get(`${API}/export-excel`);
+      await waitForJob(job.data.job_id);
+      const response = await axios.get(jobDownloadUrl(job.data.job_id), {
         responseType: 'blob'
       });
       
@@ -110,14 +113,15 @@ const ShedsManager = () => {
     try {
       console.log("Calling API to clear all data...");
       const response = await axios.delete(`${API}/clear-all-data`);
-      console.log("Response:", response.data);
+      const result = await waitForJob(response.data.job_id);
+      console.log("Response:", result);
       
       toast.success("All data cleared successfully. Database reset.");
       setShowClearConfirm(false);
       fetchSheds();
     } catch (error) {
       console.error("Error clearing data:", error);
-      toast.error("Failed to clear data: " + (error.response?.data?.detail || error.message));
+      toast.error("Failed to clear data: " + errorMessage(error));
     }
   };
 
@@ -135,13 +139,15 @@ const ShedsManager = () => {
           'Content-Type': 'multipart/form-data',
         },
       });
+      const result = await waitForJob(response.data.job_id);
       
-      toast.success(`Name list uploaded successfully! ${response.data.message || 'Users updated.'}`);
+      toast.success(`Name list uploaded successfully! ${result.message || 'Users updated.'}`);
       // Reset the file input
       event.target.value = '';
     } catch (error) {
       console.error("Error uploading name list:", error);
-      toast.error("Failed to upload name list: " + (error.response?.data?.detail || error.message));
+      // A failed import job reports its own message (e.g. "No users found in the name list")
+      toast.error(error instanceof JobFailedError ? error.message : "Failed to upload name list: " + errorMessage(error));
       // Reset the file input
       event.target.value = '';
     }
@@ -0,0 +1,45 @@
+import axios from "axios";
+import { API } from "@/App";
+
+const POLL_INTERVAL_MS = 1000;
+
+// Thrown by waitForJob when the job failed; carries the job document
+export class JobFailedError extends Error {
+  constructor(job) {
+    super(job.error || "Job failed");
+    this.name = "JobFailedError";
+    this.job = job;
+  }
+}
+
+// Message to show for a failed request or job: the job's own error, else the
+// API's detail, else the network error
+export function errorMessage(error) {
+  if (error instanceof JobFailedError) {
+    return error.message;
+  }
+  return error.response?.data?.detail || error.message;
+}
+
+// Poll a background job until it finishes. Resolves with the job's result,
+// rejects with a JobFailedError carrying the job's error message if it failed.
+export async function waitForJob(jobId, { onProgress } = {}) {
+  for (;;) {
+    const { data: job } = await axios.get(`${API}/jobs/${jobId}`);
+    if (onProgress) {
+      onProgress(job);
+    }
+    if (job.status === "done") {
+      return job.result;
+    }
+    if (job.status === "failed") {
+      throw new JobFailedError(job);
+    }
+    await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS));
+  }
+}
+
+// Download the file produced by a finished job (e.g. the Excel export)
+export function jobDownloadUrl(jobId) {
+  return `${API}/jobs/${jobId}/download`;
+}
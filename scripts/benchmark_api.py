@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Load-test / benchmark suite for the Stock Control API.
+
+Seeds a throwaway database with a synthetic farm (sheds, zones, fields, stock
+intakes and movements), then drives the server.py endpoints in-process through
+httpx.AsyncClient + the ASGI app and records p50/p95/p99 latency and throughput
+per scenario. Results are written as JSON so runs can be compared.
+
+By default a local MongoDB at MONGO_URL (or mongodb://localhost:27017) is used
+with a dedicated database that is dropped first. If it isn't reachable, or
+--in-memory is passed, mongomock_motor is used instead (pip install mongomock-motor);
+absolute numbers are then only comparable with other in-memory runs.
+
+Usage:
+    cd backend
+    python3 ../scripts/benchmark_api.py --sheds 20 --zones-per-shed 200 --intakes 20000 \\
+        --output bench-results.json
+    python3 ../scripts/benchmark_api.py --compare bench-results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, ROOT)
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "stock_control_benchmark")
+
+import httpx  # noqa: E402
+import openpyxl  # noqa: E402
+from motor.motor_asyncio import AsyncIOMotorClient  # noqa: E402
+
+import server  # noqa: E402
+from generate_workbook import generate_master_workbook  # noqa: E402
+
+BENCHMARK_DB = "stock_control_benchmark"
+GRADES = ["40/50", "50/60", "60/70", "70/80", "80+", "O Whole Crop"]
+VARIETIES = ["Figaro", "Hybound", "Red Baron", "Sturon", "Maris Piper"]
+
+
+# ---------------------------------------------------------------------------
+# Database setup and synthetic farm
+# ---------------------------------------------------------------------------
+
+async def connect(mongo_url: str, in_memory: bool):
+    """Return (database, backend name), falling back to mongomock_motor"""
+    if not in_memory:
+        client = AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=2000)
+        try:
+            await client.admin.command("ping")
+            await client.drop_database(BENCHMARK_DB)
+            return client[BENCHMARK_DB], "mongodb"
+        except Exception as e:
+            print(f"⚠️  MongoDB not reachable at {mongo_url} ({e.__class__.__name__}), using in-memory stand-in")
+
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        sys.exit("ERROR: no MongoDB available and mongomock_motor is not installed")
+    return AsyncMongoMockClient()[BENCHMARK_DB], "mongomock"
+
+
+async def seed_farm(db, sheds: int, zones_per_shed: int, fields: int, intakes: int, movements: int, seed: int = 42):
+    """Insert a realistic synthetic farm and return the ids the scenarios need"""
+    rng = random.Random(seed)
+    columns = 20
+
+    field_docs = []
+    for i in range(fields):
+        field_docs.append({
+            "id": str(uuid.uuid4()),
+            "name": f"Farm {i % 8} - Field {i}",
+            "area": f"{rng.randint(5, 60)} Acres",
+            "crop_type": "Onion" if i % 2 else "Maincrop Potato",
+            "variety": VARIETIES[i % len(VARIETIES)],
+            "available_grades": GRADES,
+            "harvest_year": "2025",
+            "type": "Brown" if i % 2 else None,
+        })
+
+    shed_docs, zone_docs = [], []
+    for s in range(sheds):
+        shed_id = str(uuid.uuid4())
+        rows = (zones_per_shed + columns - 1) // columns
+        shed_docs.append({
+            "id": shed_id,
+            "name": f"Store {s + 1}",
+            "width": columns * 2 + 2,
+            "height": rows * 2,
+            "description": f"Synthetic - {zones_per_shed} zones",
+            "doors": [{"side": "bottom", "position": 0}],
+            "order": s + 1,
+        })
+        for z in range(zones_per_shed):
+            zone_docs.append({
+                "id": str(uuid.uuid4()),
+                "shed_id": shed_id,
+                "name": f"{openpyxl.utils.get_column_letter(z % columns + 1)}{z // columns + 1}",
+                "x": (z % columns) * 2,
+                "y": (z // columns) * 2,
+                "width": 2,
+                "height": 2,
+                "total_quantity": 0,
+                "max_capacity": 6,
+            })
+
+    zone_totals = {}
+    intake_docs = []
+    for _ in range(intakes):
+        zone = rng.choice(zone_docs)
+        field = rng.choice(field_docs)
+        quantity = float(rng.randint(1, 3))
+        zone_totals[zone["id"]] = zone_totals.get(zone["id"], 0) + quantity
+        intake_docs.append({
+            "id": str(uuid.uuid4()),
+            "field_id": field["id"],
+            "field_name": field["name"],
+            "variety": field["variety"],
+            "zone_id": zone["id"],
+            "shed_id": zone["shed_id"],
+            "quantity": quantity,
+            "date": "2025-09-14",
+            "grade": rng.choice(GRADES),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        })
+    for zone in zone_docs:
+        zone["total_quantity"] = zone_totals.get(zone["id"], 0)
+
+    movement_docs = []
+    for _ in range(movements):
+        src, dst = rng.choice(zone_docs), rng.choice(zone_docs)
+        field = rng.choice(field_docs)
+        movement_docs.append({
+            "id": str(uuid.uuid4()),
+            "from_zone_id": src["id"],
+            "to_zone_id": dst["id"],
+            "from_shed_id": src["shed_id"],
+            "to_shed_id": dst["shed_id"],
+            "quantity": 1.0,
+            "date": "2025-10-01",
+            "employee_number": "1234",
+            "field_id": field["id"],
+            "field_name": field["name"],
+            "grade": rng.choice(GRADES),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        })
+
+    for collection, docs in [("fields", field_docs), ("sheds", shed_docs), ("zones", zone_docs),
+                             ("stock_intakes", intake_docs), ("stock_movements", movement_docs)]:
+        if docs:
+            await db[collection].insert_many(docs)
+
+    return {"fields": field_docs, "sheds": shed_docs, "zones": zone_docs}
+
+
+def build_upload_workbook() -> bytes:
+    """Small master workbook in the layout upload_excel expects"""
+    return generate_master_workbook(fields=200, stores=2, rows=10, cols=20, layouts=("25",),
+                                    store_prefix="Bench Store")
+
+
+# ---------------------------------------------------------------------------
+# Scenarios
+# ---------------------------------------------------------------------------
+
+def build_scenarios(farm, rng):
+    zones = farm["zones"]
+    fields = farm["fields"]
+    shed_ids = [s["id"] for s in farm["sheds"]]
+    workbook = build_upload_workbook()
+
+    def batch_payload():
+        field = rng.choice(fields)
+        payload = []
+        for zone in rng.sample(zones, 10):
+            payload.append({
+                "field_id": field["id"],
+                "field_name": field["name"],
+                "variety": field["variety"],
+                "zone_id": zone["id"],
+                "shed_id": zone["shed_id"],
+                "quantity": 1,
+                "date": "2025-09-20",
+                "grade": rng.choice(GRADES),
+            })
+        return payload
+
+    def move_payload():
+        src, dst = rng.sample(zones, 2)
+        return {
+            "from_zone_id": src["id"],
+            "to_zone_id": dst["id"],
+            "from_shed_id": src["shed_id"],
+            "to_shed_id": dst["shed_id"],
+            "quantity": 0,  # Never fails the stock check, still does the full write path
+            "date": "2025-10-02",
+            "employee_number": "1234",
+        }
+
+    # name -> (kind, request factory, request-count multiplier)
+    return {
+        "list_stock_intakes": ("list", lambda c: c.get("/api/stock-intakes"), 1),
+        "list_fields": ("list", lambda c: c.get("/api/fields"), 1),
+        "list_sheds": ("list", lambda c: c.get("/api/sheds"), 1),
+        "list_zones_by_shed": ("list", lambda c: c.get("/api/zones", params={"shed_id": rng.choice(shed_ids)}), 1),
+        "list_stock_movements": ("list", lambda c: c.get("/api/stock-movements"), 1),
+        "batch_intake": ("write", lambda c: c.post("/api/stock-intakes/batch", json=batch_payload()), 1),
+        "move_stock": ("write", lambda c: c.post("/api/stock-movements", json=move_payload()), 1),
+        "upload_excel": ("import", lambda c: c.post(
+            "/api/upload-excel",
+            files={"file": ("bench.xlsx", workbook, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")},
+        ), 0.1),
+        "database_integrity": ("integrity", lambda c: c.get("/api/database-integrity"), 0.2),
+    }
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+async def wait_for_job(client, response, poll_interval: float = 0.05) -> dict:
+    """Poll a 202 job response until the job is done or failed and return the job document"""
+    status_url = response.json()["status_url"]
+    while True:
+        job = (await client.get(status_url)).json()
+        if job["status"] in ("done", "failed"):
+            return job
+        await asyncio.sleep(poll_interval)
+
+
+async def run_scenario(client, make_request, requests: int, concurrency: int):
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await make_request(client)
+            failed = response.status_code >= 400
+            if response.status_code == 202:
+                # Background job: latency is until the job finishes, not until it is queued
+                failed = (await wait_for_job(client, response))["status"] == "failed"
+            latencies.append((time.perf_counter() - start) * 1000)
+            if failed:
+                errors += 1
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    wall = time.perf_counter() - wall_start
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+        "throughput_rps": round(requests / wall, 2) if wall else 0.0,
+    }
+
+
+def compare(results, baseline_path, threshold):
+    """Print p50/p95 deltas against a previous run; return True if anything regressed"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+
+    regressed = False
+    print(f"\n📊 Comparison with {baseline_path} (regression threshold {threshold:.0%})")
+    print(f"{'scenario':<24}{'p50 before':>12}{'p50 now':>10}{'p95 before':>12}{'p95 now':>10}")
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            print(f"{name:<24}{'-':>12}{current['p50_ms']:>10}{'-':>12}{current['p95_ms']:>10}")
+            continue
+        flag = ""
+        for key in ("p50_ms", "p95_ms"):
+            if previous[key] and current[key] > previous[key] * (1 + threshold):
+                flag = "  ❌ regression"
+                regressed = True
+        print(f"{name:<24}{previous['p50_ms']:>12}{current['p50_ms']:>10}"
+              f"{previous['p95_ms']:>12}{current['p95_ms']:>10}{flag}")
+    return regressed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-url", default=os.environ["MONGO_URL"])
+    parser.add_argument("--in-memory", action="store_true", help="use mongomock_motor instead of MongoDB")
+    parser.add_argument("--sheds", type=int, default=10)
+    parser.add_argument("--zones-per-shed", type=int, default=200)
+    parser.add_argument("--fields", type=int, default=300)
+    parser.add_argument("--intakes", type=int, default=10000)
+    parser.add_argument("--movements", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=50, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--only", nargs="*", help="scenario names or kinds (list, write, import, integrity)")
+    parser.add_argument("--output", default="bench-results.json")
+    parser.add_argument("--compare", help="previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="relative slowdown counted as a regression")
+    args = parser.parse_args()
+
+    db, backend = await connect(args.mongo_url, args.in_memory)
+    server.db = server.report_db = db
+
+    print(f"🌱 Seeding {backend}: {args.sheds} sheds x {args.zones_per_shed} zones, "
+          f"{args.fields} fields, {args.intakes} intakes, {args.movements} movements")
+    seed_start = time.perf_counter()
+    farm = await seed_farm(db, args.sheds, args.zones_per_shed, args.fields, args.intakes, args.movements)
+    print(f"✅ Seeded in {time.perf_counter() - seed_start:.1f}s\n")
+
+    scenarios = build_scenarios(farm, random.Random(7))
+    results = {}
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        for name, (kind, make_request, multiplier) in scenarios.items():
+            if args.only and name not in args.only and kind not in args.only:
+                continue
+            requests = max(1, int(args.requests * multiplier))
+            concurrency = 1 if kind in ("import", "integrity") else args.concurrency
+            results[name] = await run_scenario(client, make_request, requests, concurrency)
+            r = results[name]
+            print(f"{name:<24} p50={r['p50_ms']:>8}ms p95={r['p95_ms']:>8}ms p99={r['p99_ms']:>8}ms "
+                  f"{r['throughput_rps']:>8} req/s  errors={r['errors']}")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "backend": backend,
+            "python": platform.python_version(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("compare", "output")},
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results written to {args.output}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
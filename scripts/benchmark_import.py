@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Benchmark /api/upload-excel against synthetic workbooks of increasing size.
+
+Each size runs in a fresh subprocess so peak RSS is measured per workbook. For
+every workbook the harness reports:
+  - load:  openpyxl.load_workbook() on its own
+  - parse: upload time not spent waiting on the database
+  - db:    time spent awaiting Motor operations (and how many were issued)
+  - peak RSS of the process or of a workbook pool worker, whichever is larger
+
+Uses MongoDB at MONGO_URL when reachable, otherwise mongomock_motor (see
+benchmark_api.py).
+
+Usage:
+    cd backend
+    python3 ../scripts/benchmark_import.py --sizes small medium large --output import-results.json
+"""
+import argparse
+import asyncio
+import contextlib
+import inspect
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPTS_DIR)
+
+from generate_workbook import generate_master_workbook  # noqa: E402
+
+SIZES = {
+    "small": {"fields": 100, "stores": 3, "rows": 8, "cols": 20},
+    "medium": {"fields": 600, "stores": 12, "rows": 12, "cols": 30},
+    "large": {"fields": 2000, "stores": 30, "rows": 16, "cols": 40},
+    "xlarge": {"fields": 5000, "stores": 60, "rows": 20, "cols": 50},
+}
+
+
+class DbTimer:
+    """Accumulates time spent awaiting database operations"""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.operations = 0
+
+    async def timed(self, awaitable):
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.operations += 1
+
+
+class TimedCursor:
+    def __init__(self, cursor, timer):
+        self._cursor = cursor
+        self._timer = timer
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def to_list(self, *args, **kwargs):
+        return self._timer.timed(self._cursor.to_list(*args, **kwargs))
+
+
+class TimedCollection:
+    def __init__(self, collection, timer):
+        self._collection = collection
+        self._timer = timer
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if name in ("find", "aggregate"):
+                return TimedCursor(result, self._timer)
+            if inspect.isawaitable(result):
+                return self._timer.timed(result)
+            return result
+        return call
+
+
+class TimedDatabase:
+    def __init__(self, database, timer):
+        self._database = database
+        self._timer = timer
+
+    def __getattr__(self, name):
+        return TimedCollection(getattr(self._database, name), self._timer)
+
+    def __getitem__(self, name):
+        return TimedCollection(self._database[name], self._timer)
+
+
+async def run_child(size: str, in_memory: bool) -> dict:
+    """Import one generated workbook into an empty database and measure it"""
+    import openpyxl
+    import httpx
+    from benchmark_api import connect, wait_for_job
+    import server
+
+    gen_start = time.perf_counter()
+    workbook = generate_master_workbook(**SIZES[size])
+    gen_seconds = time.perf_counter() - gen_start
+
+    load_start = time.perf_counter()
+    openpyxl.load_workbook(io.BytesIO(workbook))
+    load_seconds = time.perf_counter() - load_start
+
+    database, backend = await connect(os.environ["MONGO_URL"], in_memory)
+    timer = DbTimer()
+    server.db = server.report_db = TimedDatabase(database, timer)
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            response = await client.post(
+                "/api/upload-excel",
+                files={"file": ("synthetic.xlsx", workbook,
+                                "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")},
+            )
+            job = await wait_for_job(client, response, poll_interval=0.01)
+        total_seconds = time.perf_counter() - start
+
+    # Parsing runs in the workbook process pool; reap the workers so their peak counts too
+    server.workbook_pool.shutdown(wait=True)
+    peak_rss = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                   resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    if sys.platform != "darwin":
+        peak_rss *= 1024  # Linux reports KiB, macOS bytes
+
+    body = job.get("result") or {}
+    return {
+        "size": size,
+        "backend": backend,
+        "status": job["status"],
+        "workbook_kb": round(len(workbook) / 1024, 1),
+        "fields_created": body.get("fields_created"),
+        "stores_created": body.get("stores_created"),
+        "zones_created": body.get("zones_created"),
+        "generate_s": round(gen_seconds, 3),
+        "load_s": round(load_seconds, 3),
+        "total_s": round(total_seconds, 3),
+        "parse_s": round(total_seconds - timer.seconds, 3),
+        "db_s": round(timer.seconds, 3),
+        "db_operations": timer.operations,
+        "peak_rss_mb": round(peak_rss / (1024 * 1024), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", default=["small", "medium", "large"], choices=list(SIZES))
+    parser.add_argument("--in-memory", action="store_true", help="use mongomock_motor instead of MongoDB")
+    parser.add_argument("--output", default="import-results.json")
+    parser.add_argument("--child", choices=list(SIZES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = asyncio.run(run_child(args.child, args.in_memory))
+        print(json.dumps(result))
+        return
+
+    results = []
+    print(f"{'size':<8}{'xlsx KB':>9}{'zones':>8}{'load s':>8}{'parse s':>9}{'db s':>8}{'db ops':>8}{'RSS MB':>8}")
+    for size in args.sizes:
+        command = [sys.executable, os.path.abspath(__file__), "--child", size]
+        if args.in_memory:
+            command.append("--in-memory")
+        completed = subprocess.run(command, capture_output=True, text=True)
+        if completed.returncode != 0:
+            print(f"❌ {size} failed:\n{completed.stderr[-2000:]}")
+            continue
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        results.append(result)
+        print(f"{size:<8}{result['workbook_kb']:>9}{result['zones_created'] or 0:>8}{result['load_s']:>8}"
+              f"{result['parse_s']:>9}{result['db_s']:>8}{result['db_operations']:>8}{result['peak_rss_mb']:>8}")
+
+    with open(args.output, "w") as f:
+        json.dump({"results": results}, f, indent=2)
+    print(f"\n💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark list-endpoint serialisation: validated stdlib-json path vs orjson fast path.
+
+"before" is what FastAPI does for a route with response_model=List[Model]:
+validate every document, serialise it, and render it with the stdlib json encoder.
+"after" is server.fast_list_response() (fill defaults + orjson).
+
+No database is needed - documents are synthesised to look like production ones.
+
+Usage:
+    cd backend
+    python3 ../scripts/benchmark_serialisation.py [--docs 20000] [--repeat 5]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+sys.path.insert(0, ROOT)
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")  # The client is never used
+os.environ.setdefault("DB_NAME", "benchmark")
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+from typing import List  # noqa: E402
+
+import server  # noqa: E402
+
+GRADES = ["40/50", "50/60", "60/70", "70/80", "80+", "O Whole Crop", "Seed", "Chats"]
+
+
+def make_intake(i):
+    return {
+        "id": str(uuid.uuid4()),
+        "field_id": str(uuid.uuid4()),
+        "field_name": f"Farm {i % 12} - Field {i % 180}",
+        "variety": ["Figaro", "Hybound", "Red Baron", "Sturon"][i % 4],
+        "zone_id": str(uuid.uuid4()),
+        "shed_id": str(uuid.uuid4()),
+        "quantity": float(i % 7),
+        "date": "2025-09-14",
+        "grade": GRADES[i % len(GRADES)],
+        "created_at": "2025-09-14T08:12:44.120000+00:00",
+    }
+
+
+def make_field(i):
+    return {
+        "id": str(uuid.uuid4()),
+        "name": f"Farm {i % 12} - Field {i}",
+        "area": f"{10 + i % 40} Acres",
+        "crop_type": "Onion",
+        "variety": "Figaro",
+        "available_grades": GRADES,
+        "harvest_year": "2025",
+        "type": "Brown",
+    }
+
+
+def make_zone(i):
+    return {
+        "id": str(uuid.uuid4()),
+        "shed_id": str(uuid.uuid4()),
+        "name": f"A{i}",
+        "x": float(i % 40 * 2),
+        "y": float(i // 40 * 2),
+        "width": 2.0,
+        "height": 2.0,
+        "total_quantity": float(i % 6),
+        "max_capacity": 6,
+    }
+
+
+ENDPOINTS = [
+    ("/stock-intakes", server.StockIntake, make_intake),
+    ("/fields", server.Field, make_field),
+    ("/zones", server.Zone, make_zone),
+]
+
+
+async def before(field, docs):
+    content = await serialize_response(field=field, response_content=docs)
+    return JSONResponse(content).body
+
+
+async def after(model, docs):
+    return server.fast_list_response(model, docs).body
+
+
+async def best_of(repeat, coro_factory):
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = await coro_factory()
+        best = min(best, time.perf_counter() - start)
+        size = len(body)
+    return best, size
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=20000, help="documents per endpoint")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement (best is reported)")
+    args = parser.parse_args()
+
+    print(f"{'endpoint':<18}{'docs':>8}{'before ms':>12}{'after ms':>12}{'speedup':>10}{'bytes':>12}")
+    for path, model, factory in ENDPOINTS:
+        docs = [factory(i) for i in range(args.docs)]
+        field = create_response_field(name=f"Response_{model.__name__}", type_=List[model])
+
+        before_s, size = await best_of(args.repeat, lambda: before(field, docs))
+        after_s, _ = await best_of(args.repeat, lambda: after(model, docs))
+        print(f"{path:<18}{args.docs:>8}{before_s * 1000:>12.1f}{after_s * 1000:>12.1f}"
+              f"{before_s / after_s:>9.1f}x{size:>12}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Measure read throughput of the API as the number of uvicorn workers grows.
+
+For each worker count the script starts `uvicorn server:app --workers N` against
+a freshly seeded benchmark database, drives the read-only list scenarios from
+benchmark_api.py over real HTTP, and stops the server again. Reads should scale
+close to linearly until MongoDB or the CPU count becomes the limit.
+
+Needs a real MongoDB at MONGO_URL (worker processes can't share mongomock).
+
+Usage:
+    cd backend
+    python3 ../scripts/benchmark_workers.py --workers 1 2 4 --requests 400 --concurrency 32
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.join(SCRIPTS_DIR, "..", "backend")
+sys.path.insert(0, SCRIPTS_DIR)
+
+import httpx  # noqa: E402
+
+from benchmark_api import BENCHMARK_DB, build_scenarios, connect, run_scenario, seed_farm  # noqa: E402
+
+
+def start_server(workers: int, port: int, mongo_url: str) -> subprocess.Popen:
+    env = {**os.environ, "MONGO_URL": mongo_url, "DB_NAME": BENCHMARK_DB, "LOG_LEVEL": "WARNING"}
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--no-access-log"],
+        cwd=BACKEND_DIR, env=env,
+    )
+
+
+async def wait_until_ready(base_url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/api/")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} did not become ready")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--sheds", type=int, default=10)
+    parser.add_argument("--zones-per-shed", type=int, default=200)
+    parser.add_argument("--fields", type=int, default=300)
+    parser.add_argument("--intakes", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=400, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--output", default="worker-scaling.json")
+    args = parser.parse_args()
+
+    db, backend = await connect(args.mongo_url, in_memory=False)
+    if backend != "mongodb":
+        sys.exit("ERROR: benchmark_workers.py needs a real MongoDB shared by all worker processes")
+    farm = await seed_farm(db, args.sheds, args.zones_per_shed, args.fields, args.intakes, movements=0)
+    scenarios = {name: spec for name, spec in build_scenarios(farm, random.Random(7)).items() if spec[0] == "list"}
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    results = {}
+    print(f"{'workers':>8}{'scenario':>24}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for workers in args.workers:
+        server = start_server(workers, args.port, args.mongo_url)
+        try:
+            await wait_until_ready(base_url)
+            results[workers] = {}
+            limits = httpx.Limits(max_connections=args.concurrency)
+            async with httpx.AsyncClient(base_url=base_url, timeout=None, limits=limits) as client:
+                for name, (_, make_request, _) in scenarios.items():
+                    r = await run_scenario(client, make_request, args.requests, args.concurrency)
+                    results[workers][name] = r
+                    print(f"{workers:>8}{name:>24}{r['throughput_rps']:>10}{r['p50_ms']:>10}{r['p95_ms']:>10}")
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    # Throughput relative to the first worker count, per scenario
+    baseline = args.workers[0]
+    print(f"\n{'workers':>8}{'scaling (x)':>14}{'efficiency':>12}")
+    for workers in args.workers[1:]:
+        ratios = [results[workers][name]["throughput_rps"] / results[baseline][name]["throughput_rps"]
+                  for name in scenarios if results[baseline][name]["throughput_rps"]]
+        speedup = sum(ratios) / len(ratios) if ratios else 0.0
+        print(f"{workers:>8}{speedup:>14.2f}{speedup / (workers / baseline):>11.0%}")
+
+    with open(args.output, "w") as f:
+        json.dump({"workers": args.workers, "results": results}, f, indent=2)
+    print(f"\n💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
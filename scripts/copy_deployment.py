@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Copy every collection from one deployment to another through the bulk
+dump/restore endpoints. This replaces migrate_fast.py, migrate_deployments.py,
+migrate_remaining.py and migrate_movements_api.py, which crawled the list
+endpoints and posted one document at a time.
+
+The dump is saved to --dump-file first. If the restore fails part way, run the
+script again with --skip-dump: posting the same file resumes from the
+destination's checkpoint.
+
+Usage:
+    python3 scripts/copy_deployment.py \\
+        --source https://harvest-manager-6.emergent.host/api \\
+        --dest https://harvestflow.emergent.host/api --employee-number 1234
+"""
+import argparse
+import sys
+import time
+
+import requests
+
+POLL_INTERVAL = 2
+
+
+def login(api: str, employee_number: str) -> dict:
+    """Authorization header for an admin session on one deployment"""
+    response = requests.post(f"{api}/login", json={"employee_number": employee_number}, timeout=30)
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['token']}"}
+
+
+def download_dump(api: str, headers: dict, path: str) -> int:
+    with requests.get(f"{api}/admin/dump", headers=headers, stream=True, timeout=(30, 600)) as response:
+        response.raise_for_status()
+        size = 0
+        with open(path, "wb") as f:
+            for chunk in response.iter_content(chunk_size=1 << 20):
+                f.write(chunk)
+                size += len(chunk)
+    return size
+
+
+def restore_dump(api: str, headers: dict, path: str, replace: bool) -> dict:
+    with open(path, "rb") as f:
+        response = requests.post(f"{api}/admin/restore", headers=headers, params={"replace": str(replace).lower()},
+                                 files={"file": (path, f, "application/gzip")}, timeout=(30, 600))
+    response.raise_for_status()
+    job_id = response.json()["job_id"]
+    while True:
+        job = requests.get(f"{api}/jobs/{job_id}", headers=headers, timeout=30).json()
+        if job["status"] == "done":
+            return job["result"]
+        if job["status"] == "failed":
+            sys.exit(f"❌ Restore failed: {job.get('error')}\n   Run again with --skip-dump to resume")
+        print(f"   {job.get('progress', 0):>3}% {job.get('message') or ''}")
+        time.sleep(POLL_INTERVAL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", help="source API base URL, e.g. https://host/api")
+    parser.add_argument("--dest", required=True, help="destination API base URL")
+    parser.add_argument("--employee-number", required=True, help="admin employee number on both deployments")
+    parser.add_argument("--dump-file", default="deployment-dump.ndjson.gz")
+    parser.add_argument("--skip-dump", action="store_true", help="restore an existing --dump-file")
+    parser.add_argument("--replace", action="store_true", help="clear destination collections that already hold data")
+    args = parser.parse_args()
+
+    if not args.skip_dump:
+        if not args.source:
+            parser.error("--source is required unless --skip-dump is given")
+        start = time.perf_counter()
+        size = download_dump(args.source, login(args.source, args.employee_number), args.dump_file)
+        print(f"✅ Dumped {args.source} to {args.dump_file} ({size / 1024:.0f} KB, {time.perf_counter() - start:.1f}s)")
+
+    start = time.perf_counter()
+    result = restore_dump(args.dest, login(args.dest, args.employee_number), args.dump_file, args.replace)
+    print(f"✅ Restored {result['documents_restored']} documents into {args.dest} "
+          f"({time.perf_counter() - start:.1f}s{', resumed' if result['resumed'] else ''})")
+    for name, count in result["collections"].items():
+        print(f"   {name:<32}{count:>8}")
+
+
+if __name__ == "__main__":
+    main()
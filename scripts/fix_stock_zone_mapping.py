@@ -1,60 +1,53 @@
 #!/usr/bin/env python3
 """
 Fix stock intakes by remapping zone IDs from old deployment to new deployment
-Match zones by: shed_id + position (x, y)
+Match zones by: shed (id, else name) + position (x, y)
+
+The matching runs on the destination (POST /api/admin/remap-zones); this script
+only sends it the source deployment's zones and sheds.
+
+Usage:
+    python3 scripts/fix_stock_zone_mapping.py --employee-number 1234 [--dry-run]
 """
+import argparse
+
 import requests
-import time
 
+SOURCE_URL = "https://harvest-manager-6.emergent.host/api"
 DEST_URL = "https://harvestflow.emergent.host/api"
 
+
 def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", default=SOURCE_URL, help="deployment the stock intakes came from")
+    parser.add_argument("--dest", default=DEST_URL, help="deployment whose intakes are remapped")
+    parser.add_argument("--employee-number", required=True, help="admin employee number on the destination")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    args = parser.parse_args()
+
     print("🔧 Fixing Stock Zone Mappings\n")
-    
-    # Fetch all zones and stock intakes from destination
-    print("Fetching zones and stock intakes...")
-    zones = requests.get(f"{DEST_URL}/zones", timeout=30).json()
-    stock_intakes = requests.get(f"{DEST_URL}/stock-intakes", timeout=30).json()
-    
-    print(f"✅ Found {len(zones)} zones")
-    print(f"✅ Found {len(stock_intakes)} stock intakes")
-    
-    # Create a lookup: shed_id -> list of zones with their positions
-    zone_lookup = {}
-    for zone in zones:
-        shed_id = zone.get('shed_id')
-        x = zone.get('x')
-        y = zone.get('y')
-        zone_id = zone.get('id')
-        
-        key = f"{shed_id}_{x}_{y}"
-        zone_lookup[key] = zone_id
-    
-    print(f"\n✅ Created zone lookup with {len(zone_lookup)} entries")
-    
-    # Check which stock intakes have valid zones
-    valid_count = 0
-    invalid_count = 0
-    
-    for intake in stock_intakes:
-        zone_id = intake.get('zone_id')
-        # Check if this zone_id exists in our zones
-        zone_exists = any(z['id'] == zone_id for z in zones)
-        if zone_exists:
-            valid_count += 1
-        else:
-            invalid_count += 1
-    
-    print(f"\n📊 Stock Intake Status:")
-    print(f"   ✅ Valid zone references: {valid_count}")
-    print(f"   ❌ Invalid zone references: {invalid_count}")
-    
-    if invalid_count == 0:
-        print("\n✅ All stock intakes have valid zone references!")
-    else:
-        print(f"\n⚠️  {invalid_count} stock intakes reference non-existent zones")
-        print("   This is expected after migration - zones have new IDs")
-        print("   Recommendation: Clear data and re-upload Excel file")
+
+    zones = requests.get(f"{args.source}/zones", timeout=60).json()
+    sheds = requests.get(f"{args.source}/sheds", timeout=60).json()
+    print(f"✅ Found {len(zones)} zones in {len(sheds)} sheds on the source")
+
+    token = requests.post(f"{args.dest}/login", json={"employee_number": args.employee_number},
+                          timeout=30).json()["token"]
+    response = requests.post(
+        f"{args.dest}/admin/remap-zones",
+        json={"zones": zones, "sheds": sheds, "dry_run": args.dry_run},
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=120,
+    )
+    response.raise_for_status()
+    result = response.json()
+
+    print(f"\n📊 Stock Intake Status{' (dry run)' if result['dry_run'] else ''}:")
+    print(f"   ✅ Remapped: {result['intakes_remapped']} intakes from {result['zones_remapped']} old zones")
+    print(f"   ❌ Unmatched: {result['unmatched_intakes']} intakes")
+    for entry in result["unmatched"]:
+        print(f"      {entry['zone_id']}: {entry['reason']} ({len(entry['intake_ids'])} intakes, {entry['quantity']})")
+
 
 if __name__ == "__main__":
     main()
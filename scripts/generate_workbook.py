@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Generate synthetic master workbooks for import performance testing.
+
+The output matches the shapes upload_excel parses:
+  - "Grade Options Page" with one grade column per crop type
+  - "Master Harvest 25" (headers row 3, columns C-H) and/or
+    "Master Harvest 26" (headers row 4, columns D-I, Year column)
+  - one sheet per store: box stores are grids of capacity numbers with some
+    merged cells, bulk stores are merged "175t" cells, plus blue "Door" and
+    yellow "Fridge" filled cells
+
+Usage:
+    python3 scripts/generate_workbook.py --fields 2000 --stores 30 --rows 20 --cols 40 \\
+        --merge-density 0.2 --bulk-ratio 0.3 -o synthetic.xlsx
+"""
+import argparse
+import io
+import random
+
+import openpyxl
+from openpyxl.styles import PatternFill
+
+GRADE_TABLES = {
+    "Onion": ["40/50", "50/60", "60/70", "70/80", "80+", "O Whole Crop"],
+    "Onion Special": ["Shallot", "Pickler", "Special Whole Crop"],
+    "Maincrop": ["25/45", "45/65", "65/85", "85+", "Seed", "Chats", "Whole Crop"],
+    "Salad": ["Salad 20/30", "Salad 30/40", "Salad Whole Crop"],
+    "Carrot": ["Carrot Small", "Carrot Medium", "Carrot Large"],
+}
+CROPS = [
+    ("Onion", "Brown", ["Hybound", "Sturon", "Centurion"]),
+    ("Onion", "Red", ["Red Baron", "Figaro"]),
+    ("Onion", "Special", ["Shallot Longor"]),
+    ("Maincrop Potato", "White", ["Maris Piper", "Markies"]),
+    ("Salad Potato", "White", ["Gemson", "Jazzy"]),
+    ("Carrot", "Orange", ["Nairobi"]),
+]
+FARMS = ["Home Farm", "Manor Farm", "Grange Farm", "Lodge Farm", "Hall Farm", "Church Farm"]
+
+DOOR_FILL = PatternFill(start_color="FF0070C0", end_color="FF0070C0", fill_type="solid")
+FRIDGE_FILL = PatternFill(start_color="FFFFFF00", end_color="FFFFFF00", fill_type="solid")
+
+
+def _add_grade_sheet(wb):
+    ws = wb.create_sheet("Grade Options Page")
+    for col_idx, (crop, grades) in enumerate(GRADE_TABLES.items(), start=1):
+        ws.cell(1, col_idx, crop)
+        for row_idx, grade in enumerate(grades, start=2):
+            ws.cell(row_idx, col_idx, grade)
+
+
+def _add_harvest_sheet(wb, layout: str, fields: int, rng):
+    """layout "25": headers row 3 from column C; layout "26": headers row 4 from column D plus Year"""
+    if layout == "25":
+        ws = wb.create_sheet("Master Harvest 25")
+        header_row, first_col, year = 3, 3, "2025"
+    else:
+        ws = wb.create_sheet("Master Harvest 26")
+        header_row, first_col, year = 4, 4, "2026"
+
+    headers = ["Farm", "Field", "Acres", "Crop", "Variety", "Type"]
+    if layout == "26":
+        headers.append("Year")
+    for offset, header in enumerate(headers):
+        ws.cell(header_row, first_col + offset, header)
+
+    for i in range(fields):
+        crop, classification, varieties = CROPS[i % len(CROPS)]
+        values = [
+            rng.choice(FARMS),
+            f"Field {i + 1}",
+            rng.randint(4, 80),
+            crop,
+            classification,  # Classification column (stored as field "type")
+            rng.choice(varieties),  # Variety name column
+        ]
+        if layout == "26":
+            values.append(int(year))
+        for offset, value in enumerate(values):
+            ws.cell(header_row + 1 + i, first_col + offset, value)
+
+
+def _add_store_sheet(wb, name: str, bulk: bool, rows: int, cols: int, merge_density: float,
+                     fridges: int, doors: int, rng):
+    ws = wb.create_sheet(name)
+    ws.cell(1, 1, "Bulk" if bulk else "Box")
+
+    top, left = 3, 2
+    bottom, right = top + rows - 1, left + cols - 1
+
+    # Doors along the top edge of the grid, fridges in the bottom-right corner
+    reserved = set()
+    for d in range(doors):
+        col = left + (d + 1) * cols // (doors + 1)
+        cell = ws.cell(top, col, "Door")
+        cell.fill = DOOR_FILL
+        reserved.add((top, col))
+    for f in range(fridges):
+        row, col = bottom - 1, right - 1 - f * 2
+        if col < left or (row, col) in reserved:
+            break
+        ws.merge_cells(start_row=row, start_column=col, end_row=row + 1, end_column=col + 1)
+        cell = ws.cell(row, col, "Fridge")
+        cell.fill = FRIDGE_FILL
+        reserved.update({(row, col), (row, col + 1), (row + 1, col), (row + 1, col + 1)})
+
+    col_step = 2 if bulk else 1
+    for row in range(top, bottom + 1):
+        col = left
+        while col <= right:
+            if (row, col) in reserved:
+                col += 1
+                continue
+            span = col_step
+            if rng.random() < merge_density:
+                span += col_step
+            span = min(span, right - col + 1)
+            if any((row, c) in reserved for c in range(col, col + span)):
+                span = 1
+            if span > 1:
+                ws.merge_cells(start_row=row, start_column=col, end_row=row, end_column=col + span - 1)
+            ws.cell(row, col, f"{rng.choice([150, 175, 200])}t" if bulk else rng.choice([5, 6, 6, 6, 7, 8]))
+            col += span
+
+
+def generate_master_workbook(fields: int = 500, stores: int = 10, rows: int = 12, cols: int = 30,
+                             merge_density: float = 0.15, bulk_ratio: float = 0.25, fridges: int = 1,
+                             doors: int = 2, layouts=("25", "26"), store_prefix: str = "Store",
+                             seed: int = 1) -> bytes:
+    """Build a master workbook and return it as .xlsx bytes"""
+    rng = random.Random(seed)
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+
+    _add_grade_sheet(wb)
+    for layout in layouts:
+        _add_harvest_sheet(wb, layout, fields, rng)
+    for s in range(stores):
+        bulk = rng.random() < bulk_ratio
+        _add_store_sheet(wb, f"{store_prefix} {s + 1}", bulk, rows, cols, merge_density, fridges, doors, rng)
+
+    output = io.BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+
+def add_arguments(parser):
+    parser.add_argument("--fields", type=int, default=500, help="field rows per harvest sheet")
+    parser.add_argument("--stores", type=int, default=10, help="number of store sheets")
+    parser.add_argument("--rows", type=int, default=12, help="zone grid rows per store")
+    parser.add_argument("--cols", type=int, default=30, help="zone grid columns per store")
+    parser.add_argument("--merge-density", type=float, default=0.15, help="share of zone cells that are merged")
+    parser.add_argument("--bulk-ratio", type=float, default=0.25, help="share of stores that are bulk (\"175t\")")
+    parser.add_argument("--fridges", type=int, default=1, help="fridges per store")
+    parser.add_argument("--doors", type=int, default=2, help="doors per store")
+    parser.add_argument("--layouts", nargs="+", default=["25", "26"], choices=["25", "26"],
+                        help="Master Harvest layouts to include")
+    parser.add_argument("--seed", type=int, default=1)
+
+
+def workbook_options(args) -> dict:
+    return {
+        "fields": args.fields,
+        "stores": args.stores,
+        "rows": args.rows,
+        "cols": args.cols,
+        "merge_density": args.merge_density,
+        "bulk_ratio": args.bulk_ratio,
+        "fridges": args.fridges,
+        "doors": args.doors,
+        "layouts": tuple(args.layouts),
+        "seed": args.seed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    parser.add_argument("-o", "--output", default="synthetic-master.xlsx")
+    args = parser.parse_args()
+
+    data = generate_master_workbook(**workbook_options(args))
+    with open(args.output, "wb") as f:
+        f.write(data)
+    print(f"✅ Wrote {args.output} ({len(data) / 1024:.0f} KB, {args.stores} stores, {args.fields} fields per harvest sheet)")
+
+
+if __name__ == "__main__":
+    main()
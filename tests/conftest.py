@@ -0,0 +1,82 @@
+"""
+Shared fixtures: the backend app on an in-memory mongomock database, driven
+through httpx's ASGI transport, so no server or MongoDB is needed.
+"""
+import os
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "stock_control_test")
+os.environ.setdefault("WORKBOOK_WORKERS", "0")  # parse workbooks in threads, not worker processes
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from mongomock_motor import AsyncMongoMockClient  # noqa: E402
+
+import server  # noqa: E402
+
+ADMIN = "1234"  # the hardcoded admin employee number
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def db(monkeypatch):
+    mongo = AsyncMongoMockClient()
+    database = mongo["stock_control_test"]
+    monkeypatch.setattr(server, "client", mongo)
+    monkeypatch.setattr(server, "db", database)
+    monkeypatch.setattr(server, "report_db", database)
+    monkeypatch.setattr(server.job_runner, "_locks", {})
+    monkeypatch.setattr(server, "_session_secret", b"test-secret")
+    # Module-level caches outlive a test; drop what earlier tests stored
+    for value in vars(server).values():
+        if isinstance(value, server.VersionedCache):
+            value._entries.clear()
+    return database
+
+
+@pytest.fixture
+async def client(db):
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        yield http
+
+
+@pytest.fixture
+async def admin_headers(client):
+    response = await client.post("/api/login", json={"employee_number": ADMIN})
+    return {"Authorization": f"Bearer {response.json()['token']}"}
+
+
+async def wait_for_job(client, response, headers=None) -> dict:
+    """Poll a 202 job response until the job finishes; returns the job document"""
+    assert response.status_code == 202, response.text
+    job_id = response.json()["job_id"]
+    while True:
+        job = (await client.get(f"/api/jobs/{job_id}", headers=headers)).json()
+        if job["status"] in ("done", "failed"):
+            return job
+        await server.asyncio.sleep(0.01)
+
+
+async def seed_shed(db, shed_id="s1", name="Shed 1", zones=4, capacity=6, quantities=None):
+    """A shed with a row of zones 2m apart; quantities sets each zone's total_quantity"""
+    quantities = quantities or [0.0] * zones
+    await db.sheds.insert_one({"id": shed_id, "name": name, "width": 20.0, "height": 10.0, "doors": [], "order": 1})
+    await db.zones.insert_many([
+        {"id": f"{shed_id}-z{i}", "shed_id": shed_id, "name": f"A{i}", "x": float(i * 2), "y": 0.0,
+         "width": 2.0, "height": 2.0, "total_quantity": quantities[i], "max_capacity": capacity}
+        for i in range(zones)
+    ])
+
+
+async def seed_field(db, field_id="f1", name="Home Farm - Field 1", variety="Red", harvest_year="2025"):
+    await db.fields.insert_one({"id": field_id, "name": name, "area": "10 Acres", "crop_type": "Onion",
+                                "variety": variety, "available_grades": ["40/50"], "harvest_year": harvest_year})
@@ -0,0 +1,64 @@
+"""Cache invalidation bus: other workers' events applied once, whatever order they land in"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def bus(db, monkeypatch):
+    monkeypatch.setattr(server.CacheInvalidationBus, "POLL_INTERVAL", 0.01)
+    bus = server.CacheInvalidationBus()
+    bus._tailable = False  # mongomock has no tailable cursors
+    bus._task = server.asyncio.create_task(bus._listen(0))
+    yield bus
+    await bus.stop()
+
+
+async def other_worker_event(db, seq, topic, at):
+    await db.cache_events.insert_one({"seq": seq, "topics": [topic], "worker": "other", "at": at})
+
+
+async def settle():
+    await server.asyncio.sleep(0.1)
+
+
+async def test_events_inserted_out_of_order_are_all_applied(db, bus):
+    now = datetime.now(timezone.utc)
+    # Worker A numbered and stamped its event first but inserted it last
+    await other_worker_event(db, 2, "stock", now + timedelta(milliseconds=5))
+    await settle()
+    assert (bus.version("stock"), bus.version("fields")) == (1, 0)
+    await other_worker_event(db, 1, "fields", now + timedelta(milliseconds=2))
+    await settle()
+    assert (bus.version("stock"), bus.version("fields")) == (1, 1)
+    assert (bus._floor, bus._seen) == (2, set())
+
+
+async def test_reopened_cursor_does_not_reapply(db, bus):
+    await other_worker_event(db, 1, "stock", datetime.now(timezone.utc))
+    await settle()
+    await settle()  # several polls, each a new cursor over the same events
+    assert bus.version("stock") == 1
+
+
+async def test_own_events_are_numbered_but_not_reapplied(db, bus):
+    await server.cache_bus.invalidate("grades")
+    await server.cache_bus.invalidate("grades")
+    await settle()
+    assert [e["seq"] async for e in db.cache_events.find()] == [1, 2]
+    assert bus.version("grades") == 0  # the events carry this worker's id
+    assert bus._floor == 2
+
+
+async def test_missing_number_is_given_up_after_timeout(db, bus, monkeypatch):
+    monkeypatch.setattr(server.CacheInvalidationBus, "GAP_TIMEOUT", 0.0)
+    await other_worker_event(db, 2, "stock", datetime.now(timezone.utc))
+    await settle()
+    await other_worker_event(db, 3, "fields", datetime.now(timezone.utc))
+    await settle()
+    assert (bus.version("stock"), bus.version("fields")) == (1, 1)
+    assert (bus._floor, bus._seen) == (3, set())
@@ -0,0 +1,82 @@
+"""Intake distribution: capacity planning, reservation and rollback"""
+import pytest
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+import server
+from tests.conftest import seed_field, seed_shed
+
+pytestmark = pytest.mark.anyio
+
+
+def zone(zone_id, stored, capacity=6):
+    return {"id": zone_id, "total_quantity": stored, "max_capacity": capacity}
+
+
+def test_plan_fills_zones_in_order():
+    plan = server.plan_distribution([zone("a", 4), zone("b", 0), zone("c", 0)], 5)
+    assert [(z["id"], q) for z, q in plan] == [("a", 2), ("b", 3)]
+
+
+def test_plan_skips_full_zones_and_rejects_overflow():
+    assert [z["id"] for z, _ in server.plan_distribution([zone("a", 6), zone("b", 1)], 5)] == ["b"]
+    assert server.plan_distribution([zone("a", 6), zone("b", 1)], 5.5) is None
+    assert server.plan_distribution([], 1) is None
+
+
+def test_plan_gives_rounding_leftover_to_last_zone():
+    plan = server.plan_distribution([zone("a", 5.9999995), zone("b", 0)], 1)
+    assert sum(q for _, q in plan) == pytest.approx(1)
+
+
+def test_plan_of_negligible_quantity_is_empty():
+    assert server.plan_distribution([zone("a", 0)], server.CAPACITY_EPSILON / 10) == []
+
+
+async def test_distribute_rejects_negligible_quantity(client, db):
+    await seed_shed(db)
+    await seed_field(db)
+    response = await client.post("/api/intakes/distribute", json={
+        "field_id": "f1", "grade": "40/50", "quantity": 1e-7, "date": "2025-09-01", "zone_ids": ["s1-z0"],
+    })
+    assert response.status_code == 400
+
+
+async def test_distribute_logs_movements_with_the_intake_date(client, db):
+    await seed_shed(db, quantities=[4.0, 0.0, 0.0, 0.0])
+    await seed_field(db)
+    response = await client.post("/api/intakes/distribute", json={
+        "field_id": "f1", "grade": "40/50", "quantity": 5, "date": "2025-09-01", "auto_pick": True, "shed_id": "s1",
+    })
+    assert response.status_code == 200
+    assert sum(a["quantity"] for a in response.json()["allocations"]) == 5
+    movements = await db.stock_movements.find({}, {"_id": 0}).to_list(length=None)
+    assert {m["date"] for m in movements} == {"2025-09-01"}
+    zones = await db.zones.find({}, {"_id": 0}).to_list(length=None)
+    assert sum(z["total_quantity"] for z in zones) == 9
+    assert not any("reservations" in z for z in zones)
+
+
+async def test_lost_race_undoes_every_reservation(db):
+    await seed_shed(db, zones=2, quantities=[0.0, 6.0])
+    # Planned against stale totals: s1-z1 filled up in the meantime
+    allocations = [(zone("s1-z0", 0), 6), (zone("s1-z1", 0), 2)]
+    assert await server._reserve_capacity(allocations) is False
+    zones = {z["id"]: z for z in await db.zones.find({}, {"_id": 0}).to_list(length=None)}
+    assert zones["s1-z0"]["total_quantity"] == 0
+    assert zones["s1-z1"]["total_quantity"] == 6
+    assert not any("reservations" in z for z in zones.values())
+
+
+async def test_failed_insert_releases_capacity(client, db):
+    await seed_shed(db, zones=2)
+    await seed_field(db)
+    # Make the movement log insert fail: both movements share a field_id
+    await db.stock_movements.create_index("field_id", unique=True)
+    with pytest.raises((BulkWriteError, DuplicateKeyError)):
+        await client.post("/api/intakes/distribute", json={
+            "field_id": "f1", "grade": "40/50", "quantity": 8, "date": "2025-09-01", "zone_ids": ["s1-z0", "s1-z1"],
+        })
+    zones = await db.zones.find({}, {"_id": 0}).to_list(length=None)
+    assert [z["total_quantity"] for z in zones] == [0, 0]
+    assert await db.stock_intakes.count_documents({}) == 0
+    assert await db.stock_movements.count_documents({}) == 0  # the first movement was written before the failure
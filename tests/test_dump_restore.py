@@ -0,0 +1,124 @@
+"""Bulk dump and restore between deployments"""
+import gzip
+from datetime import datetime
+
+import orjson
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+from tests.conftest import seed_field, seed_shed, wait_for_job
+
+pytestmark = pytest.mark.anyio
+
+
+async def seed_farm(db):
+    await seed_shed(db, quantities=[3.0, 0.0, 0.0, 0.0])
+    await seed_field(db)
+    await db.stock_intakes.insert_one({"id": "i1", "field_id": "f1", "field_name": "Home Farm - Field 1",
+                                       "zone_id": "s1-z0", "shed_id": "s1", "quantity": 3.0, "date": "2025-09-01"})
+    await db.stock_movements.insert_one({"id": "m1", "field_id": "f1", "at": datetime(2025, 9, 1, 8, 30)})
+    await db["stock_intakes_archive_2024"].insert_one({"id": "a1", "field_id": "old", "quantity": 2.0})
+
+
+async def dump(client, headers) -> bytes:
+    response = await client.get("/api/admin/dump", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    return response.content
+
+
+async def restore(client, headers, data: bytes, **params) -> dict:
+    response = await client.post("/api/admin/restore", headers=headers, params=params,
+                                 files={"file": ("dump.ndjson.gz", data)})
+    return await wait_for_job(client, response, headers)
+
+
+def make_dump(collections: dict) -> bytes:
+    """A well-formed dump of the given {collection: [docs]}"""
+    lines = [{"$dump": {"format": server.DUMP_FORMAT, "id": "d1", "snapshot": False, "collections": list(collections)}}]
+    for name, docs in collections.items():
+        lines += [{"$collection": name}, *docs]
+    lines.append({"$end": {"id": "d1", "counts": {name: len(docs) for name, docs in collections.items()}}})
+    return gzip.compress(b"\n".join(orjson.dumps(line) for line in lines) + b"\n")
+
+
+@pytest.fixture
+async def target(monkeypatch, db):
+    """Switch the app to an empty second database after the source has been dumped"""
+    def switch():
+        database = AsyncMongoMockClient()["stock_control_restore"]
+        monkeypatch.setattr(server, "db", database)
+        monkeypatch.setattr(server, "report_db", database)
+        return database
+    return switch
+
+
+async def test_round_trip_preserves_documents_and_ids(client, db, admin_headers, target):
+    await seed_farm(db)
+    data = await dump(client, admin_headers)
+    lines = gzip.decompress(data).splitlines()
+    assert orjson.loads(lines[0])["$dump"]["collections"][-1] == "stock_intakes_archive_2024"
+    assert "$end" in orjson.loads(lines[-1])
+
+    restored = target()
+    job = await restore(client, admin_headers, data)
+    assert job["status"] == "done", job.get("error")
+    assert job["result"]["resumed"] is False
+    for name in ("fields", "zones", "stock_intakes", "stock_movements", "stock_intakes_archive_2024"):
+        source = await db[name].find({}).sort("id").to_list(length=None)
+        assert await restored[name].find({}).sort("id").to_list(length=None) == source, name
+    assert await restored.metadata.find_one({"_id": server.RESTORE_CHECKPOINT}) is None
+
+
+async def test_restore_into_populated_database_needs_replace(client, db, admin_headers):
+    await seed_farm(db)
+    data = await dump(client, admin_headers)
+
+    job = await restore(client, admin_headers, data)
+    assert job["status"] == "failed"
+    assert "replace=true" in job["error"]
+    assert await db.zones.count_documents({}) == 4
+
+    job = await restore(client, admin_headers, data, replace="true")
+    assert job["status"] == "done", job.get("error")
+    assert await db.zones.count_documents({}) == 4
+    assert await db.stock_intakes.count_documents({}) == 1
+
+
+async def test_truncated_restore_resumes_from_checkpoint(client, db, admin_headers, target, monkeypatch):
+    await seed_farm(db)
+    data = await dump(client, admin_headers)
+    raw = gzip.decompress(data)
+    truncated = raw[:raw.index(b'{"$collection":"stock_intakes"}')]
+
+    restored = target()
+    monkeypatch.setattr(server, "RESTORE_BATCH_SIZE", 2)
+    job = await restore(client, admin_headers, gzip.compress(truncated))
+    assert job["status"] == "failed" and "truncated" in job["error"]
+    checkpoint = await restored.metadata.find_one({"_id": server.RESTORE_CHECKPOINT})
+    assert "zones" in checkpoint["completed"]
+
+    job = await restore(client, admin_headers, data)
+    assert job["status"] == "done", job.get("error")
+    assert job["result"]["resumed"] is True
+    assert await restored.zones.count_documents({}) == 4
+    assert await restored.stock_intakes.count_documents({}) == 1
+
+
+async def test_restore_only_writes_exported_collections(client, db, admin_headers):
+    response = await client.post("/api/admin/restore", headers=admin_headers,
+                                 files={"file": ("dump.ndjson.gz", make_dump({"jobs": [{"id": "x"}]}))})
+    assert response.status_code == 400
+
+    # A section the marker line did not announce
+    raw = gzip.decompress(make_dump({"zones": []})).replace(b'{"$collection":"zones"}',
+                                                             b'{"$collection":"sessions"}\n{"id":"x"}')
+    job = await restore(client, admin_headers, gzip.compress(raw))
+    assert job["status"] == "failed"
+    assert await db.sessions.count_documents({}) == 0
+
+
+async def test_dump_and_restore_need_an_admin(client, db):
+    assert (await client.get("/api/admin/dump")).status_code == 401
+    assert (await client.post("/api/admin/restore", files={"file": ("d", make_dump({}))})).status_code == 401
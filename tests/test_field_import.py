@@ -0,0 +1,94 @@
+"""Field ids from the workbook import: stable across re-imports, stock follows edited fields"""
+import io
+
+import openpyxl
+import pytest
+
+import server
+from tests.conftest import wait_for_job
+
+pytestmark = pytest.mark.anyio
+
+
+def master_workbook(rows) -> bytes:
+    """A "Master Harvest 25" sheet: headers on row 3 from column C; rows are (farm, field, crop, variety)"""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Master Harvest 25"
+    for offset, header in enumerate(["Farm", "Field", "Acres", "Crop", "Variety", "Type"]):
+        ws.cell(3, 3 + offset, header)
+    for index, (farm, field, crop, variety) in enumerate(rows, start=4):
+        for offset, value in enumerate([farm, field, 10, crop, "Brown", variety]):
+            ws.cell(index, 3 + offset, value)
+    output = io.BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+
+async def upload(client, rows) -> dict:
+    response = await client.post("/api/upload-excel", files={"file": ("master.xlsx", master_workbook(rows))})
+    job = await wait_for_job(client, response)
+    assert job["status"] == "done", job.get("error")
+    return job["result"]
+
+
+async def field_ids(db) -> dict:
+    return {(f["name"], f["variety"]): f["id"] for f in await db.fields.find({}, {"_id": 0}).to_list(length=None)}
+
+
+async def add_intake(db, intake_id, field_id, name, variety):
+    await db.stock_intakes.insert_one({"id": intake_id, "field_id": field_id, "field_name": name, "variety": variety,
+                                       "zone_id": "z1", "shed_id": "s1", "quantity": 3.0, "date": "2025-09-01"})
+
+
+@pytest.fixture(autouse=True)
+def threaded_workbooks(monkeypatch):
+    monkeypatch.setattr(server.workbook_pool, "workers", 0)
+
+
+ROWS = [("Home Farm", "Field 1", "Onion", "Hybound"), ("Home Farm", "Field 2", "Onion", "Sturon")]
+
+
+async def test_reimport_keeps_field_ids(client, db):
+    await upload(client, ROWS)
+    first = await field_ids(db)
+    assert first[("Home Farm - Field 1", "Hybound")] == server.field_id_for("Home Farm - Field 1", "Hybound", "2025")
+
+    # Force the field sheet to be re-read rather than skipped as unchanged
+    await db.metadata.delete_many({})
+    result = await upload(client, ROWS)
+    assert await field_ids(db) == first
+    assert (result["fields_created"], result["fields_updated"], result["fields_removed"]) == (0, 0, 0)
+
+
+async def test_variety_correction_moves_stock_to_the_new_field(client, db):
+    await upload(client, ROWS)
+    old_id = (await field_ids(db))[("Home Farm - Field 1", "Hybound")]
+    await add_intake(db, "i1", old_id, "Home Farm - Field 1", "Hybound")
+    await db.stock_movements.insert_one({"id": "m1", "field_id": old_id})
+
+    result = await upload(client, [("Home Farm", "Field 1", "Onion", "Centurion"), ROWS[1]])
+    new_id = (await field_ids(db))[("Home Farm - Field 1", "Centurion")]
+    assert new_id != old_id
+    assert result["fields_remapped"] == 1
+    assert result["orphaned_intakes"] == []
+    intake = await db.stock_intakes.find_one({"id": "i1"})
+    assert (intake["field_id"], intake["variety"]) == (new_id, "Centurion")
+    assert (await db.stock_movements.find_one({"id": "m1"}))["field_id"] == new_id
+
+
+async def test_stock_without_a_single_replacement_is_reported(client, db):
+    await upload(client, ROWS)
+    ids = await field_ids(db)
+    await add_intake(db, "gone", ids[("Home Farm - Field 2", "Sturon")], "Home Farm - Field 2", "Sturon")
+    await add_intake(db, "split", ids[("Home Farm - Field 1", "Hybound")], "Home Farm - Field 1", "Hybound")
+
+    # Field 2 dropped; Field 1 now listed with two other varieties, so neither is "the" replacement
+    result = await upload(client, [("Home Farm", "Field 1", "Onion", "Centurion"),
+                                   ("Home Farm", "Field 1", "Onion", "Red Baron")])
+    assert result["fields_remapped"] == 0
+    assert sorted(intake["id"] for intake in result["orphaned_intakes"]) == ["gone", "split"]
+    # Field 1's variety changed under existing stock too; both problems are reported
+    assert result["variety_conflicts"][0]["field_name"] == "Home Farm - Field 1"
+    assert "variety changes" in result["warning"]
+    assert "2 stock intake(s)" in result["warning"]
@@ -0,0 +1,74 @@
+"""Re-uploading the master workbook only re-imports the sheets that changed"""
+import io
+
+import openpyxl
+import pytest
+
+import server
+from tests.conftest import wait_for_job
+
+pytestmark = pytest.mark.anyio
+
+
+def workbook(stores: dict, field_variety="Hybound") -> bytes:
+    """A field sheet plus one box store per entry; stores maps sheet name -> row of zone capacities"""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Master Harvest 25"
+    for offset, value in enumerate(["Farm", "Field", "Acres", "Crop", "Variety", "Type"]):
+        ws.cell(3, 3 + offset, value)
+    for offset, value in enumerate(["Home Farm", "Field 1", 10, "Onion", "Brown", field_variety]):
+        ws.cell(4, 3 + offset, value)
+    for name, capacities in stores.items():
+        store = wb.create_sheet(name)
+        store.cell(1, 1, "Box")
+        for offset, capacity in enumerate(capacities):
+            store.cell(3, 2 + offset, capacity)
+    output = io.BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+
+async def upload(client, data) -> dict:
+    job = await wait_for_job(client, await client.post("/api/upload-excel", files={"file": ("master.xlsx", data)}))
+    assert job["status"] == "done", job.get("error")
+    return job["result"]
+
+
+@pytest.fixture(autouse=True)
+def threaded_workbooks(monkeypatch):
+    monkeypatch.setattr(server.workbook_pool, "workers", 0)
+
+
+async def test_unchanged_workbook_is_skipped(client, db):
+    data = workbook({"Store 1": [6, 6, 6], "Store 2": [8, 8]})
+    first = await upload(client, data)
+    assert (first["fields_created"], first["stores_created"], first["zones_created"]) == (1, 2, 5)
+    zone_ids = await db.zones.distinct("id")
+
+    again = await upload(client, data)
+    assert again["stores_unchanged"] == 2
+    assert (again["fields_created"], again["fields_updated"], again["zones_created"]) == (0, 0, 0)
+    assert sorted(await db.zones.distinct("id")) == sorted(zone_ids)
+
+
+async def test_only_edited_store_is_reimported(client, db):
+    await upload(client, workbook({"Store 1": [6, 6, 6], "Store 2": [8, 8]}))
+    store_1 = await db.sheds.find_one({"name": "Store 1"})
+    kept = await db.zones.find({"shed_id": store_1["id"]}, {"_id": 0, "id": 1}).to_list(length=None)
+
+    result = await upload(client, workbook({"Store 1": [6, 6, 6], "Store 2": [8, 8, 8]}))
+    assert (result["stores_unchanged"], result["stores_updated"]) == (1, 1)
+    assert result["zones_created"] == 1
+    assert await db.zones.find({"shed_id": store_1["id"]}, {"_id": 0, "id": 1}).to_list(length=None) == kept
+
+
+async def test_manual_layout_edit_forces_reimport(client, db):
+    data = workbook({"Store 1": [6, 6]})
+    await upload(client, data)
+    zone = await db.zones.find_one({}, {"_id": 0, "id": 1})
+    assert (await client.delete(f"/api/zones/{zone['id']}")).status_code == 200
+
+    result = await upload(client, data)
+    assert result["stores_updated"] == 1
+    assert await db.zones.count_documents({}) == 2
@@ -0,0 +1,56 @@
+"""Job runner: one active job per (kind, dedupe_key), even for simultaneous submissions"""
+import pytest
+
+import server
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def runner(db):
+    await server.job_runner.ensure_indexes()
+    return server.job_runner
+
+
+async def blocked_job(job, release):
+    await release.wait()
+    return {"ok": True}
+
+
+async def test_simultaneous_submissions_share_one_job(db, runner):
+    release = server.asyncio.Event()
+    jobs = await server.asyncio.gather(*[
+        runner.submit("workbook_import", blocked_job, release, dedupe_key="abc") for _ in range(3)
+    ])
+    assert len({job["id"] for job in jobs}) == 1
+    assert await db.jobs.count_documents({"kind": "workbook_import"}) == 1
+    release.set()
+
+
+async def test_new_job_once_the_previous_one_finished(db, runner):
+    release = server.asyncio.Event()
+    first = await runner.submit("workbook_import", blocked_job, release, dedupe_key="abc")
+    release.set()
+    while (await db.jobs.find_one({"id": first["id"]}))["status"] != "done":
+        await server.asyncio.sleep(0.01)
+    second = await runner.submit("workbook_import", blocked_job, release, dedupe_key="abc")
+    assert second["id"] != first["id"]
+
+
+async def test_jobs_without_a_dedupe_key_are_independent(db, runner):
+    release = server.asyncio.Event()
+    release.set()
+    first = await runner.submit("workbook_import", blocked_job, release)
+    second = await runner.submit("workbook_import", blocked_job, release)
+    assert first["id"] != second["id"]
+
+
+async def test_index_refuses_a_second_active_job_from_another_worker(db, runner):
+    release = server.asyncio.Event()
+    job = await runner.submit("workbook_import", blocked_job, release, dedupe_key="abc")
+    other = {"id": "other", "kind": "workbook_import", "dedupe_key": "abc", "status": "queued"}
+    with pytest.raises(server.DuplicateKeyError):
+        await db.jobs.insert_one(dict(other))
+    await db.jobs.insert_one(dict(other, status="done"))  # finished jobs are not constrained
+    assert (await runner.submit("workbook_import", blocked_job, release, dedupe_key="abc"))["id"] == job["id"]
+    release.set()
@@ -0,0 +1,100 @@
+"""Zone remap: intakes on stale zone ids moved to the zone at the same shed position"""
+import pytest
+
+from tests.conftest import seed_shed
+
+pytestmark = pytest.mark.anyio
+
+
+def source_zone(zone_id, shed_id, x, y=0.0):
+    return {"id": zone_id, "shed_id": shed_id, "x": x, "y": y}
+
+
+async def seed_intakes(db, *intakes):
+    await db.stock_intakes.insert_many([
+        {"id": intake_id, "field_id": "f1", "zone_id": zone_id, "shed_id": shed_id, "quantity": quantity,
+         "grade": "40/50", "date": "2025-09-01"}
+        for intake_id, zone_id, shed_id, quantity in intakes
+    ])
+
+
+@pytest.fixture
+async def stale_stock(db):
+    """Shed s1 as imported here, plus intakes still pointing at the source deployment's zones"""
+    await seed_shed(db)
+    await seed_intakes(
+        db,
+        ("i1", "old-z1", "s1", 2.0),
+        ("i2", "old-z1", "s1", 1.5),
+        ("i3", "old-z3", "s1", 4.0),
+        ("i4", "old-gone", "s1", 1.0),   # position has no zone here
+        ("i5", "old-unknown", "s1", 3.0),  # not in the source layout
+        ("i6", "s1-z0", "s1", 5.0),      # already on a current zone
+    )
+    return [source_zone("old-z1", "s1", 2.0), source_zone("old-z3", "s1", 6.0),
+            source_zone("old-gone", "s1", 40.0)]
+
+
+async def zone_totals(db):
+    return {zone["id"]: zone["total_quantity"] async for zone in db.zones.find({}, {"_id": 0})}
+
+
+async def test_dry_run_reports_without_writing(client, db, admin_headers, stale_stock):
+    response = await client.post("/api/admin/remap-zones", headers=admin_headers,
+                                 json={"zones": stale_stock, "dry_run": True})
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert result["dry_run"] is True
+    assert result["zones_indexed"] == 4
+    assert result["zones_remapped"] == 2
+    assert result["intakes_remapped"] == 3
+    assert result["quantity_remapped"] == pytest.approx(7.5)
+    assert result["unmatched_intakes"] == 2
+
+    intakes = {i["id"]: i["zone_id"] async for i in db.stock_intakes.find({}, {"_id": 0})}
+    assert intakes["i1"] == "old-z1" and intakes["i3"] == "old-z3"
+    assert await zone_totals(db) == {"s1-z0": 0.0, "s1-z1": 0.0, "s1-z2": 0.0, "s1-z3": 0.0}
+
+
+async def test_apply_moves_intakes_and_zone_totals(client, db, admin_headers, stale_stock):
+    response = await client.post("/api/admin/remap-zones", headers=admin_headers, json={"zones": stale_stock})
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert result["dry_run"] is False
+    assert result["intakes_remapped"] == 3
+
+    intakes = {i["id"]: i["zone_id"] async for i in db.stock_intakes.find({}, {"_id": 0})}
+    assert intakes == {"i1": "s1-z1", "i2": "s1-z1", "i3": "s1-z3",
+                       "i4": "old-gone", "i5": "old-unknown", "i6": "s1-z0"}
+    totals = await zone_totals(db)
+    assert totals["s1-z1"] == pytest.approx(3.5)
+    assert totals["s1-z3"] == pytest.approx(4.0)
+    assert totals["s1-z0"] == 0.0  # i6 was never stale
+
+    reasons = {entry["zone_id"]: (entry["reason"], entry["intake_ids"]) for entry in result["unmatched"]}
+    assert reasons == {
+        "old-gone": ("no zone at this position", ["i4"]),
+        "old-unknown": ("zone not in the source layout", ["i5"]),
+    }
+
+    # A second run finds nothing more to move
+    again = (await client.post("/api/admin/remap-zones", headers=admin_headers, json={"zones": stale_stock})).json()
+    assert again["intakes_remapped"] == 0
+    assert (await zone_totals(db))["s1-z1"] == pytest.approx(3.5)
+
+
+async def test_matches_by_shed_name_when_shed_ids_differ(client, db, admin_headers):
+    await seed_shed(db)
+    await seed_intakes(db, ("i1", "old-z2", "old-shed", 2.0))
+    response = await client.post("/api/admin/remap-zones", headers=admin_headers, json={
+        "zones": [source_zone("old-z2", "old-shed", 4.0)],
+        "sheds": [{"id": "old-shed", "name": "Shed 1"}],
+    })
+    assert response.json()["intakes_remapped"] == 1
+    intake = await db.stock_intakes.find_one({"id": "i1"})
+    assert (intake["zone_id"], intake["shed_id"]) == ("s1-z2", "s1")
+
+
+async def test_remap_requires_admin(client, db):
+    response = await client.post("/api/admin/remap-zones", json={"zones": []})
+    assert response.status_code == 401
@@ -0,0 +1,66 @@
+"""Signed session tokens from /login and the permission dependencies built on them"""
+import pytest
+
+import server
+from tests.conftest import ADMIN
+
+pytestmark = pytest.mark.anyio
+
+USER = {"employee_number": "77", "name": "Ann", "stock_movement": "Yes", "admin_control": "NO"}
+
+
+def test_token_round_trip(monkeypatch):
+    monkeypatch.setattr(server, "_session_secret", b"test-secret")
+    claims = server.read_session_token(server.issue_session_token(USER))
+    assert claims["sub"] == "77"
+    assert claims["perms"] == server.PERMISSION_BITS["stock_movement"]
+
+
+@pytest.mark.parametrize("tamper", [
+    lambda token: token + "x",
+    lambda token: token.replace(".", ".A", 1),
+    lambda token: "e30." + token.partition(".")[2],  # another payload ("{}") under the same signature
+    lambda token: token[:-2] + "é",  # non-ASCII signature
+    lambda token: "é" + token,  # non-ASCII payload
+    lambda token: "no-dot",
+    lambda token: "",
+])
+def test_tampered_tokens_are_rejected(monkeypatch, tamper):
+    monkeypatch.setattr(server, "_session_secret", b"test-secret")
+    assert server.read_session_token(tamper(server.issue_session_token(USER))) is None
+
+
+def test_tokens_from_another_secret_or_expired_are_rejected(monkeypatch):
+    monkeypatch.setattr(server, "_session_secret", b"other-secret")
+    foreign = server.issue_session_token(USER)
+    monkeypatch.setattr(server, "_session_secret", b"test-secret")
+    assert server.read_session_token(foreign) is None
+
+    monkeypatch.setattr(server, "SESSION_TTL", server.timedelta(seconds=-1))
+    assert server.read_session_token(server.issue_session_token(USER)) is None
+
+
+async def test_admin_routes_need_a_signed_admin_token(client, db):
+    await db.users.insert_one(dict(USER))
+    user_token = (await client.post("/api/login", json={"employee_number": "77"})).json()["token"]
+    admin_token = (await client.post("/api/login", json={"employee_number": ADMIN})).json()["token"]
+
+    def get(headers):
+        return client.get("/api/admin/profiles", headers=headers)
+
+    assert (await get({})).status_code == 401
+    assert (await get({"X-Employee-Number": ADMIN})).status_code == 401  # unsigned header is not trusted
+    assert (await get({"Authorization": f"Bearer {user_token}"})).status_code == 403
+    assert (await get({"Authorization": f"Bearer {admin_token}x"})).status_code == 401
+    assert (await get({"Authorization": "Bearer é.é".encode()})).status_code == 401  # non-ASCII header bytes
+    assert (await get({"Authorization": f"Bearer {admin_token}"})).status_code == 200
+
+
+async def test_login_reads_users_from_the_cache(client, db):
+    await db.users.insert_one(dict(USER))
+    assert (await client.post("/api/login", json={"employee_number": "77"})).status_code == 200
+    await db.users.delete_many({})
+    # Still served from the cache until the "users" topic moves
+    assert (await client.post("/api/login", json={"employee_number": "77"})).status_code == 200
+    await server.cache_bus.invalidate("users")
+    assert (await client.post("/api/login", json={"employee_number": "77"})).status_code == 404
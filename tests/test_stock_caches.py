@@ -0,0 +1,38 @@
+"""Stock writes must invalidate the cached views built from zone totals"""
+import pytest
+
+from tests.conftest import seed_shed
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_movement_refreshes_occupancy_and_dashboard(client, db):
+    await seed_shed(db, zones=2, quantities=[6.0, 2.0])
+    before = (await client.get("/api/sheds/s1/occupancy")).json()
+    assert [zone["quantity"] for zone in before["zones"].values()] == [6, 2]
+    assert (await client.get("/api/dashboard")).json()["total_stock"] == 8
+
+    response = await client.post("/api/stock-movements", json={
+        "from_zone_id": "s1-z0", "to_zone_id": "s1-z1", "from_shed_id": "s1", "to_shed_id": "s1",
+        "quantity": 2, "date": "2025-09-01",
+    })
+    assert response.status_code == 200
+
+    after = (await client.get("/api/sheds/s1/occupancy")).json()
+    assert after["zones"]["s1-z0"]["quantity"] == 4
+    assert after["zones"]["s1-z1"]["quantity"] == 4
+    assert after["zones"]["s1-z1"]["free"] == 2
+    fill = (await client.get("/api/analytics/shed-fill")).json()
+    assert fill["sheds"][0]["stored"] == 8
+
+
+async def test_occupancy_etag_revalidates(client, db):
+    await seed_shed(db, zones=1, quantities=[3.0])
+    first = await client.get("/api/sheds/s1/occupancy")
+    etag = first.headers["etag"]
+    assert (await client.get("/api/sheds/s1/occupancy", headers={"If-None-Match": etag})).status_code == 304
+
+    await client.put("/api/zones/s1-z0", params={"quantity": 5})
+    changed = await client.get("/api/sheds/s1/occupancy", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.json()["zones"]["s1-z0"]["quantity"] == 5